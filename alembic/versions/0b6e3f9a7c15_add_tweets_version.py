@@ -0,0 +1,30 @@
+"""Add tweets.version for the hydrated tweet cache
+
+Revision ID: 0b6e3f9a7c15
+Revises: f4a2d8c61b37
+Create Date: 2026-10-17 17:08:36.572913
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0b6e3f9a7c15"
+down_revision: Union[str, None] = "f4a2d8c61b37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tweets",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tweets", "version")
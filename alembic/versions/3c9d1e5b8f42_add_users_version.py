@@ -0,0 +1,30 @@
+"""Add users.version for profile ETags
+
+Revision ID: 3c9d1e5b8f42
+Revises: 0b6e3f9a7c15
+Create Date: 2026-10-17 17:46:02.913584
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9d1e5b8f42"
+down_revision: Union[str, None] = "0b6e3f9a7c15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "version")
@@ -0,0 +1,65 @@
+"""Add api_key_hash to users
+
+Revision ID: 5a9c1e7d2b40
+Revises: f315ef91303c
+Create Date: 2026-10-17 10:12:41.318204
+
+"""
+
+import os
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5a9c1e7d2b40"
+down_revision: Union[str, None] = "f315ef91303c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users", sa.Column("api_key_hash", sa.String(length=64), nullable=True)
+    )
+
+    # Заполняем дайджест для существующих пользователей. Ключи зашифрованы
+    # pgp_sym_encrypt; строки с ключом в открытом виде (тестовые данные
+    # populate_db.py) хешируются как есть.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION pg_temp.decrypt_api_key(value text, secret text)
+        RETURNS text AS $$
+        BEGIN
+            RETURN pgp_sym_decrypt(value::bytea, secret);
+        EXCEPTION WHEN others THEN
+            RETURN value;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.get_bind().execute(
+        sa.text(
+            """
+            UPDATE users
+            SET api_key_hash = encode(
+                hmac(pg_temp.decrypt_api_key(api_key, :secret), :secret, 'sha256'),
+                'hex'
+            )
+            WHERE api_key IS NOT NULL
+            """
+        ),
+        {"secret": os.getenv("API_KEY_SECRET", "your-secret-key")},
+    )
+
+    op.create_index(
+        op.f("ix_users_api_key_hash"), "users", ["api_key_hash"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_users_api_key_hash"), table_name="users")
+    op.drop_column("users", "api_key_hash")
@@ -0,0 +1,35 @@
+"""Add tweets.created_at for time-decayed ranking
+
+Revision ID: 7a4c2e9d1f60
+Revises: 3c9d1e5b8f42
+Create Date: 2026-10-17 18:32:41.207315
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7a4c2e9d1f60"
+down_revision: Union[str, None] = "3c9d1e5b8f42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tweets",
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tweets", "created_at")
@@ -0,0 +1,81 @@
+"""Add foreign key indexes and unique constraints
+
+Revision ID: 8d41f0b6c2e7
+Revises: 5a9c1e7d2b40
+Create Date: 2026-10-17 11:40:05.527319
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "8d41f0b6c2e7"
+down_revision: Union[str, None] = "5a9c1e7d2b40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Удаляем дубликаты лайков и подписок, накопленные без ограничений уникальности
+    op.execute(
+        """
+        DELETE FROM tweet_likes a
+        USING tweet_likes b
+        WHERE a.tweet_id = b.tweet_id AND a.user_id = b.user_id AND a.id > b.id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM user_followers a
+        USING user_followers b
+        WHERE a.follower_id = b.follower_id
+          AND a.following_id = b.following_id
+          AND a.id > b.id
+        """
+    )
+
+    op.create_unique_constraint(
+        "uq_tweet_likes_tweet_id_user_id", "tweet_likes", ["tweet_id", "user_id"]
+    )
+    op.create_index(op.f("ix_tweet_likes_user_id"), "tweet_likes", ["user_id"])
+
+    op.create_unique_constraint(
+        "uq_user_followers_follower_id_following_id",
+        "user_followers",
+        ["follower_id", "following_id"],
+    )
+    op.create_index(
+        "ix_user_followers_following_id_follower_id",
+        "user_followers",
+        ["following_id", "follower_id"],
+    )
+
+    op.create_index("ix_tweets_user_id_id", "tweets", ["user_id", "id"])
+    op.drop_index("ix_tweets_content", table_name="tweets")
+
+    op.create_index(op.f("ix_tweet_media_tweet_id"), "tweet_media", ["tweet_id"])
+    op.create_index(op.f("ix_tweet_media_media_id"), "tweet_media", ["media_id"])
+    op.create_index(op.f("ix_media_user_id"), "media", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_media_user_id"), table_name="media")
+    op.drop_index(op.f("ix_tweet_media_media_id"), table_name="tweet_media")
+    op.drop_index(op.f("ix_tweet_media_tweet_id"), table_name="tweet_media")
+
+    op.create_index("ix_tweets_content", "tweets", ["content"])
+    op.drop_index("ix_tweets_user_id_id", table_name="tweets")
+
+    op.drop_index(
+        "ix_user_followers_following_id_follower_id", table_name="user_followers"
+    )
+    op.drop_constraint(
+        "uq_user_followers_follower_id_following_id",
+        "user_followers",
+        type_="unique",
+    )
+
+    op.drop_index(op.f("ix_tweet_likes_user_id"), table_name="tweet_likes")
+    op.drop_constraint("uq_tweet_likes_tweet_id_user_id", "tweet_likes", type_="unique")
@@ -0,0 +1,30 @@
+"""Rebuild ix_tweets_user_id_id as plain (user_id, id) for profile pages
+
+Revision ID: 9e3b5d7f2a84
+Revises: 7a4c2e9d1f60
+Create Date: 2026-10-17 19:05:13.640281
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9e3b5d7f2a84"
+down_revision: Union[str, None] = "7a4c2e9d1f60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Без version в INCLUDE: version меняется при каждом лайке, и с ним в индексе
+    # такие обновления не могут быть HOT. Пересоздание приводит к простому
+    # индексу и базы, где уже был применен вариант с INCLUDE.
+    op.drop_index("ix_tweets_user_id_id", table_name="tweets")
+    op.create_index("ix_tweets_user_id_id", "tweets", ["user_id", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tweets_user_id_id", table_name="tweets")
+    op.create_index("ix_tweets_user_id_id", "tweets", ["user_id", "id"])
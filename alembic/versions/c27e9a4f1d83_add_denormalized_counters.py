@@ -0,0 +1,77 @@
+"""Add denormalized like, follower and tweet counters
+
+Revision ID: c27e9a4f1d83
+Revises: 8d41f0b6c2e7
+Create Date: 2026-10-17 12:58:32.904117
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c27e9a4f1d83"
+down_revision: Union[str, None] = "8d41f0b6c2e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tweets",
+        sa.Column("like_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    for column in ("followers_count", "following_count", "tweets_count"):
+        op.add_column(
+            "users",
+            sa.Column(column, sa.Integer(), server_default="0", nullable=False),
+        )
+
+    # Заполняем счетчики по существующим данным
+    op.execute(
+        """
+        UPDATE tweets
+        SET like_count = sub.cnt
+        FROM (SELECT tweet_id, count(*) AS cnt FROM tweet_likes GROUP BY tweet_id) sub
+        WHERE tweets.id = sub.tweet_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE users
+        SET followers_count = sub.cnt
+        FROM (
+            SELECT following_id, count(*) AS cnt
+            FROM user_followers GROUP BY following_id
+        ) sub
+        WHERE users.id = sub.following_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE users
+        SET following_count = sub.cnt
+        FROM (
+            SELECT follower_id, count(*) AS cnt
+            FROM user_followers GROUP BY follower_id
+        ) sub
+        WHERE users.id = sub.follower_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE users
+        SET tweets_count = sub.cnt
+        FROM (SELECT user_id, count(*) AS cnt FROM tweets GROUP BY user_id) sub
+        WHERE users.id = sub.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    for column in ("tweets_count", "following_count", "followers_count"):
+        op.drop_column("users", column)
+    op.drop_column("tweets", "like_count")
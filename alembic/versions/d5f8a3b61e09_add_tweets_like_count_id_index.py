@@ -0,0 +1,26 @@
+"""Add index for keyset pagination of tweets by like count (no-op)
+
+Revision ID: d5f8a3b61e09
+Revises: c27e9a4f1d83
+Create Date: 2026-10-17 14:12:47.281530
+
+"""
+
+from typing import Sequence, Union
+
+# revision identifiers, used by Alembic.
+revision: str = "d5f8a3b61e09"
+down_revision: Union[str, None] = "c27e9a4f1d83"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Индекс (like_count, id) больше не создается: популярная лента читает
+    # снимок tweet_rankings, а индекс по часто изменяемому like_count делал
+    # каждый лайк не-HOT обновлением. Ревизия оставлена для цепочки миграций.
+    pass
+
+
+def downgrade() -> None:
+    pass
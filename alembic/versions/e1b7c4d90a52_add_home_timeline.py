@@ -0,0 +1,57 @@
+"""Add precomputed home timeline
+
+Revision ID: e1b7c4d90a52
+Revises: d5f8a3b61e09
+Create Date: 2026-10-17 15:03:19.640218
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1b7c4d90a52"
+down_revision: Union[str, None] = "d5f8a3b61e09"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "home_timeline",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tweet_id", sa.Integer(), nullable=False),
+        sa.Column("author_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["author_id"], ["users.id"]),
+        sa.ForeignKeyConstraint(["tweet_id"], ["tweets.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "tweet_id"),
+    )
+    op.create_index(op.f("ix_home_timeline_tweet_id"), "home_timeline", ["tweet_id"])
+
+    # Заполняем ленты собственными твитами пользователей и последними
+    # твитами авторов, на которых они подписаны
+    op.execute(
+        """
+        INSERT INTO home_timeline (user_id, tweet_id, author_id)
+        SELECT f.follower_id, t.id, t.user_id
+        FROM user_followers f
+        CROSS JOIN LATERAL (
+            SELECT id, user_id FROM tweets
+            WHERE user_id = f.following_id
+            ORDER BY id DESC
+            LIMIT 100
+        ) t
+        UNION ALL
+        SELECT user_id, id, user_id FROM tweets
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_home_timeline_tweet_id"), table_name="home_timeline")
+    op.drop_table("home_timeline")
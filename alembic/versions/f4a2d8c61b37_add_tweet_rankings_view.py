@@ -0,0 +1,42 @@
+"""Add materialized tweet rankings view
+
+Revision ID: f4a2d8c61b37
+Revises: e1b7c4d90a52
+Create Date: 2026-10-17 16:21:54.118406
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f4a2d8c61b37"
+down_revision: Union[str, None] = "e1b7c4d90a52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW tweet_rankings AS
+        SELECT id AS tweet_id, like_count
+        FROM tweets
+        """
+    )
+    # Уникальный индекс по tweet_id нужен для REFRESH ... CONCURRENTLY
+    op.create_index(
+        "ix_tweet_rankings_tweet_id", "tweet_rankings", ["tweet_id"], unique=True
+    )
+    # Ключ сортировки и курсора популярной ленты
+    op.create_index(
+        "ix_tweet_rankings_like_count_tweet_id",
+        "tweet_rankings",
+        ["like_count", "tweet_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW tweet_rankings")
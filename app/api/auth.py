@@ -0,0 +1,47 @@
+from typing import Optional
+
+from fastapi import Header, HTTPException, Request
+
+from app.db import models
+from app.db.database import ReplicaSessionLocal
+from app.services import user_service
+
+# Ключи длиннее этого значения отклоняются без обращения к базе данных.
+MAX_API_KEY_LENGTH = 256
+
+
+async def get_current_user(
+    request: Request, api_key: Optional[str] = Header(None)
+) -> models.User:
+    """
+    Зависимость, аутентифицирующая пользователя по API ключу один раз за запрос.
+
+    Пользователь сохраняется в request.state.user. Зависимость должна
+    объявляться в обработчике раньше get_db: тогда запрос с неверным ключом
+    отклоняется до открытия сессии обработчика. Собственная сессия
+    зависимости (на реплике для чтения) берет соединение из пула только
+    при промахе кешей user_service и сразу его возвращает.
+
+    Аргументы:
+    - request: Текущий запрос.
+    - api_key: API-ключ, переданный в заголовке запроса.
+
+    Возвращает:
+    - models.User: Аутентифицированный пользователь (id и name).
+
+    Исключения:
+    - HTTP 403: Если ключ не передан или не действителен.
+    """
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return user
+    if not api_key or len(api_key) > MAX_API_KEY_LENGTH:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    async with ReplicaSessionLocal() as db:
+        user = await user_service.get_user_by_api_key(api_key, db)
+    if not user:
+        raise HTTPException(status_code=403, detail="Unauthorized")
+
+    request.state.user = user
+    return user
@@ -0,0 +1,75 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+# Клиент обязан перепроверять ответ при каждом запросе; промежуточные
+# кеши не должны хранить ответы, зависящие от API ключа.
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Строит слабый ETag из дешевых признаков содержимого ответа
+    (id и версий твитов, версии профиля, курсора).
+
+    Args:
+        *parts (Any): Значения, от которых зависит тело ответа.
+
+    Returns:
+        str: Значение заголовка ETag.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Проверяет, совпадает ли ETag с одним из значений If-None-Match.
+
+    Args:
+        request (Request): Входящий запрос.
+        etag (str): ETag текущего содержимого.
+
+    Returns:
+        bool: True, если клиент уже имеет актуальное содержимое.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tag = etag.removeprefix("W/")
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == tag:
+            return True
+    return False
+
+
+def not_modified_response(etag: str) -> Response:
+    """
+    Возвращает пустой ответ 304 Not Modified.
+
+    Args:
+        etag (str): ETag текущего содержимого.
+
+    Returns:
+        Response: Ответ со статусом 304.
+    """
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    )
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """
+    Добавляет к ответу заголовки ETag и Cache-Control.
+
+    Args:
+        response (Response): Ответ обработчика.
+        etag (str): ETag содержимого ответа.
+
+    Returns:
+        None
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
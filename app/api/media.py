@@ -4,13 +4,14 @@ import shutil
 import time
 from urllib.parse import quote
 
-from fastapi import APIRouter, Depends, File, Header, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import schemas
+from app.api import auth
+from app.db import models, schemas
 from app.db.database import get_db
-from app.services import media_service, user_service
+from app.services import media_service
 
 router = APIRouter()
 
@@ -47,30 +48,22 @@ async def get_media_file(user_id: int, filename: str) -> FileResponse:
 
 @router.post("/api/medias", response_model=schemas.MediaResponse)
 async def upload_media(
-    api_key: str = Header(None),
+    user: models.User = Depends(auth.get_current_user),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> dict:
     """
     Загружает медиафайл, генерирует уникальное имя файла и сохраняет его.
     Параметры:
-    - api_key (str): API-ключ пользователя для аутентификации.
+    - user (models.User): Пользователь, аутентифицированный по API-ключу.
     - file (UploadFile): Загружаемый медиафайл.
-    - db (Session): Сессия базы данных для выполнения запросов.
+    - db (AsyncSession): Асинхронная сессия базы данных для выполнения запросов.
     Возвращаемое значение:
     - dict: Возвращает объект с результатом загрузки и идентификатором медиафайла.
     Исключения:
     - HTTP 403: Если API-ключ не действителен.
     - HTTP 500: Если произошла ошибка при загрузке файла.
     """
-    if api_key is None:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-
-    # Получаем пользователя по API ключу
-    user = await user_service.get_user_by_api_key(api_key, db)
-    if not user:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-
     # Создаем уникальное имя для файла на основе временной метки
     timestamp = int(time.time())
     new_filename = f"{timestamp}_{file.filename}"
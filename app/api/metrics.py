@@ -0,0 +1,39 @@
+from fastapi import APIRouter
+
+from app.db import database
+from app.services import (
+    feed_push,
+    like_buffer,
+    timeline_service,
+    tweet_service,
+    user_service,
+)
+from app.services.recent_tweets import recent_tweets
+from app.services.trending import trending
+
+router = APIRouter()
+
+
+@router.get("/api/metrics", response_model=dict)
+async def get_metrics() -> dict:
+    """
+    Возвращает внутренние метрики воркера для сбора системой мониторинга.
+
+    Возвращает:
+    - JSON-ответ со статистикой кешей, буферов и push-канала воркера
+    и пулов соединений с базой данных.
+    """
+    metrics = {
+        "result": True,
+        "principal_cache": user_service.principal_cache.stats(),
+        "home_timeline_cache": timeline_service.home_timeline_cache.stats(),
+        "tweet_cache": tweet_service.tweet_cache.stats(),
+        "db_pool": database.get_pool_stats(),
+        "recent_tweets": recent_tweets.stats(),
+        "feed_push": feed_push.feed_hub.stats(),
+        "trending": trending.stats(),
+        "like_buffer": like_buffer.like_buffer.stats(),
+    }
+    if database.replica_engine is not database.engine:
+        metrics["db_replica_pool"] = database.get_pool_stats(database.replica_engine)
+    return metrics
@@ -0,0 +1,47 @@
+from typing import Any, List, Optional
+
+from fastapi.responses import ORJSONResponse
+
+from app.api import conditional
+
+
+def json_response(content: Any, etag: Optional[str] = None) -> ORJSONResponse:
+    """
+    Возвращает уже собранные данные ответа, сериализованные orjson.
+
+    FastAPI не применяет response_model к возвращенному объекту Response,
+    поэтому данные не проходят повторную валидацию Pydantic и
+    jsonable_encoder. Обработчик отвечает за то, чтобы content
+    соответствовал своему response_model: он по-прежнему описывает ответ
+    в OpenAPI.
+
+    Args:
+        content (Any): Данные ответа из словарей, списков и простых типов.
+        etag (Optional[str]): ETag содержимого ответа, если он нужен.
+
+    Returns:
+        ORJSONResponse: Готовый ответ.
+    """
+    response = ORJSONResponse(content=content)
+    if etag is not None:
+        conditional.set_etag(response, etag)
+    return response
+
+
+def tweet_list_response(
+    tweets: List[dict], next_cursor: Optional[str], etag: Optional[str] = None
+) -> ORJSONResponse:
+    """
+    Возвращает страницу твитов в форме schemas.TweetListResponse.
+
+    Args:
+        tweets (List[dict]): Твиты, собранные tweet_service.hydrate_tweets.
+        next_cursor (Optional[str]): Курсор следующей страницы.
+        etag (Optional[str]): ETag страницы.
+
+    Returns:
+        ORJSONResponse: Готовый ответ.
+    """
+    return json_response(
+        {"result": True, "tweets": tweets, "next_cursor": next_cursor}, etag
+    )
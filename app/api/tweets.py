@@ -1,70 +1,102 @@
-import os
+from typing import AsyncIterator, Literal, Optional
 
-from fastapi import APIRouter, Depends, Header, HTTPException
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session, joinedload
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
+from app import config
+from app.api import auth, conditional, responses
 from app.db import models, schemas
-from app.db.database import get_db
-from app.services import tweet_service, user_service
-from app.services.user_service import get_user_by_api_key
+from app.db.database import get_db, get_read_db, get_read_sessionmaker
+from app.services import (
+    events,
+    feed_push,
+    feed_ranking,
+    tweet_service,
+    user_service,
+)
+from app.services.recent_tweets import recent_tweets
+from app.services.trending import trending
 
 router = APIRouter()
 
 
 @router.get("/api/tweets", response_model=schemas.TweetListResponse)
 async def get_tweets(
-    api_key: str = Header(...), db: Session = Depends(get_db)
-) -> schemas.TweetListResponse:
+    request: Request,
+    limit: int = Query(config.TWEETS_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    sort: Literal["likes", "new"] = "likes",
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
     """
-    Получение списка твитов для авторизованного пользователя.
+    Получение страницы твитов для авторизованного пользователя.
 
     Аргументы:
-    - api_key: API-ключ, переданный в заголовке запроса для авторизации пользователя.
-    - db: Зависимость от сессии базы данных.
+    - request: Входящий запрос (заголовок If-None-Match).
+    - limit: Количество твитов на странице (не больше TWEETS_MAX_PAGE_SIZE).
+    - cursor: Курсор next_cursor из предыдущего ответа, для первой страницы
+    не передается.
+    - sort: Порядок твитов: likes - по убыванию лайков, new - от новых
+    к старым (первые страницы отдаются из буфера последних твитов воркера).
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
+    - db: Зависимость от сессии базы данных для чтения (реплика).
 
     Возвращает:
-    - JSON-ответ, содержащий список твитов с вложениями, данными автора и лайками,
-    отсортированный по лайкам.
+    - JSON-ответ, содержащий страницу твитов с вложениями, данными автора
+    и лайками и курсор следующей страницы, или 304, если страница не изменилась
+    с ETag из If-None-Match (без сборки твитов).
     """
-    user = await get_user_by_api_key(api_key, db)
-    if not user:
-        return JSONResponse(
-            content={
-                "result": False,
-                "error_type": "Unauthorized",
-                "error_message": "Invalid API key",
-            },
-            status_code=403,
-        )
+    limit = min(limit, config.TWEETS_MAX_PAGE_SIZE)
     try:
-        tweets = (
-            db.query(models.Tweet)
-            .options(
-                joinedload(models.Tweet.author), joinedload(models.Tweet.media_links)
+        if sort == "new":
+            before_id = None
+            if cursor is not None:
+                (before_id,) = tweet_service.decode_cursor(cursor)
+            page = recent_tweets.page(limit, before_id)
+            if page is not None:
+                tweet_responses, last_id = page
+                tweet_responses = tweet_service.overlay_pending_likes(
+                    tweet_responses, user.id
+                )
+                etag = conditional.make_etag(
+                    sort,
+                    last_id,
+                    [
+                        (tweet["id"], [like["user_id"] for like in tweet["likes"]])
+                        for tweet in tweet_responses
+                    ],
+                )
+                if conditional.is_not_modified(request, etag):
+                    return conditional.not_modified_response(etag)
+                return responses.tweet_list_response(
+                    tweet_responses,
+                    tweet_service.encode_cursor(last_id) if last_id else None,
+                    etag,
+                )
+            tweets, next_cursor = await tweet_service.get_latest_tweets_page(
+                limit, cursor, db
             )
-            .all()
+        else:
+            tweets, next_cursor = await tweet_service.get_tweets_page(limit, cursor, db)
+        etag = conditional.make_etag(
+            sort,
+            next_cursor,
+            [(tweet.id, tweet.version) for tweet in tweets],
+            tweet_service.pending_likes_key(user.id),
         )
-        tweet_responses = []
-        for tweet in tweets:
-            media_files = await tweet_service.get_tweet_attachments(tweet.id, db)
-            likes = await tweet_service.get_tweet_likes(tweet.id, db)
-            author = tweet.author if tweet.author else {"id": None, "name": None}
-            tweet_responses.append(
-                {
-                    "result": True,
-                    "id": tweet.id,
-                    "content": tweet.content,
-                    "attachments": media_files,
-                    "author": {"id": author.id, "name": author.name},
-                    "likes": likes,
-                }
-            )
-        # Сортировка твитов по количеству лайков (по убыванию)
-        tweet_responses.sort(key=lambda x: len(x["likes"]), reverse=True)
-
-        return schemas.TweetListResponse(result=True, tweets=tweet_responses)
+        if conditional.is_not_modified(request, etag):
+            return conditional.not_modified_response(etag)
+        tweet_responses = tweet_service.overlay_pending_likes(
+            await tweet_service.hydrate_tweets(tweets, db), user.id
+        )
+        return responses.tweet_list_response(tweet_responses, next_cursor, etag)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         return JSONResponse(
@@ -77,24 +109,206 @@ async def get_tweets(
         )
 
 
+@router.get("/api/tweets/home", response_model=schemas.TweetListResponse)
+async def get_home_timeline(
+    request: Request,
+    limit: int = Query(config.TWEETS_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    """
+    Получение домашней ленты: твиты пользователя и авторов, на которых он
+    подписан, от новых к старым.
+
+    Аргументы:
+    - request: Входящий запрос (заголовок If-None-Match).
+    - limit: Количество твитов на странице (не больше TWEETS_MAX_PAGE_SIZE).
+    - cursor: Курсор next_cursor из предыдущего ответа, для первой страницы
+    не передается.
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
+    - db: Зависимость от сессии базы данных для чтения (реплика).
+
+    Возвращает:
+    - JSON-ответ со страницей твитов и курсором следующей страницы или 304,
+    если страница не изменилась.
+    """
+    tweets, next_cursor = await tweet_service.get_home_timeline_page(
+        user.id, min(limit, config.TWEETS_MAX_PAGE_SIZE), cursor, db
+    )
+    etag = conditional.make_etag(
+        user.id,
+        next_cursor,
+        [(tweet.id, tweet.version) for tweet in tweets],
+        tweet_service.pending_likes_key(user.id),
+    )
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified_response(etag)
+    tweet_responses = tweet_service.overlay_pending_likes(
+        await tweet_service.hydrate_tweets(tweets, db), user.id
+    )
+    return responses.tweet_list_response(tweet_responses, next_cursor, etag)
+
+
+@router.get("/api/tweets/ranked", response_model=schemas.TweetListResponse)
+async def get_ranked_tweets(
+    limit: int = Query(config.TWEETS_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    strategy: str = "engagement",
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    """
+    Получение ленты, ранжированной выбранной стратегией, среди последних
+    RANKING_CANDIDATES твитов.
+
+    Аргументы:
+    - limit: Количество твитов на странице (не больше TWEETS_MAX_PAGE_SIZE).
+    - cursor: Курсор next_cursor из предыдущего ответа, для первой страницы
+    не передается.
+    - strategy: Стратегия ранжирования: recency - по новизне, likes - по лайкам,
+    engagement - лайки с затуханием по возрасту, affinity - engagement
+    с усилением авторов из подписок.
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
+    - db: Зависимость от сессии базы данных для чтения (реплика).
+
+    Возвращает:
+    - JSON-ответ со страницей твитов и курсором следующей страницы.
+    """
+    tweets, next_cursor = await feed_ranking.get_ranked_page(
+        user.id, strategy, min(limit, config.TWEETS_MAX_PAGE_SIZE), cursor, db
+    )
+    tweet_responses = tweet_service.overlay_pending_likes(
+        await tweet_service.hydrate_tweets(tweets, db), user.id
+    )
+    return responses.tweet_list_response(tweet_responses, next_cursor)
+
+
+@router.get("/api/tweets/trending", response_model=schemas.TweetListResponse)
+async def get_trending_tweets(
+    limit: int = Query(config.TWEETS_PAGE_SIZE, ge=1),
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    """
+    Получение популярного сейчас: твитов с наибольшим количеством лайков
+    за последние TRENDING_WINDOW_BUCKETS * TRENDING_BUCKET_SECONDS секунд.
+
+    Топ читается из снимка, который пересчитывается фоновой задачей,
+    поэтому время ответа не зависит от количества лайков.
+
+    Аргументы:
+    - limit: Количество твитов (не больше TRENDING_SIZE).
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
+    - db: Зависимость от сессии базы данных для чтения (реплика).
+
+    Возвращает:
+    - JSON-ответ со списком твитов; next_cursor всегда null.
+    """
+    tweets = await tweet_service.get_tweets_by_ids(trending.page(limit), db)
+    tweet_responses = tweet_service.overlay_pending_likes(
+        await tweet_service.hydrate_tweets(tweets, db), user.id
+    )
+    return responses.tweet_list_response(tweet_responses, None)
+
+
+@router.get("/api/tweets/export", response_model=schemas.TweetListResponse)
+async def export_tweets(
+    limit: int = Query(config.TWEETS_EXPORT_MAX_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    sort: Literal["likes", "new"] = "likes",
+    user: models.User = Depends(auth.get_current_user),
+) -> StreamingResponse:
+    """
+    Потоковая выгрузка большой страницы общей ленты.
+
+    Ответ имеет ту же форму, что и GET /api/tweets, но JSON формируется
+    по мере чтения твитов из серверного курсора пачками по
+    TWEETS_STREAM_BATCH_SIZE, поэтому память воркера не зависит от limit.
+    Курсор next_cursor передается в конце ответа.
+
+    Аргументы:
+    - limit: Количество твитов (не больше TWEETS_EXPORT_MAX_SIZE).
+    - cursor: Курсор next_cursor из предыдущего ответа, для первой страницы
+    не передается.
+    - sort: Порядок твитов: likes - по убыванию лайков, new - от новых к старым.
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
+
+    Возвращает:
+    - Потоковый JSON-ответ со списком твитов и курсором следующей страницы.
+    """
+    limit = min(limit, config.TWEETS_EXPORT_MAX_SIZE)
+    if cursor is not None:
+        # Поврежденный курсор отклоняется до отправки заголовков ответа
+        tweet_service.decode_feed_cursor(sort, cursor)
+
+    async def generate() -> AsyncIterator[bytes]:
+        # Сессия открывается в генераторе: зависимости с yield завершаются
+        # до отправки тела потокового ответа.
+        async with get_read_sessionmaker(user.id)() as db:
+            yield b'{"result":true,"tweets":['
+            separator = b""
+            next_cursor = None
+            async for tweets, next_cursor in tweet_service.stream_feed(
+                sort, limit, cursor, db, config.TWEETS_STREAM_BATCH_SIZE
+            ):
+                for tweet in await tweet_service.hydrate_tweets(tweets, db):
+                    yield separator + orjson.dumps(tweet)
+                    separator = b","
+            yield b'],"next_cursor":' + orjson.dumps(next_cursor) + b"}"
+
+    return StreamingResponse(generate(), media_type="application/json")
+
+
+@router.get("/api/tweets/stream", response_class=StreamingResponse)
+async def stream_tweet_events(
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> StreamingResponse:
+    """
+    Push-канал ленты (Server-Sent Events) вместо периодического опроса
+    GET /api/tweets.
+
+    Клиент получает события tweet_created (данные твита в формате ленты),
+    tweet_deleted, tweet_liked и tweet_unliked о твитах пользователя и авторов,
+    на которых он подписан. События доставляются в пределах воркера, принявшего
+    подключение. Если клиент не успевает читать события, часть из них
+    отбрасывается и приходит событие resync: ленту нужно перечитать запросом
+    GET /api/tweets. Пока событий нет, каждые FEED_PUSH_HEARTBEAT_SECONDS
+    отправляется комментарий-пинг.
+
+    Аргументы:
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
+    - db: Зависимость от сессии базы данных для чтения (реплика).
+
+    Возвращает:
+    - Поток text/event-stream.
+    """
+    following = await user_service.get_following_ids(user.id, db)
+    return StreamingResponse(
+        feed_push.stream_events(user.id, following),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.delete("/api/tweets/{tweet_id}", response_model=dict)
 async def delete_tweet(
-    tweet_id: int, api_key: str = Header(...), db: Session = Depends(get_db)
+    tweet_id: int,
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> dict:
     """
     Удаляет конкретный твит по ID.
 
     Аргументы:
     - tweet_id: ID твита для удаления.
-    - api_key: API-ключ, переданный в заголовке запроса для авторизации пользователя.
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
     - db: Зависимость от сессии базы данных.
 
     Возвращает:
     - JSON-ответ с подтверждением результата операции.
     """
-    user = await user_service.get_user_by_api_key(api_key, db)
-    if not user:
-        raise HTTPException(status_code=403, detail="Unauthorized")
     tweet = await tweet_service.get_tweet_by_id(tweet_id, db)
     if not tweet:
         raise HTTPException(status_code=404, detail="Tweet not found")
@@ -102,104 +316,100 @@ async def delete_tweet(
         raise HTTPException(
             status_code=403, detail="You can only delete your own tweets"
         )
-    media_files = (
-        db.query(models.TweetMedia).filter(models.TweetMedia.tweet_id == tweet_id).all()
+    await tweet_service.delete_tweet(tweet_id, db)
+    events.publish(
+        events.TWEET_DELETED, {"tweet_id": tweet_id, "author_id": tweet.user_id}
     )
-    for media_file in media_files:
-        db.delete(media_file)
-        media = (
-            db.query(models.Media)
-            .filter(models.Media.id == media_file.media_id)
-            .first()
-        )
-        if media and os.path.exists(media.file_path):
-            os.remove(media.file_path)
-            db.delete(media)
-    db.delete(tweet)
-    db.commit()
     return {"result": True}
 
 
 @router.post("/api/tweets/{tweet_id}/likes", response_model=dict)
 async def like_tweet(
-    tweet_id: int, api_key: str = Header(...), db: Session = Depends(get_db)
+    tweet_id: int,
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> dict:
     """
     Ставит лайк на твит для авторизованного пользователя.
 
     Аргументы:
     - tweet_id: ID твита, который нужно лайкнуть.
-    - api_key: API-ключ, переданный в заголовке запроса для авторизации пользователя.
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
     - db: Зависимость от сессии базы данных.
 
     Возвращает:
-    - JSON-ответ с подтверждением результата операции.
+    - JSON-ответ с подтверждением результата операции и признаком changed:
+      false, если лайк уже стоял.
     """
-    user = await get_user_by_api_key(api_key, db)
-    if not user:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    await tweet_service.like_tweet(tweet_id, user.id, db)
-    return {"result": True}
+    changed, author_id = await tweet_service.like_tweet(tweet_id, user, db)
+    if author_id is not None:
+        events.publish(
+            events.TWEET_LIKED,
+            {
+                "tweet_id": tweet_id,
+                "author_id": author_id,
+                "user_id": user.id,
+                "name": user.name,
+            },
+        )
+    return {"result": True, "changed": changed}
 
 
 @router.delete("/api/tweets/{tweet_id}/likes", response_model=dict)
 async def unlike_tweet(
-    tweet_id: int, api_key: str = Header(...), db: Session = Depends(get_db)
+    tweet_id: int,
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> dict:
     """
     Снимает лайк с твита для авторизованного пользователя.
 
     Аргументы:
     - tweet_id: ID твита, с которого нужно снять лайк.
-    - api_key: API-ключ, переданный в заголовке запроса для авторизации пользователя.
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
     - db: Зависимость от сессии базы данных.
 
     Возвращает:
-    - JSON-ответ с подтверждением результата операции.
+    - JSON-ответ с подтверждением результата операции и признаком changed:
+      false, если лайка не было.
     """
-    user = await get_user_by_api_key(api_key, db)
-    if not user:
-        raise HTTPException(status_code=403, detail="Unauthorized")
-    await tweet_service.unlike_tweet(tweet_id, user.id, db)
-    return {"result": True}
+    changed, author_id = await tweet_service.unlike_tweet(tweet_id, user.id, db)
+    if author_id is not None:
+        events.publish(
+            events.TWEET_UNLIKED,
+            {"tweet_id": tweet_id, "author_id": author_id, "user_id": user.id},
+        )
+    return {"result": True, "changed": changed}
 
 
 @router.post("/api/tweets", response_model=schemas.TweetResponse)
 async def create_tweet(
     tweet: schemas.TweetCreate,
-    api_key: str = Header(...),
-    db: Session = Depends(get_db),
-) -> dict:
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
     """
     Создает новый твит для авторизованного пользователя.
 
     Аргументы:
     - tweet: Данные для создания твита, включая текст и медиа.
-    - api_key: API-ключ, переданный в заголовке запроса для авторизации пользователя.
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
     - db: Зависимость от сессии базы данных.
 
     Возвращает:
     - JSON-ответ, содержащий созданный твит с деталями.
     """
-    user = await get_user_by_api_key(api_key, db)
-    if not user:
-        raise HTTPException(status_code=403, detail="Unauthorized")
     tweet_id = await tweet_service.create_tweet(
         tweet_data=tweet.tweet_data,
         user_id=user.id,
         tweet_media_ids=tweet.tweet_media_ids,
         db=db,
     )
-    created_tweet = db.query(models.Tweet).filter(models.Tweet.id == tweet_id).first()
+    created_tweet = await db.get(
+        models.Tweet, tweet_id, options=[joinedload(models.Tweet.author)]
+    )
     if not created_tweet:
         raise HTTPException(status_code=404, detail="Tweet not found")
-    media_files = await tweet_service.get_tweet_attachments(created_tweet.id, db)
-    likes = await tweet_service.get_tweet_likes(created_tweet.id, db)
-    response = {
-        "id": created_tweet.id,
-        "content": created_tweet.content,
-        "attachments": media_files,
-        "author": {"id": created_tweet.author.id, "name": created_tweet.author.name},
-        "likes": likes,
-    }
-    return response
+    tweet_response = (await tweet_service.hydrate_tweets([created_tweet], db))[0]
+    events.publish(events.TWEET_CREATED, tweet_response)
+    return responses.json_response(tweet_response)
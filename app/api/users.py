@@ -1,47 +1,94 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
-from sqlalchemy.orm import Session
+from typing import Optional
 
-from app.db import schemas
-from app.db.database import get_db
-from app.services import user_service
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import HTMLResponse, RedirectResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import config
+from app.api import auth, conditional, responses
+from app.db import models, schemas
+from app.db.database import get_db, get_read_db
+from app.services import events, tweet_service, user_service
 
 router = APIRouter()
 
 
-@router.get("/api/users/me", response_model=schemas.UserResponse)
+def profile_content(user_info: dict) -> dict:
+    """
+    Собирает тело ответа с профилем пользователя в форме
+    schemas.UserProfileResponse.
+
+    Аргументы:
+    - user_info: Данные пользователя из user_service.get_user_info.
+
+    Возвращает:
+    - Словарь с результатом операции и профилем пользователя.
+    """
+    return {
+        "result": True,
+        "user": {
+            "id": user_info["id"],
+            "name": user_info["name"],
+            "followers": [
+                {"id": follower["id"], "name": follower["name"]}
+                for follower in user_info["followers"]
+            ],
+            "following": [
+                {"id": following["id"], "name": following["name"]}
+                for following in user_info["following"]
+            ],
+            "followers_count": user_info["followers_count"],
+            "following_count": user_info["following_count"],
+            "tweets_count": user_info["tweets_count"],
+        },
+    }
+
+
+@router.get("/api/users/me", response_model=schemas.UserProfileResponse)
 async def get_current_user(
-    api_key: str = Header(...), db: Session = Depends(get_db)
-) -> JSONResponse:
+    request: Request,
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
     """
     Получение информации о текущем пользователе по API ключу.
 
     Аргументы:
-    - api_key: API-ключ, переданный в заголовке запроса для авторизации пользователя.
-    - db: Зависимость от сессии базы данных.
+    - request: Входящий запрос (заголовок If-None-Match).
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
+    - db: Зависимость от сессии базы данных для чтения (реплика).
 
     Возвращает:
-    - JSON-ответ, содержащий информацию о пользователе: ID, имя, подписчиков и подписок.
+    - JSON-ответ, содержащий информацию о пользователе: ID, имя, подписчиков и подписок,
+    или 304, если версия профиля совпадает с ETag из If-None-Match.
     """
-    user = await user_service.get_user_by_api_key(api_key, db)
+    current_user = await user_service.get_user_by_id(user.id, db)
+    if not current_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    etag = conditional.make_etag("user", current_user.id, current_user.version)
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified_response(etag)
     user_info = await user_service.get_user_info(user.id, db)
-    return JSONResponse(
-        content={
-            "result": True,
-            "user": {
-                "id": user_info["id"],
-                "name": user_info["name"],
-                "followers": [
-                    {"id": follower["id"], "name": follower["name"]}
-                    for follower in user_info["followers"]
-                ],
-                "following": [
-                    {"id": following["id"], "name": following["name"]}
-                    for following in user_info["following"]
-                ],
-            },
-        }
-    )
+    return responses.json_response(profile_content(user_info), etag)
+
+
+@router.post("/api/users/me/api_key", response_model=dict)
+async def rotate_api_key(
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> dict:
+    """
+    Замена API ключа текущего пользователя на новый.
+
+    Аргументы:
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
+    - db: Зависимость от сессии базы данных.
+
+    Возвращает:
+    - JSON-ответ с новым API ключом; старый ключ больше не принимается.
+    """
+    api_key = await user_service.rotate_api_key(user.id, db)
+    return {"result": True, "api_key": api_key}
 
 
 @router.get("/login", response_class=HTMLResponse)
@@ -55,92 +102,136 @@ async def login() -> RedirectResponse:
     return RedirectResponse(url="/")
 
 
-@router.get("/api/users/{user_id}", response_model=schemas.UserResponse)
+@router.get("/api/users/{user_id}", response_model=schemas.UserProfileResponse)
 async def get_user(
-    user_id: int, api_key: str = Header(...), db: Session = Depends(get_db)
-) -> JSONResponse:
+    user_id: int,
+    request: Request,
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
     """
     Получение информации о пользователе по его ID.
 
     Аргументы:
     - user_id: ID пользователя, информацию о котором нужно получить.
-    - api_key: API-ключ, переданный в заголовке запроса для авторизации пользователя.
-    - db: Зависимость от сессии базы данных.
+    - request: Входящий запрос (заголовок If-None-Match).
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
+    - db: Зависимость от сессии базы данных для чтения (реплика).
 
     Возвращает:
-    - JSON-ответ с информацией о пользователе: ID, имя, подписчики и подписки.
+    - JSON-ответ с информацией о пользователе: ID, имя, подписчики и подписки,
+    или 304, если версия профиля совпадает с ETag из If-None-Match.
     """
-    user = await user_service.get_user_by_api_key(api_key, db)
-    if not user:
-        raise HTTPException(status_code=403, detail="Unauthorized")
     target_user = await user_service.get_user_by_id(user_id, db)
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
+    etag = conditional.make_etag("user", target_user.id, target_user.version)
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified_response(etag)
     user_info = await user_service.get_user_info(target_user.id, db)
-    return JSONResponse(
-        content={
-            "result": True,
-            "user": {
-                "id": user_info["id"],
-                "name": user_info["name"],
-                "followers": [
-                    {"id": follower["id"], "name": follower["name"]}
-                    for follower in user_info["followers"]
-                ],
-                "following": [
-                    {"id": following["id"], "name": following["name"]}
-                    for following in user_info["following"]
-                ],
-            },
-        }
+    return responses.json_response(profile_content(user_info), etag)
+
+
+@router.get("/api/users/{user_id}/tweets", response_model=schemas.TweetListResponse)
+async def get_user_tweets(
+    user_id: int,
+    request: Request,
+    limit: int = Query(config.TWEETS_PAGE_SIZE, ge=1),
+    cursor: Optional[str] = None,
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    """
+    Получение твитов пользователя (страница профиля) от новых к старым.
+
+    Аргументы:
+    - user_id: ID автора твитов.
+    - request: Входящий запрос (заголовок If-None-Match).
+    - limit: Количество твитов на странице (не больше TWEETS_MAX_PAGE_SIZE).
+    - cursor: Курсор next_cursor из предыдущего ответа, для первой страницы
+    не передается.
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
+    - db: Зависимость от сессии базы данных для чтения (реплика).
+
+    Возвращает:
+    - JSON-ответ со страницей твитов и курсором следующей страницы или 304,
+    если страница не изменилась (проверяется по версиям твитов страницы).
+    """
+    keys, next_cursor = await tweet_service.get_user_feed_page(
+        user_id, min(limit, config.TWEETS_MAX_PAGE_SIZE), cursor, db
+    )
+    if not keys and cursor is None:
+        if not await user_service.get_user_by_id(user_id, db):
+            raise HTTPException(status_code=404, detail="User not found")
+    etag = conditional.make_etag(
+        "user_tweets",
+        user_id,
+        next_cursor,
+        keys,
+        tweet_service.pending_likes_key(user.id),
     )
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified_response(etag)
+    tweets = await tweet_service.get_tweets_by_ids(
+        [tweet_id for tweet_id, _ in keys], db
+    )
+    tweet_responses = tweet_service.overlay_pending_likes(
+        await tweet_service.hydrate_tweets(tweets, db), user.id
+    )
+    return responses.tweet_list_response(tweet_responses, next_cursor, etag)
 
 
 @router.post("/api/users/{user_id}/follow", response_model=dict)
 async def follow_user(
-    user_id: int, api_key: str = Header(...), db: Session = Depends(get_db)
+    user_id: int,
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> dict:
     """
     Подписка на пользователя по его ID.
 
     Аргументы:
     - user_id: ID пользователя, на которого нужно подписаться.
-    - api_key: API-ключ, переданный в заголовке запроса для авторизации пользователя.
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
     - db: Зависимость от сессии базы данных.
 
     Возвращает:
     - JSON-ответ с подтверждением результата операции.
     """
-    user = await user_service.get_user_by_api_key(api_key, db)
-    if not user:
-        raise HTTPException(status_code=403, detail="Unauthorized")
     target_user_info = await user_service.get_user_info(user_id, db)
     if not target_user_info:
         raise HTTPException(status_code=404, detail="User not found")
     await user_service.follow_user(user.id, target_user_info["id"], db)
+    events.publish(
+        events.USER_FOLLOWED,
+        {"follower_id": user.id, "following_id": target_user_info["id"]},
+    )
     return {"result": True}
 
 
 @router.delete("/api/users/{user_id}/follow", response_model=dict)
 async def unfollow_user(
-    user_id: int, api_key: str = Header(...), db: Session = Depends(get_db)
+    user_id: int,
+    user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_db),
 ) -> dict:
     """
     Отписка от пользователя по его ID.
 
     Аргументы:
     - user_id: ID пользователя, от которого нужно отписаться.
-    - api_key: API-ключ, переданный в заголовке запроса для авторизации пользователя.
+    - user: Пользователь, аутентифицированный по API-ключу из заголовка запроса.
     - db: Зависимость от сессии базы данных.
 
     Возвращает:
     - JSON-ответ с подтверждением результата операции.
     """
-    user = await user_service.get_user_by_api_key(api_key, db)
-    if not user:
-        raise HTTPException(status_code=403, detail="Unauthorized")
     target_user_info = await user_service.get_user_info(user_id, db)
     if not target_user_info:
         raise HTTPException(status_code=404, detail="User not found")
     await user_service.unfollow_user(user.id, target_user_info["id"], db)
+    events.publish(
+        events.USER_UNFOLLOWED,
+        {"follower_id": user.id, "following_id": target_user_info["id"]},
+    )
     return {"result": True}
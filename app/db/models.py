@@ -1,4 +1,13 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import (
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -9,6 +18,12 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     api_key = Column(String, unique=True, index=True)
+    api_key_hash = Column(String(64), unique=True, index=True)
+    followers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    tweets_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Увеличивается при изменении профиля: подписок, подписчиков и счетчиков
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     tweets = relationship("Tweet", back_populates="author")
     followers = relationship(
         "UserFollower",
@@ -35,9 +50,20 @@ class User(Base):
 
 class Tweet(Base):
     __tablename__ = "tweets"
+    __table_args__ = (
+        # Страница профиля: твиты автора по убыванию id
+        Index("ix_tweets_user_id_id", "user_id", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    content = Column(String, index=True)
+    content = Column(String)
     user_id = Column(Integer, ForeignKey("users.id"))
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Увеличивается при каждом изменении лайков; ключ кеша готовых твитов
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    # Время публикации; используется затуханием в ранжировании ленты
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
     author = relationship("User", back_populates="tweets")
     media_links = relationship("TweetMedia", back_populates="tweet")
     likes = relationship("TweetLike", back_populates="tweet")
@@ -57,7 +83,7 @@ class Media(Base):
     __tablename__ = "media"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     file_path = Column(String, index=True)
 
     uploader = relationship("User", back_populates="media")
@@ -76,8 +102,11 @@ class Media(Base):
 
 class TweetLike(Base):
     __tablename__ = "tweet_likes"
+    __table_args__ = (
+        UniqueConstraint("tweet_id", "user_id", name="uq_tweet_likes_tweet_id_user_id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     tweet_id = Column(Integer, ForeignKey("tweets.id"))
     user = relationship("User")
     tweet = relationship("Tweet", back_populates="likes")
@@ -99,6 +128,18 @@ class TweetLike(Base):
 
 class UserFollower(Base):
     __tablename__ = "user_followers"
+    __table_args__ = (
+        UniqueConstraint(
+            "follower_id",
+            "following_id",
+            name="uq_user_followers_follower_id_following_id",
+        ),
+        Index(
+            "ix_user_followers_following_id_follower_id",
+            "following_id",
+            "follower_id",
+        ),
+    )
     id = Column(Integer, primary_key=True, index=True)
     follower_id = Column(Integer, ForeignKey("users.id"))
     following_id = Column(Integer, ForeignKey("users.id"))
@@ -127,8 +168,8 @@ class UserFollower(Base):
 class TweetMedia(Base):
     __tablename__ = "tweet_media"
     id = Column(Integer, primary_key=True, index=True)
-    tweet_id = Column(Integer, ForeignKey("tweets.id"))
-    media_id = Column(Integer, ForeignKey("media.id"))
+    tweet_id = Column(Integer, ForeignKey("tweets.id"), index=True)
+    media_id = Column(Integer, ForeignKey("media.id"), index=True)
     tweet = relationship("Tweet", back_populates="media_links")
     media = relationship("Media", back_populates="tweet_media")
 
@@ -145,3 +186,29 @@ class TweetMedia(Base):
             f"tweet_id={self.tweet_id},"
             f"media_id={self.media_id})>"
         )
+
+
+class HomeTimeline(Base):
+    """
+    Предрассчитанная домашняя лента: по строке на каждый твит, доставленный
+    пользователю (его собственный или автора, на которого он подписан).
+
+    Строки добавляются при создании твита и подписке и удаляются при удалении
+    твита и отписке, поэтому чтение ленты - диапазон первичного ключа
+    (user_id, tweet_id).
+    """
+
+    __tablename__ = "home_timeline"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    tweet_id = Column(Integer, ForeignKey("tweets.id"), primary_key=True, index=True)
+    author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    def __repr__(self) -> str:
+        """
+        Возвращает строковое представление записи домашней ленты.
+
+        Возвращаемое значение:
+        - str: строковое представление записи в формате
+        "<HomeTimeline(user_id={user_id}, tweet_id={tweet_id})>"
+        """
+        return f"<HomeTimeline(user_id={self.user_id}, tweet_id={self.tweet_id})>"
@@ -64,6 +64,7 @@ class TweetResponse(BaseModel):
     - attachments (List[str]): Список путей к прикрепленным медиафайлам.
     - author (dict): Информация о пользователе, который опубликовал твит.
     - likes (List[dict]): Список пользователей, поставивших лайк этому твиту.
+    - like_count (int): Количество лайков твита.
 
     Возвращаемое значение:
     - TweetResponse: Модель, представляющая твит с дополнительной информацией о медиа,
@@ -75,6 +76,7 @@ class TweetResponse(BaseModel):
     attachments: List[str]
     author: dict
     likes: List[dict]
+    like_count: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -86,6 +88,8 @@ class TweetListResponse(BaseModel):
     Атрибуты:
     - result (bool): Указывает успешность операции.
     - tweets (List[TweetResponse]): Список твитов.
+    - next_cursor (Optional[str]): Курсор следующей страницы или None,
+    если страница последняя.
 
     Возвращаемое значение:
     - TweetListResponse: Модель с результатом операции и списком твитов.
@@ -93,6 +97,7 @@ class TweetListResponse(BaseModel):
 
     result: bool
     tweets: List[TweetResponse]
+    next_cursor: Optional[str] = None
 
 
 class UserBase(BaseModel):
@@ -118,6 +123,9 @@ class UserResponse(UserBase):
     - followers (List[UserBase]): Список подписчиков пользователя.
     - following (List[UserBase]): Список пользователей,
     на которых подписан данный пользователь.
+    - followers_count (int): Количество подписчиков.
+    - following_count (int): Количество подписок.
+    - tweets_count (int): Количество твитов пользователя.
 
     Возвращаемое значение:
     - UserResponse: Модель, представляющая пользователя и его подписчиков.
@@ -126,10 +134,29 @@ class UserResponse(UserBase):
     id: int
     followers: List[UserBase] = []
     following: List[UserBase] = []
+    followers_count: int = 0
+    following_count: int = 0
+    tweets_count: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserProfileResponse(BaseModel):
+    """
+    Модель ответа с профилем пользователя.
+
+    Атрибуты:
+    - result (bool): Указывает успешность операции.
+    - user (UserResponse): Профиль пользователя.
+
+    Возвращаемое значение:
+    - UserProfileResponse: Модель с результатом операции и профилем пользователя.
+    """
+
+    result: bool
+    user: UserResponse
+
+
 class UserFollowResponse(BaseModel):
     """
     Модель ответа на запрос о подписке/отписке пользователя.
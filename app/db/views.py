@@ -0,0 +1,35 @@
+from sqlalchemy import Column, Integer, MetaData, Table, text
+
+# Материализованные представления не создаются Base.metadata.create_all,
+# поэтому описаны в отдельной MetaData только для построения запросов.
+views_metadata = MetaData()
+
+# Снимок количества лайков твитов для популярной ленты: ключ сортировки
+# и курсора (like_count, tweet_id) не меняется от лайков между обновлениями.
+# Уникальный индекс по tweet_id нужен для REFRESH ... CONCURRENTLY.
+tweet_rankings = Table(
+    "tweet_rankings",
+    views_metadata,
+    Column("tweet_id", Integer, primary_key=True),
+    Column("like_count", Integer),
+)
+
+CREATE_VIEWS = (
+    text(
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS tweet_rankings AS
+        SELECT id AS tweet_id, like_count
+        FROM tweets
+    """
+    ),
+    text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_tweet_rankings_tweet_id "
+        "ON tweet_rankings (tweet_id)"
+    ),
+    text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_tweet_rankings_like_count_tweet_id "
+        "ON tweet_rankings (like_count, tweet_id)"
+    ),
+)
+
+REFRESH_TWEET_RANKINGS = text("REFRESH MATERIALIZED VIEW CONCURRENTLY tweet_rankings")
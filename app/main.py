@@ -1,4 +1,6 @@
 # import asyncpg
+import asyncio
+import contextlib
 import os
 from contextlib import asynccontextmanager
 
@@ -6,14 +8,16 @@ import asyncpg
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 
-from app.api import media, tweets, users
+from app.api import media, metrics, tweets, users
+from app.config import LIKE_WRITE_BEHIND
 
 # from alembic.config import Config
 # from alembic import command
 from app.db import database
+from app.services import like_buffer, ranking_service, recent_tweets, trending
 
 
 @asynccontextmanager
@@ -21,9 +25,9 @@ async def lifespan(app: FastAPI):
     """
     Контекстный менеджер для управления жизненным циклом приложения.
 
-    Эта функция выполняет начальную настройку базы данных и запуск миграций,
-    а также гарантирует, что соединение с базой данных будет
-    закрыто при завершении работы приложения.
+    Эта функция запускает фоновые задачи воркера, а при завершении работы
+    приложения останавливает их, записывает оставшиеся отложенные лайки
+    и закрывает соединения с основной базой данных и репликой.
 
     Аргументы:
     - app: FastAPI приложение, которому будет предоставлен доступ
@@ -41,14 +45,34 @@ async def lifespan(app: FastAPI):
     # print("Running Alembic migrations...")
     # command.upgrade(alembic_cfg, "head")
     # print("Running Alembic migrations...   ")
+    # Заполнение и периодическое обновление буфера последних твитов
+    refresh_task = asyncio.create_task(recent_tweets.refresh_recent_tweets())
+    # Периодическое обновление материализованного рейтинга твитов
+    ranking_task = asyncio.create_task(ranking_service.refresh_rankings_periodically())
+    # Периодический пересчет топа популярного сейчас
+    trending_task = asyncio.create_task(trending.refresh_trending())
+    # Периодическая запись отложенных лайков
+    likes_task = None
+    if LIKE_WRITE_BEHIND:
+        likes_task = asyncio.create_task(like_buffer.flush_likes_periodically())
     # Возвращаем управление приложению
     yield
 
     # Событие завершения работы
+    refresh_task.cancel()
+    ranking_task.cancel()
+    trending_task.cancel()
+    # Остановка записи лайков и запись оставшихся намерений до закрытия пула
+    if likes_task is not None:
+        likes_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await likes_task
+        await like_buffer.flush_likes()
     print("Shutting down database connection...")
-    if database.SessionLocal:
-        session = database.SessionLocal()
-        session.close()
+    await database.engine.dispose()
+    # Без REPLICA_DATABASE_URL реплика - тот же движок, что и основной
+    if database.replica_engine is not database.engine:
+        await database.replica_engine.dispose()
 
 
 app = FastAPI(
@@ -56,10 +80,12 @@ app = FastAPI(
     max_upload_size=10485760,
     description="This is a sample API",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     openapi_tags=[
         {"name": "users", "description": "Operations with users"},
         {"name": "tweets", "description": "Operations with tweets"},
         {"name": "media", "description": "Operations with media"},
+        {"name": "metrics", "description": "Worker metrics"},
     ],
     lifespan=lifespan,
 )
@@ -99,8 +125,9 @@ app.add_middleware(
 app.include_router(tweets.router)
 app.include_router(users.router)
 app.include_router(media.router)
+app.include_router(metrics.router)
 """
-Включение маршрутов для работы с твитами, пользователями и медиа.
+Включение маршрутов для работы с твитами, пользователями, медиа и метриками.
 Эти маршруты будут обрабатывать соответствующие API запросы.
 """
 # DATABASE_URL = "postgresql://postgres:1234@db:5432/microblog"
@@ -152,6 +179,3 @@ if __name__ == "__main__":
     - None. Эта функция запускает сервер FastAPI.
     """
     uvicorn.run(app, host="0.0.0.0", port=8000, log_level="debug")
-
-    
-
@@ -0,0 +1,171 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру кеш с вытеснением LRU и временем жизни записей.
+
+    Кеш живет в памяти процесса (одного воркера) и не требует блокировок,
+    так как обращения к нему выполняются из цикла событий asyncio.
+    Счетчики попаданий, промахов и вытеснений доступны через stats().
+
+    Атрибуты:
+    - maxsize (int): Максимальное количество записей, а если задан weigh -
+    максимальный суммарный вес записей.
+    - ttl (float): Время жизни записи в секундах.
+    - weigh (Optional[Callable[[Any], int]]): Вес значения, например длина
+    списка; по умолчанию каждая запись весит 1.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        weigh: Optional[Callable[[Any], int]] = None,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigh = weigh
+        self._data: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Возвращает значение по ключу, если оно есть и не устарело.
+
+        Args:
+            key (Hashable): Ключ записи.
+            default (Any): Значение, возвращаемое при промахе.
+
+        Returns:
+            Any: Закешированное значение или default.
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self.pop(key)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """
+        Возвращает найденные значения для нескольких ключей.
+
+        Args:
+            keys (Iterable[Hashable]): Ключи записей.
+
+        Returns:
+            Dict[Hashable, Any]: Значения по ключам; ключи-промахи отсутствуют.
+        """
+        found = {}
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Сохраняет значение, вытесняя самые давно использованные записи
+        при превышении maxsize.
+
+        Args:
+            key (Hashable): Ключ записи.
+            value (Any): Сохраняемое значение.
+            ttl (Optional[float]): Время жизни записи, если отличается от self.ttl.
+
+        Returns:
+            None
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        weight = self.weigh(value) if self.weigh else 1
+        self.pop(key)
+        self._data[key] = (value, expires_at, weight)
+        self.weight += weight
+        while self.weight > self.maxsize:
+            _, (_, _, evicted_weight) = self._data.popitem(last=False)
+            self.weight -= evicted_weight
+            self.evictions += 1
+
+    def keys(self) -> List[Hashable]:
+        """
+        Возвращает ключи записей, включая еще не удаленные устаревшие.
+
+        Returns:
+            List[Hashable]: Ключи от давно использованных к недавним.
+        """
+        return list(self._data)
+
+    def pop(self, key: Hashable) -> None:
+        """
+        Удаляет запись по ключу, если она существует.
+
+        Args:
+            key (Hashable): Ключ записи.
+
+        Returns:
+            None
+        """
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.weight -= entry[2]
+
+    def pop_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Удаляет все записи, для которых predicate(key, value) истинно.
+
+        Args:
+            predicate (Callable[[Hashable, Any], bool]): Условие удаления.
+
+        Returns:
+            int: Количество удаленных записей.
+        """
+        keys = [
+            key for key, (value, _, _) in self._data.items() if predicate(key, value)
+        ]
+        for key in keys:
+            self.pop(key)
+        return len(keys)
+
+    def clear(self) -> None:
+        """
+        Очищает кеш, не сбрасывая счетчики.
+
+        Returns:
+            None
+        """
+        self._data.clear()
+        self.weight = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Возвращает счетчики кеша для сбора метрик.
+
+        Returns:
+            Dict[str, int]: Размер, суммарный вес, емкость, попадания, промахи
+            и вытеснения.
+        """
+        return {
+            "size": len(self._data),
+            "weight": self.weight,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,73 @@
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Пересчет счетчика лайков твитов одним запросом по агрегату tweet_likes
+RECOMPUTE_TWEET_COUNTERS = text(
+    """
+    UPDATE tweets
+    SET like_count = sub.like_count, version = tweets.version + 1
+    FROM (
+        SELECT t.id, COALESCE(l.cnt, 0) AS like_count
+        FROM tweets t
+        LEFT JOIN (
+            SELECT tweet_id, count(*) AS cnt FROM tweet_likes GROUP BY tweet_id
+        ) l ON l.tweet_id = t.id
+    ) sub
+    WHERE tweets.id = sub.id AND tweets.like_count IS DISTINCT FROM sub.like_count
+"""
+)
+
+# Пересчет счетчиков пользователей по агрегатам user_followers и tweets
+RECOMPUTE_USER_COUNTERS = text(
+    """
+    UPDATE users
+    SET followers_count = sub.followers_count,
+        following_count = sub.following_count,
+        tweets_count = sub.tweets_count,
+        version = users.version + 1
+    FROM (
+        SELECT u.id,
+               COALESCE(fr.cnt, 0) AS followers_count,
+               COALESCE(fg.cnt, 0) AS following_count,
+               COALESCE(t.cnt, 0) AS tweets_count
+        FROM users u
+        LEFT JOIN (
+            SELECT following_id AS id, count(*) AS cnt
+            FROM user_followers GROUP BY following_id
+        ) fr ON fr.id = u.id
+        LEFT JOIN (
+            SELECT follower_id AS id, count(*) AS cnt
+            FROM user_followers GROUP BY follower_id
+        ) fg ON fg.id = u.id
+        LEFT JOIN (
+            SELECT user_id AS id, count(*) AS cnt FROM tweets GROUP BY user_id
+        ) t ON t.id = u.id
+    ) sub
+    WHERE users.id = sub.id
+      AND (users.followers_count, users.following_count, users.tweets_count)
+          IS DISTINCT FROM (sub.followers_count, sub.following_count, sub.tweets_count)
+"""
+)
+
+
+async def recompute_counters(db: AsyncSession) -> Dict[str, int]:
+    """
+    Пересчитывает денормализованные счетчики по исходным таблицам.
+
+    Счетчики tweets.like_count и users.followers_count, following_count,
+    tweets_count поддерживаются сервисами в тех же транзакциях, что и
+    изменения данных; эта функция восстанавливает их после ручных правок
+    или массовой загрузки данных. Обновляются только расходящиеся строки.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        Dict[str, int]: Количество исправленных строк в tweets и users.
+    """
+    tweets_result = await db.execute(RECOMPUTE_TWEET_COUNTERS)
+    users_result = await db.execute(RECOMPUTE_USER_COUNTERS)
+    await db.commit()
+    return {"tweets": tweets_result.rowcount, "users": users_result.rowcount}
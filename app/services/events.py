@@ -0,0 +1,45 @@
+from collections import defaultdict
+from typing import Callable, DefaultDict, List
+
+# События изменения твитов внутри воркера. Публикуются обработчиками API
+# после успешной фиксации транзакции; полезная нагрузка - словарь.
+TWEET_CREATED = "tweet_created"  # данные твита в формате hydrate_tweets
+TWEET_DELETED = "tweet_deleted"  # {"tweet_id", "author_id"}
+TWEET_LIKED = "tweet_liked"  # {"tweet_id", "author_id", "user_id", "name"}
+TWEET_UNLIKED = "tweet_unliked"  # {"tweet_id", "author_id", "user_id"}
+USER_FOLLOWED = "user_followed"  # {"follower_id", "following_id"}
+USER_UNFOLLOWED = "user_unfollowed"  # {"follower_id", "following_id"}
+
+_subscribers: DefaultDict[str, List[Callable[[dict], None]]] = defaultdict(list)
+
+
+def subscribe(event: str, callback: Callable[[dict], None]) -> None:
+    """
+    Подписывает обработчик на событие.
+
+    Обработчики вызываются синхронно из цикла событий и не должны
+    выполнять ввод-вывод.
+
+    Args:
+        event (str): Тип события.
+        callback (Callable[[dict], None]): Обработчик полезной нагрузки.
+
+    Returns:
+        None
+    """
+    _subscribers[event].append(callback)
+
+
+def publish(event: str, payload: dict) -> None:
+    """
+    Передает событие всем подписанным обработчикам.
+
+    Args:
+        event (str): Тип события.
+        payload (dict): Полезная нагрузка события.
+
+    Returns:
+        None
+    """
+    for callback in _subscribers[event]:
+        callback(payload)
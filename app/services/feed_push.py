@@ -0,0 +1,281 @@
+import asyncio
+from collections import defaultdict
+from typing import AsyncIterator, DefaultDict, Iterable, Set
+
+import orjson
+
+from app.config import FEED_PUSH_HEARTBEAT_SECONDS, FEED_PUSH_QUEUE_SIZE
+from app.services import events
+
+# Комментарий SSE: клиенты его игнорируют, а запись в закрытое соединение
+# завершает поток.
+PING = b": ping\n\n"
+# Событие для клиента, часть событий для которого была отброшена:
+# ленту нужно перечитать обычным запросом.
+RESYNC = "resync"
+
+
+def encode_event(event: str, payload: dict) -> bytes:
+    """
+    Кодирует событие в кадр Server-Sent Events.
+
+    Args:
+        event (str): Тип события (поле event).
+        payload (dict): Полезная нагрузка события (поле data, JSON).
+
+    Returns:
+        bytes: Кадр, готовый к отправке клиенту.
+    """
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(payload) + b"\n\n"
+
+
+class FeedSubscription:
+    """
+    Подключение одного клиента к push-каналу ленты.
+
+    Кадры событий складываются в ограниченную очередь. Если клиент не успевает
+    их читать, новые события отбрасываются, а перед следующим кадром клиент
+    получает событие resync и должен перечитать ленту через GET /api/tweets.
+    """
+
+    __slots__ = ("user_id", "authors", "queue", "dropped")
+
+    def __init__(self, user_id: int, authors: Set[int], maxsize: int) -> None:
+        """
+        Args:
+            user_id (int): Идентификатор подключенного пользователя.
+            authors (Set[int]): Авторы, события о твитах которых доставляются.
+            maxsize (int): Максимальное количество недоставленных кадров.
+        """
+        self.user_id = user_id
+        self.authors = authors
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def offer(self, frame: bytes) -> bool:
+        """
+        Ставит кадр в очередь без ожидания.
+
+        Args:
+            frame (bytes): Кадр события.
+
+        Returns:
+            bool: False, если очередь переполнена и кадр отброшен.
+        """
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        return True
+
+    async def frames(self, heartbeat: float) -> AsyncIterator[bytes]:
+        """
+        Отдает кадры из очереди, а при отсутствии событий - пинг каждые
+        heartbeat секунд.
+
+        Args:
+            heartbeat (float): Период пинга в секундах.
+
+        Returns:
+            AsyncIterator[bytes]: Кадры для отправки клиенту.
+        """
+        while True:
+            try:
+                frame = await asyncio.wait_for(self.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                frame = PING
+            if self.dropped:
+                yield encode_event(RESYNC, {"dropped": self.dropped})
+                self.dropped = 0
+            yield frame
+
+
+class FeedHub:
+    """
+    Рассылка событий твитов подключенным клиентам воркера.
+
+    Подключение получает события о твитах самого пользователя и авторов,
+    на которых он подписан. Индекс автор -> подключения позволяет
+    не перебирать все подключения при каждом событии; кадр кодируется
+    один раз для всех получателей.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        """
+        Args:
+            queue_size (int): Размер очереди кадров одного подключения.
+        """
+        self.queue_size = queue_size
+        self._by_author: DefaultDict[int, Set[FeedSubscription]] = defaultdict(set)
+        self._by_user: DefaultDict[int, Set[FeedSubscription]] = defaultdict(set)
+        self.delivered = 0
+        self.dropped = 0
+
+    def connect(self, user_id: int, following: Iterable[int]) -> FeedSubscription:
+        """
+        Регистрирует подключение пользователя.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            following (Iterable[int]): Авторы, на которых он подписан.
+
+        Returns:
+            FeedSubscription: Подключение; после закрытия передается в disconnect.
+        """
+        subscription = FeedSubscription(user_id, {user_id, *following}, self.queue_size)
+        for author_id in subscription.authors:
+            self._by_author[author_id].add(subscription)
+        self._by_user[user_id].add(subscription)
+        return subscription
+
+    def disconnect(self, subscription: FeedSubscription) -> None:
+        """
+        Удаляет подключение из рассылки.
+
+        Args:
+            subscription (FeedSubscription): Закрытое подключение.
+
+        Returns:
+            None
+        """
+        for author_id in subscription.authors:
+            self._discard(self._by_author, author_id, subscription)
+        self._discard(self._by_user, subscription.user_id, subscription)
+
+    def follow(self, follower_id: int, following_id: int) -> None:
+        """
+        Добавляет автора в рассылку открытых подключений подписчика.
+
+        Args:
+            follower_id (int): Идентификатор подписчика.
+            following_id (int): Идентификатор автора.
+
+        Returns:
+            None
+        """
+        for subscription in self._by_user.get(follower_id, ()):
+            subscription.authors.add(following_id)
+            self._by_author[following_id].add(subscription)
+
+    def unfollow(self, follower_id: int, following_id: int) -> None:
+        """
+        Убирает автора из рассылки открытых подключений подписчика.
+
+        Args:
+            follower_id (int): Идентификатор подписчика.
+            following_id (int): Идентификатор автора.
+
+        Returns:
+            None
+        """
+        if follower_id == following_id:
+            return
+        for subscription in self._by_user.get(follower_id, ()):
+            subscription.authors.discard(following_id)
+            self._discard(self._by_author, following_id, subscription)
+
+    def publish(self, event: str, author_id: int, payload: dict) -> None:
+        """
+        Доставляет событие о твите автора всем его подключенным подписчикам.
+
+        Args:
+            event (str): Тип события.
+            author_id (int): Идентификатор автора твита.
+            payload (dict): Полезная нагрузка события.
+
+        Returns:
+            None
+        """
+        subscriptions = self._by_author.get(author_id)
+        if not subscriptions:
+            return
+        frame = encode_event(event, payload)
+        for subscription in subscriptions:
+            if subscription.offer(frame):
+                self.delivered += 1
+            else:
+                self.dropped += 1
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики рассылки для метрик.
+
+        Returns:
+            dict: Количество подключений и авторов, доставленных
+            и отброшенных кадров.
+        """
+        return {
+            "connections": sum(len(subs) for subs in self._by_user.values()),
+            "authors": len(self._by_author),
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+    @staticmethod
+    def _discard(
+        index: DefaultDict[int, Set[FeedSubscription]],
+        key: int,
+        subscription: FeedSubscription,
+    ) -> None:
+        subscriptions = index.get(key)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del index[key]
+
+
+feed_hub = FeedHub(FEED_PUSH_QUEUE_SIZE)
+
+events.subscribe(
+    events.TWEET_CREATED,
+    lambda payload: feed_hub.publish(
+        events.TWEET_CREATED, payload["author"]["id"], payload
+    ),
+)
+events.subscribe(
+    events.TWEET_DELETED,
+    lambda payload: feed_hub.publish(
+        events.TWEET_DELETED, payload["author_id"], payload
+    ),
+)
+events.subscribe(
+    events.TWEET_LIKED,
+    lambda payload: feed_hub.publish(events.TWEET_LIKED, payload["author_id"], payload),
+)
+events.subscribe(
+    events.TWEET_UNLIKED,
+    lambda payload: feed_hub.publish(
+        events.TWEET_UNLIKED, payload["author_id"], payload
+    ),
+)
+events.subscribe(
+    events.USER_FOLLOWED,
+    lambda payload: feed_hub.follow(payload["follower_id"], payload["following_id"]),
+)
+events.subscribe(
+    events.USER_UNFOLLOWED,
+    lambda payload: feed_hub.unfollow(payload["follower_id"], payload["following_id"]),
+)
+
+
+async def stream_events(user_id: int, following: Iterable[int]) -> AsyncIterator[bytes]:
+    """
+    Поток кадров SSE для подключения пользователя.
+
+    Подключение регистрируется при старте потока и удаляется при его
+    завершении (в том числе при отмене после разрыва соединения).
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        following (Iterable[int]): Авторы, на которых он подписан.
+
+    Returns:
+        AsyncIterator[bytes]: Кадры для отправки клиенту.
+    """
+    subscription = feed_hub.connect(user_id, following)
+    try:
+        async for frame in subscription.frames(FEED_PUSH_HEARTBEAT_SECONDS):
+            yield frame
+    finally:
+        feed_hub.disconnect(subscription)
@@ -0,0 +1,253 @@
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import (
+    RANKING_AFFINITY_WEIGHT,
+    RANKING_CANDIDATES,
+    RANKING_CANDIDATES_TTL,
+    RANKING_HALF_LIFE_HOURS,
+)
+from app.db import models
+from app.services import tweet_service, user_service
+from app.services.cache import TTLCache
+
+# Общий набор кандидатов ранжирования (одна запись).
+candidate_cache = TTLCache(maxsize=1, ttl=RANKING_CANDIDATES_TTL)
+
+
+class CandidatePool:
+    """
+    Последние твиты, из которых ранжируется лента, в виде столбцов NumPy.
+
+    Набор общий для всех пользователей и хранится в памяти воркера
+    RANKING_CANDIDATES_TTL секунд.
+    """
+
+    __slots__ = ("ids", "author_ids", "like_counts", "created_at")
+
+    def __init__(self, rows: Sequence[Sequence[float]]) -> None:
+        """
+        Args:
+            rows (Sequence[Sequence[float]]): Строки (id, user_id, like_count,
+            created_at в секундах эпохи).
+        """
+        data = np.array(rows, dtype=np.float64).reshape(-1, 4)
+        self.ids = data[:, 0].astype(np.int64)
+        self.author_ids = data[:, 1].astype(np.int64)
+        self.like_counts = data[:, 2]
+        self.created_at = data[:, 3]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def for_user(
+        self, user_id: int, following: Sequence[int], now: float
+    ) -> "Candidates":
+        """
+        Дополняет набор признаками, зависящими от пользователя и времени.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            following (Sequence[int]): Авторы, на которых он подписан.
+            now (float): Текущее время в секундах эпохи.
+
+        Returns:
+            Candidates: Признаки кандидатов для стратегий ранжирования.
+        """
+        followed = np.isin(self.author_ids, np.asarray(following, dtype=np.int64))
+        followed |= self.author_ids == user_id
+        return Candidates(
+            self.ids,
+            self.like_counts,
+            np.maximum(now - self.created_at, 0.0),
+            followed.astype(np.float64),
+        )
+
+
+class Candidates:
+    """
+    Признаки кандидатов одного запроса; все массивы одной длины.
+
+    Атрибуты:
+    - ids (np.ndarray): Идентификаторы твитов.
+    - like_counts (np.ndarray): Количество лайков.
+    - ages (np.ndarray): Возраст твитов в секундах.
+    - followed (np.ndarray): 1.0 для твитов пользователя и авторов,
+    на которых он подписан, иначе 0.0.
+    """
+
+    __slots__ = ("ids", "like_counts", "ages", "followed")
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        like_counts: np.ndarray,
+        ages: np.ndarray,
+        followed: np.ndarray,
+    ) -> None:
+        self.ids = ids
+        self.like_counts = like_counts
+        self.ages = ages
+        self.followed = followed
+
+
+# Стратегия ранжирования: векторная функция признаков -> оценки (больше - выше).
+Strategy = Callable[[Candidates], np.ndarray]
+
+STRATEGIES: Dict[str, Strategy] = {}
+
+
+def register_strategy(name: str) -> Callable[[Strategy], Strategy]:
+    """
+    Декоратор, регистрирующий стратегию ранжирования под именем name.
+
+    Args:
+        name (str): Значение параметра strategy запроса.
+
+    Returns:
+        Callable[[Strategy], Strategy]: Декоратор, возвращающий функцию без изменений.
+    """
+
+    def decorator(strategy: Strategy) -> Strategy:
+        STRATEGIES[name] = strategy
+        return strategy
+
+    return decorator
+
+
+@register_strategy("recency")
+def score_recency(candidates: Candidates) -> np.ndarray:
+    """Новые твиты выше."""
+    return -candidates.ages
+
+
+@register_strategy("likes")
+def score_likes(candidates: Candidates) -> np.ndarray:
+    """Твиты с большим количеством лайков выше."""
+    return candidates.like_counts
+
+
+@register_strategy("engagement")
+def score_engagement(candidates: Candidates) -> np.ndarray:
+    """Лайки с экспоненциальным затуханием по возрасту твита."""
+    half_life = RANKING_HALF_LIFE_HOURS * 3600.0
+    return (1.0 + candidates.like_counts) * np.exp2(-candidates.ages / half_life)
+
+
+@register_strategy("affinity")
+def score_affinity(candidates: Candidates) -> np.ndarray:
+    """Затухающая вовлеченность, усиленная для авторов из подписок."""
+    boost = 1.0 + RANKING_AFFINITY_WEIGHT * candidates.followed
+    return score_engagement(candidates) * boost
+
+
+def top_page(
+    scores: np.ndarray, ids: np.ndarray, offset: int, limit: int
+) -> np.ndarray:
+    """
+    Возвращает индексы кандидатов страницы [offset, offset + limit) по убыванию
+    оценки; при равных оценках выше более новый твит (больший id).
+
+    Полностью сортируются только кандидаты не ниже k-й оценки (np.partition),
+    поэтому стоимость почти не зависит от размера набора.
+
+    Args:
+        scores (np.ndarray): Оценки кандидатов.
+        ids (np.ndarray): Идентификаторы твитов.
+        offset (int): Количество пропускаемых кандидатов.
+        limit (int): Размер страницы.
+
+    Returns:
+        np.ndarray: Индексы кандидатов страницы.
+    """
+    k = min(offset + limit, len(scores))
+    if k <= offset:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+        selected = np.flatnonzero(scores >= threshold)
+    else:
+        selected = np.arange(len(scores))
+    order = np.lexsort((-ids[selected], -scores[selected]))
+    return selected[order[offset:k]]
+
+
+async def load_candidates(db: AsyncSession) -> CandidatePool:
+    """
+    Возвращает последние RANKING_CANDIDATES твитов одним запросом; результат
+    кешируется в памяти воркера.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        CandidatePool: Набор кандидатов.
+    """
+    pool = candidate_cache.get("pool")
+    if pool is None:
+        result = await db.execute(
+            select(
+                models.Tweet.id,
+                models.Tweet.user_id,
+                models.Tweet.like_count,
+                func.extract("epoch", models.Tweet.created_at),
+            )
+            .order_by(models.Tweet.id.desc())
+            .limit(RANKING_CANDIDATES)
+        )
+        pool = CandidatePool(result.all())
+        candidate_cache.set("pool", pool)
+    return pool
+
+
+async def get_ranked_page(
+    user_id: int,
+    strategy: str,
+    limit: int,
+    cursor: Optional[str],
+    db: AsyncSession,
+) -> Tuple[List[models.Tweet], Optional[str]]:
+    """
+    Получает страницу ленты, ранжированной стратегией strategy.
+
+    Кандидаты - последние RANKING_CANDIDATES твитов; оценки всех кандидатов
+    считаются одним векторным проходом. Курсор хранит позицию в рейтинге,
+    поэтому при обновлении набора кандидатов между запросами страницы
+    могут сдвигаться. Удаленные после загрузки набора твиты пропускаются.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        strategy (str): Имя стратегии из STRATEGIES.
+        limit (int): Количество твитов на странице.
+        cursor (Optional[str]): Курсор предыдущей страницы.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        Tuple[List[models.Tweet], Optional[str]]: Твиты страницы с авторами
+        и курсор следующей страницы (None, если страница последняя).
+
+    Raises:
+        HTTPException: Если стратегия неизвестна или курсор поврежден.
+    """
+    score = STRATEGIES.get(strategy)
+    if score is None:
+        raise HTTPException(status_code=400, detail="Unknown ranking strategy")
+    offset = 0
+    if cursor is not None:
+        (offset,) = tweet_service.decode_cursor(cursor)
+        if offset < 0:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    pool = await load_candidates(db)
+    following = await user_service.get_following_ids(user_id, db)
+    candidates = pool.for_user(user_id, following, time.time())
+    page = top_page(score(candidates), candidates.ids, offset, limit)
+    next_cursor = None
+    if offset + limit < len(pool):
+        next_cursor = tweet_service.encode_cursor(offset + limit)
+    tweets = await tweet_service.get_tweets_by_ids(pool.ids[page].tolist(), db)
+    return tweets, next_cursor
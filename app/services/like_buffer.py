@@ -0,0 +1,287 @@
+import asyncio
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import LIKE_FLUSH_INTERVAL_MS, LIKE_FLUSH_MAX_PENDING
+from app.db import database
+from app.db.database import SessionLocal
+from app.services import events
+
+# Применяет пачку намерений одним запросом. Для каждой пары (tweet_id, user_id)
+# в пачке одно итоговое намерение, поэтому вставка и удаление не пересекаются.
+# Счетчик и версия твита меняются только на фактически вставленные
+# и удаленные лайки; они же возвращаются для публикации событий.
+FLUSH_LIKES = text(
+    """
+    WITH intents AS (
+        SELECT *
+        FROM unnest(
+            CAST(:tweet_ids AS integer[]),
+            CAST(:user_ids AS integer[]),
+            CAST(:liked AS boolean[])
+        ) AS intent(tweet_id, user_id, liked)
+    ),
+    inserted AS (
+        INSERT INTO tweet_likes (user_id, tweet_id)
+        SELECT intents.user_id, intents.tweet_id
+        FROM intents
+        JOIN tweets ON tweets.id = intents.tweet_id
+        WHERE intents.liked
+        ORDER BY intents.tweet_id, intents.user_id
+        ON CONFLICT ON CONSTRAINT uq_tweet_likes_tweet_id_user_id DO NOTHING
+        RETURNING tweet_id, user_id
+    ),
+    deleted AS (
+        DELETE FROM tweet_likes
+        USING intents
+        WHERE NOT intents.liked
+          AND tweet_likes.tweet_id = intents.tweet_id
+          AND tweet_likes.user_id = intents.user_id
+        RETURNING tweet_likes.tweet_id, tweet_likes.user_id
+    ),
+    changes AS (
+        SELECT tweet_id, user_id, 1 AS delta FROM inserted
+        UNION ALL
+        SELECT tweet_id, user_id, -1 AS delta FROM deleted
+    ),
+    updated AS (
+        UPDATE tweets
+        SET like_count = tweets.like_count + totals.delta,
+            version = tweets.version + 1
+        FROM (
+            SELECT tweet_id, sum(delta) AS delta FROM changes GROUP BY tweet_id
+        ) AS totals
+        WHERE tweets.id = totals.tweet_id
+        RETURNING tweets.id
+    )
+    SELECT changes.tweet_id, changes.user_id, changes.delta,
+           tweets.user_id AS author_id
+    FROM changes
+    JOIN tweets ON tweets.id = changes.tweet_id
+"""
+)
+
+
+class LikeBuffer:
+    """
+    Буфер отложенной записи лайков воркера.
+
+    Хранит последнее намерение пользователя для каждого твита:
+    лайк, затем снятие лайка (и наоборот) схлопываются в одно итоговое
+    намерение. flush() записывает все намерения одним запросом FLUSH_LIKES
+    и публикует события только для фактических изменений. Пока намерение
+    не записано, overlay() показывает его автору в ответах ленты.
+
+    Атрибуты:
+    - pending (Dict[int, Dict[int, Tuple[bool, str]]]): user_id ->
+    tweet_id -> (лайк поставлен, имя пользователя) - еще не записанные намерения.
+    - flushing (Dict[int, Dict[int, Tuple[bool, str]]]): Намерения,
+    записываемые в данный момент.
+    """
+
+    def __init__(self, max_pending: int) -> None:
+        """
+        Args:
+            max_pending (int): Количество намерений, при котором сброс
+            запускается, не дожидаясь интервала.
+        """
+        self.max_pending = max_pending
+        self.pending: Dict[int, Dict[int, Tuple[bool, str]]] = {}
+        self.flushing: Dict[int, Dict[int, Tuple[bool, str]]] = {}
+        self.size = 0
+        self.full = asyncio.Event()
+        self.flushed = 0
+        self.coalesced = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, tweet_id: int, user_id: int, name: str, liked: bool) -> None:
+        """
+        Запоминает намерение поставить (liked=True) или снять лайк.
+
+        Args:
+            tweet_id (int): Идентификатор твита.
+            user_id (int): Идентификатор пользователя.
+            name (str): Имя пользователя.
+            liked (bool): Итоговое состояние лайка.
+
+        Returns:
+            None
+        """
+        intents = self.pending.setdefault(user_id, {})
+        if tweet_id in intents:
+            self.coalesced += 1
+        else:
+            self.size += 1
+        intents[tweet_id] = (liked, name)
+        if self.size >= self.max_pending:
+            self.full.set()
+
+    def intents_for(self, user_id: int) -> Dict[int, Tuple[bool, str]]:
+        """
+        Возвращает незаписанные намерения пользователя.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            Dict[int, Tuple[bool, str]]: tweet_id -> (лайк поставлен, имя).
+        """
+        pending = self.pending.get(user_id)
+        flushing = self.flushing.get(user_id)
+        if not flushing:
+            return pending or {}
+        if not pending:
+            return flushing
+        return {**flushing, **pending}
+
+    def overlay(self, tweets: List[dict], user_id: int) -> List[dict]:
+        """
+        Применяет незаписанные намерения пользователя к твитам ответа.
+
+        Измененные твиты копируются: исходные словари разделяются с кешем.
+
+        Args:
+            tweets (List[dict]): Твиты в формате hydrate_tweets.
+            user_id (int): Идентификатор пользователя, запросившего ленту.
+
+        Returns:
+            List[dict]: Твиты с учетом намерений пользователя.
+        """
+        intents = self.intents_for(user_id)
+        if not intents:
+            return tweets
+        result = []
+        for tweet in tweets:
+            intent = intents.get(tweet["id"])
+            if intent is not None:
+                liked, name = intent
+                likes = tweet["likes"]
+                has_like = any(like["user_id"] == user_id for like in likes)
+                if liked and not has_like:
+                    tweet = {
+                        **tweet,
+                        "likes": [*likes, {"user_id": user_id, "name": name}],
+                        "like_count": tweet["like_count"] + 1,
+                    }
+                elif not liked and has_like:
+                    tweet = {
+                        **tweet,
+                        "likes": [like for like in likes if like["user_id"] != user_id],
+                        "like_count": tweet["like_count"] - 1,
+                    }
+            result.append(tweet)
+        return result
+
+    async def flush(self, db: AsyncSession) -> int:
+        """
+        Записывает накопленные намерения одним запросом и публикует события
+        TWEET_LIKED/TWEET_UNLIKED для фактических изменений.
+
+        Если запись не удалась, намерения возвращаются в буфер (более новые
+        намерения тех же пар не перезаписываются), а исключение пробрасывается.
+
+        Args:
+            db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+        Returns:
+            int: Количество измененных лайков.
+        """
+        self.full.clear()
+        if not self.pending:
+            return 0
+        batch, self.pending, self.size = self.pending, {}, 0
+        self.flushing = batch
+        tweet_ids, user_ids, liked = [], [], []
+        for user_id, intents in batch.items():
+            for tweet_id, (intent, _) in intents.items():
+                tweet_ids.append(tweet_id)
+                user_ids.append(user_id)
+                liked.append(intent)
+        try:
+            rows = (
+                await db.execute(
+                    FLUSH_LIKES,
+                    {"tweet_ids": tweet_ids, "user_ids": user_ids, "liked": liked},
+                )
+            ).all()
+            await db.commit()
+        except BaseException:
+            # В том числе при отмене задачи сброса во время остановки воркера
+            for user_id, intents in batch.items():
+                newer = self.pending.setdefault(user_id, {})
+                for tweet_id, intent in intents.items():
+                    if tweet_id not in newer:
+                        newer[tweet_id] = intent
+                        self.size += 1
+            raise
+        finally:
+            self.flushing = {}
+        self.flushed += len(tweet_ids)
+        for row in rows:
+            # Следующие чтения пользователя идут на основную базу, пока
+            # реплика не получит записанный лайк.
+            database.mark_write(row.user_id)
+            payload = {
+                "tweet_id": row.tweet_id,
+                "author_id": row.author_id,
+                "user_id": row.user_id,
+            }
+            if row.delta > 0:
+                payload["name"] = batch[row.user_id][row.tweet_id][1]
+                events.publish(events.TWEET_LIKED, payload)
+            else:
+                events.publish(events.TWEET_UNLIKED, payload)
+        return len(rows)
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики буфера для метрик.
+
+        Returns:
+            dict: Количество ожидающих, схлопнутых и записанных намерений.
+        """
+        return {
+            "pending": self.size,
+            "coalesced": self.coalesced,
+            "flushed": self.flushed,
+        }
+
+
+like_buffer = LikeBuffer(LIKE_FLUSH_MAX_PENDING)
+
+
+async def flush_likes() -> None:
+    """
+    Записывает намерения из буфера в базу данных. Ошибки записываются в лог,
+    намерения остаются в буфере до следующего сброса.
+
+    Returns:
+        None
+    """
+    try:
+        async with SessionLocal() as db:
+            await like_buffer.flush(db)
+    except Exception as e:
+        print(f"Failed to flush likes: {str(e)}")
+
+
+async def flush_likes_periodically() -> None:
+    """
+    Фоновая задача: сбрасывает буфер каждые LIKE_FLUSH_INTERVAL_MS
+    или сразу при LIKE_FLUSH_MAX_PENDING намерениях.
+
+    Returns:
+        None
+    """
+    while True:
+        try:
+            await asyncio.wait_for(
+                like_buffer.full.wait(), LIKE_FLUSH_INTERVAL_MS / 1000
+            )
+        except asyncio.TimeoutError:
+            pass
+        await flush_likes()
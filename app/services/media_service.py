@@ -1,9 +1,9 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db import models
 
 
-async def save_media(file_location: str, user_id: int, db: Session) -> int:
+async def save_media(file_location: str, user_id: int, db: AsyncSession) -> int:
     """
     Сохраняет информацию о медиа файле в базе данных.
 
@@ -15,13 +15,13 @@ async def save_media(file_location: str, user_id: int, db: Session) -> int:
     Args:
         file_location (str): Путь к файлу, который должен быть сохранен.
         user_id (int): Идентификатор пользователя, который загружает медиа.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         int: Идентификатор сохраненного медиа.
     """
     media = models.Media(user_id=user_id, file_path=file_location)
     db.add(media)
-    db.commit()
-    db.refresh(media)
+    await db.commit()
+    await db.refresh(media)
     return media.id
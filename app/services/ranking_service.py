@@ -0,0 +1,50 @@
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import RANKING_REFRESH_SECONDS
+from app.db.database import SessionLocal
+from app.db.views import REFRESH_TWEET_RANKINGS
+
+# Ключ advisory-блокировки: одновременно рейтинг обновляет только один воркер.
+RANKING_REFRESH_LOCK_ID = 14001
+
+TRY_LOCK = text("SELECT pg_try_advisory_xact_lock(:lock_id)")
+
+
+async def refresh_rankings(db: AsyncSession) -> bool:
+    """
+    Обновляет материализованное представление tweet_rankings.
+
+    REFRESH ... CONCURRENTLY не блокирует чтение популярной ленты.
+    Если рейтинг в этот момент обновляет другой воркер, обновление пропускается.
+
+    Args:
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        bool: True, если представление было обновлено.
+    """
+    locked = await db.scalar(TRY_LOCK, {"lock_id": RANKING_REFRESH_LOCK_ID})
+    if locked:
+        await db.execute(REFRESH_TWEET_RANKINGS)
+    await db.commit()
+    return bool(locked)
+
+
+async def refresh_rankings_periodically() -> None:
+    """
+    Фоновая задача: обновляет рейтинг твитов каждые RANKING_REFRESH_SECONDS.
+    Ошибки базы данных не останавливают задачу.
+
+    Returns:
+        None
+    """
+    while True:
+        try:
+            async with SessionLocal() as db:
+                await refresh_rankings(db)
+        except Exception as e:
+            print(f"Failed to refresh tweet rankings: {str(e)}")
+        await asyncio.sleep(RANKING_REFRESH_SECONDS)
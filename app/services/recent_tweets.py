@@ -0,0 +1,318 @@
+import asyncio
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.config import RECENT_TWEETS_CAPACITY, RECENT_TWEETS_REFRESH_SECONDS
+from app.db.database import ReplicaSessionLocal
+from app.services import events, tweet_service
+
+
+class RecentTweetsBuffer:
+    """
+    Кольцевой буфер последних твитов воркера для сортировки sort=new.
+
+    Твиты хранятся в параллельных массивах фиксированной емкости, без ORM
+    объектов; новый твит записывается на место самого старого. Первые
+    страницы ленты собираются из буфера без обращения к базе данных.
+    Буфер обновляется событиями воркера и периодически перечитывается
+    из базы, чтобы получить изменения, сделанные другими воркерами.
+    События, пришедшие во время перечитывания, записываются в журнал
+    и повторно применяются к новому содержимому в fill().
+
+    Атрибуты:
+    - capacity (int): Количество хранимых твитов.
+    - loaded (bool): Буфер заполнен из базы данных и может отвечать на запросы.
+    - complete (bool): Буфер содержит все твиты, которые есть в базе.
+    - journal (Optional[List[Tuple[Callable, tuple]]]): События, примененные
+    с начала перечитывания, или None, если перечитывание не идет.
+    """
+
+    __slots__ = (
+        "capacity",
+        "ids",
+        "like_counts",
+        "contents",
+        "authors",
+        "attachments",
+        "likes",
+        "slots",
+        "head",
+        "size",
+        "loaded",
+        "complete",
+        "journal",
+    )
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.ids = array("q", [0] * capacity)
+        self.like_counts = array("q", [0] * capacity)
+        self.contents: List[Optional[str]] = [None] * capacity
+        self.authors: List[Optional[Tuple]] = [None] * capacity
+        self.attachments: List[Optional[Tuple]] = [None] * capacity
+        self.likes: List[Optional[List[dict]]] = [None] * capacity
+        self.slots: Dict[int, int] = {}
+        self.head = 0
+        self.size = 0
+        self.loaded = False
+        self.complete = False
+        self.journal: Optional[List[Tuple[Callable[..., None], tuple]]] = None
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def begin_reload(self) -> None:
+        """
+        Начинает запись событий в журнал перед чтением твитов из базы.
+
+        Returns:
+            None
+        """
+        self.journal = []
+
+    def apply(self, operation: Callable[..., None], *args: Any) -> None:
+        """
+        Применяет событие к буферу и, если идет перечитывание, записывает
+        его в журнал.
+
+        Args:
+            operation (Callable[..., None]): Метод буфера: add, remove,
+            like или unlike.
+            *args (Any): Аргументы метода.
+
+        Returns:
+            None
+        """
+        operation(*args)
+        if self.journal is not None:
+            self.journal.append((operation, args))
+
+    def fill(self, tweets: List[dict], complete: bool) -> None:
+        """
+        Заменяет содержимое буфера твитами из базы данных и повторно применяет
+        события из журнала: снимок базы мог быть прочитан до них. Методы
+        событий идемпотентны, поэтому уже учтенные в снимке события
+        ничего не меняют. Созданные твиты с id меньше самого нового твита
+        снимка пропускаются: add пишет в голову буфера и нарушил бы порядок
+        по id; такие твиты появятся при следующем перечитывании.
+
+        Args:
+            tweets (List[dict]): Твиты в формате hydrate_tweets, от новых к старым.
+            complete (bool): В базе нет твитов старше переданных.
+
+        Returns:
+            None
+        """
+        self.slots.clear()
+        self.head = 0
+        self.size = 0
+        for index in range(self.capacity):
+            self.ids[index] = 0
+        for tweet in reversed(tweets[: self.capacity]):
+            self.add(tweet)
+        self.complete = complete
+        self.loaded = True
+        newest_id = tweets[0]["id"] if tweets else 0
+        journal, self.journal = self.journal or [], None
+        for operation, args in journal:
+            if operation == self.add and args[0]["id"] < newest_id:
+                continue
+            operation(*args)
+
+    def add(self, tweet: dict) -> None:
+        """
+        Записывает твит на место самого старого.
+
+        Args:
+            tweet (dict): Твит в формате hydrate_tweets.
+
+        Returns:
+            None
+        """
+        if tweet["id"] in self.slots:
+            return
+        index = self.head
+        if self.size == self.capacity:
+            self.slots.pop(self.ids[index], None)
+            self.complete = False
+        else:
+            self.size += 1
+        self.ids[index] = tweet["id"]
+        self.like_counts[index] = tweet["like_count"]
+        self.contents[index] = tweet["content"]
+        self.authors[index] = (tweet["author"]["id"], tweet["author"]["name"])
+        self.attachments[index] = tuple(tweet["attachments"])
+        self.likes[index] = list(tweet["likes"])
+        self.slots[tweet["id"]] = index
+        self.head = (index + 1) % self.capacity
+
+    def remove(self, tweet_id: int) -> None:
+        """
+        Помечает твит удаленным; его слот пропускается при чтении.
+
+        Args:
+            tweet_id (int): Идентификатор твита.
+
+        Returns:
+            None
+        """
+        index = self.slots.pop(tweet_id, None)
+        if index is not None:
+            self.ids[index] = 0
+            self.contents[index] = self.authors[index] = None
+            self.attachments[index] = self.likes[index] = None
+
+    def like(self, tweet_id: int, user_id: int, name: str) -> None:
+        """
+        Добавляет лайк пользователя к твиту, если он есть в буфере.
+
+        Args:
+            tweet_id (int): Идентификатор твита.
+            user_id (int): Идентификатор пользователя.
+            name (str): Имя пользователя.
+
+        Returns:
+            None
+        """
+        index = self.slots.get(tweet_id)
+        if index is None:
+            return
+        likes = self.likes[index]
+        if any(like["user_id"] == user_id for like in likes):
+            return
+        likes.append({"user_id": user_id, "name": name})
+        self.like_counts[index] += 1
+
+    def unlike(self, tweet_id: int, user_id: int) -> None:
+        """
+        Убирает лайк пользователя с твита, если он есть в буфере.
+
+        Args:
+            tweet_id (int): Идентификатор твита.
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            None
+        """
+        index = self.slots.get(tweet_id)
+        if index is None:
+            return
+        likes = self.likes[index]
+        remaining = [like for like in likes if like["user_id"] != user_id]
+        if len(remaining) != len(likes):
+            self.likes[index] = remaining
+            self.like_counts[index] -= 1
+
+    def page(
+        self, limit: int, before_id: Optional[int] = None
+    ) -> Optional[Tuple[List[dict], Optional[int]]]:
+        """
+        Возвращает страницу твитов от новых к старым.
+
+        Args:
+            limit (int): Количество твитов на странице.
+            before_id (Optional[int]): Вернуть твиты с id меньше указанного.
+
+        Returns:
+            Optional[Tuple[List[dict], Optional[int]]]: Твиты страницы и id
+            последнего твита для курсора (None, если страница последняя),
+            либо None, если буфер не может ответить и нужен запрос к базе.
+        """
+        if not self.loaded:
+            return None
+        tweets = []
+        for offset in range(1, self.size + 1):
+            index = (self.head - offset) % self.capacity
+            tweet_id = self.ids[index]
+            if not tweet_id or (before_id is not None and tweet_id >= before_id):
+                continue
+            if len(tweets) == limit:
+                return tweets, tweets[-1]["id"]
+            author_id, author_name = self.authors[index]
+            tweets.append(
+                {
+                    "id": tweet_id,
+                    "content": self.contents[index],
+                    "attachments": list(self.attachments[index]),
+                    "author": {"id": author_id, "name": author_name},
+                    "likes": list(self.likes[index]),
+                    "like_count": self.like_counts[index],
+                }
+            )
+        if self.complete:
+            return tweets, None
+        return None
+
+    def stats(self) -> dict:
+        """
+        Возвращает состояние буфера для метрик.
+
+        Returns:
+            dict: Емкость, количество твитов и флаги loaded и complete.
+        """
+        return {
+            "capacity": self.capacity,
+            "size": len(self),
+            "loaded": self.loaded,
+            "complete": self.complete,
+        }
+
+
+recent_tweets = RecentTweetsBuffer(RECENT_TWEETS_CAPACITY)
+
+events.subscribe(
+    events.TWEET_CREATED,
+    lambda payload: recent_tweets.apply(recent_tweets.add, payload),
+)
+events.subscribe(
+    events.TWEET_DELETED,
+    lambda payload: recent_tweets.apply(recent_tweets.remove, payload["tweet_id"]),
+)
+events.subscribe(
+    events.TWEET_LIKED,
+    lambda payload: recent_tweets.apply(
+        recent_tweets.like, payload["tweet_id"], payload["user_id"], payload["name"]
+    ),
+)
+events.subscribe(
+    events.TWEET_UNLIKED,
+    lambda payload: recent_tweets.apply(
+        recent_tweets.unlike, payload["tweet_id"], payload["user_id"]
+    ),
+)
+
+
+async def reload_recent_tweets() -> None:
+    """
+    Перечитывает последние твиты из базы данных (реплики) в буфер.
+    События воркера, пришедшие во время чтения, не теряются.
+
+    Returns:
+        None
+    """
+    recent_tweets.begin_reload()
+    try:
+        async with ReplicaSessionLocal() as db:
+            tweets, next_cursor = await tweet_service.get_latest_tweets_page(
+                recent_tweets.capacity, None, db
+            )
+            hydrated = await tweet_service.hydrate_tweets(tweets, db)
+        recent_tweets.fill(hydrated, complete=next_cursor is None)
+    finally:
+        recent_tweets.journal = None
+
+
+async def refresh_recent_tweets() -> None:
+    """
+    Фоновая задача: периодически перечитывает буфер, чтобы он отражал
+    изменения других воркеров. Ошибки базы данных не останавливают задачу.
+
+    Returns:
+        None
+    """
+    while True:
+        try:
+            await reload_recent_tweets()
+        except Exception as e:
+            print(f"Failed to reload recent tweets: {str(e)}")
+        await asyncio.sleep(RECENT_TWEETS_REFRESH_SECONDS)
@@ -0,0 +1,189 @@
+from typing import Iterable
+
+from sqlalchemy import Integer, any_, bindparam, delete, literal, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import (
+    HOME_TIMELINE_BACKFILL,
+    HOME_TIMELINE_CACHE_MAX_IDS,
+    HOME_TIMELINE_CACHE_TTL,
+    READ_YOUR_WRITES_SECONDS,
+)
+from app.db import models
+from app.services.cache import TTLCache
+
+# Кеш первых страниц домашних лент: user_id -> (id твитов от новых к старым,
+# есть ли в ленте твиты глубже). Ограничен суммарным количеством id.
+home_timeline_cache = TTLCache(
+    maxsize=HOME_TIMELINE_CACHE_MAX_IDS,
+    ttl=HOME_TIMELINE_CACHE_TTL,
+    weigh=lambda entry: len(entry[0]) + 1,
+)
+
+# Ленты, сброшенные после записи: user_id -> True на READ_YOUR_WRITES_SECONDS.
+# Пока запись жива, прочитанная лента не кешируется: реплика может еще
+# не получить изменение, и устаревшая страница осталась бы в кеше на весь TTL.
+invalidated_timelines = TTLCache(
+    maxsize=HOME_TIMELINE_CACHE_MAX_IDS, ttl=READ_YOUR_WRITES_SECONDS
+)
+
+# Перестроение всех домашних лент: собственные твиты пользователя и последние
+# :backfill твитов каждого автора, на которого он подписан.
+REBUILD_HOME_TIMELINES = text(
+    """
+    INSERT INTO home_timeline (user_id, tweet_id, author_id)
+    SELECT f.follower_id, t.id, t.user_id
+    FROM user_followers f
+    CROSS JOIN LATERAL (
+        SELECT id, user_id FROM tweets
+        WHERE user_id = f.following_id
+        ORDER BY id DESC
+        LIMIT :backfill
+    ) t
+    UNION ALL
+    SELECT user_id, id, user_id FROM tweets
+    ON CONFLICT DO NOTHING
+"""
+)
+
+
+async def fan_out_tweet(tweet_id: int, author_id: int, db: AsyncSession) -> None:
+    """
+    Доставляет новый твит в домашние ленты автора и всех его подписчиков.
+
+    Выполняется одним INSERT ... SELECT по user_followers в транзакции
+    создания твита, без загрузки подписчиков в приложение. Кеш лент
+    сбрасывается после commit через invalidate_author_followers().
+
+    Args:
+        tweet_id (int): Идентификатор нового твита.
+        author_id (int): Идентификатор автора.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        None
+    """
+    followers = select(
+        models.UserFollower.follower_id, literal(tweet_id), literal(author_id)
+    ).where(models.UserFollower.following_id == author_id)
+    author = select(literal(author_id), literal(tweet_id), literal(author_id))
+    await db.execute(
+        insert(models.HomeTimeline)
+        .from_select(["user_id", "tweet_id", "author_id"], followers.union_all(author))
+        .on_conflict_do_nothing()
+    )
+
+
+async def retract_tweet(tweet_id: int, db: AsyncSession) -> None:
+    """
+    Удаляет твит из всех домашних лент. Кеш лент сбрасывается после commit
+    через invalidate_author_followers().
+
+    Args:
+        tweet_id (int): Идентификатор удаляемого твита.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        None
+    """
+    await db.execute(
+        delete(models.HomeTimeline).where(models.HomeTimeline.tweet_id == tweet_id)
+    )
+
+
+async def backfill_author(user_id: int, author_id: int, db: AsyncSession) -> None:
+    """
+    Добавляет в домашнюю ленту пользователя последние твиты автора,
+    на которого он подписался. Кеш ленты сбрасывается после commit
+    через invalidate_timelines().
+
+    Args:
+        user_id (int): Идентификатор подписчика.
+        author_id (int): Идентификатор автора.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        None
+    """
+    recent = (
+        select(literal(user_id), models.Tweet.id, models.Tweet.user_id)
+        .where(models.Tweet.user_id == author_id)
+        .order_by(models.Tweet.id.desc())
+        .limit(HOME_TIMELINE_BACKFILL)
+    )
+    await db.execute(
+        insert(models.HomeTimeline)
+        .from_select(["user_id", "tweet_id", "author_id"], recent)
+        .on_conflict_do_nothing()
+    )
+
+
+async def retract_author(user_id: int, author_id: int, db: AsyncSession) -> None:
+    """
+    Удаляет твиты автора из домашней ленты пользователя после отписки.
+    Кеш ленты сбрасывается после commit через invalidate_timelines().
+
+    Args:
+        user_id (int): Идентификатор бывшего подписчика.
+        author_id (int): Идентификатор автора.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        None
+    """
+    await db.execute(
+        delete(models.HomeTimeline).where(
+            models.HomeTimeline.user_id == user_id,
+            models.HomeTimeline.author_id == author_id,
+        )
+    )
+
+
+def invalidate_timelines(user_ids: Iterable[int]) -> None:
+    """
+    Сбрасывает закешированные ленты пользователей и на READ_YOUR_WRITES_SECONDS
+    запрещает их повторное кеширование.
+
+    Вызывается после commit: чтение между сбросом и commit вернуло бы
+    в кеш старую ленту.
+
+    Args:
+        user_ids (Iterable[int]): Идентификаторы владельцев лент.
+
+    Returns:
+        None
+    """
+    for user_id in user_ids:
+        home_timeline_cache.pop(user_id)
+        invalidated_timelines.set(user_id, True)
+
+
+async def invalidate_author_followers(author_id: int, db: AsyncSession) -> None:
+    """
+    Сбрасывает после commit кеш лент автора и его подписчиков, получивших
+    или потерявших его твит.
+
+    Из базы читаются только подписчики, чьи ленты есть в кеше воркера,
+    поэтому объем ответа не зависит от количества подписчиков автора.
+
+    Args:
+        author_id (int): Идентификатор автора.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        None
+    """
+    cached = [user_id for user_id in home_timeline_cache.keys() if user_id != author_id]
+    followers = []
+    if cached:
+        followers = (
+            await db.scalars(
+                select(models.UserFollower.follower_id).where(
+                    models.UserFollower.following_id == author_id,
+                    models.UserFollower.follower_id
+                    == any_(bindparam("cached_user_ids", cached, type_=ARRAY(Integer))),
+                )
+            )
+        ).all()
+    invalidate_timelines([author_id, *followers])
@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.config import (
+    TRENDING_BUCKET_SECONDS,
+    TRENDING_REFRESH_SECONDS,
+    TRENDING_SIZE,
+    TRENDING_WINDOW_BUCKETS,
+)
+from app.services import events
+
+
+class TrendingCounter:
+    """
+    Счетчики лайков твитов в скользящем окне из корзин фиксированной длины.
+
+    Каждая корзина хранит приращения лайков за свой интервал, а totals -
+    сумму по всем корзинам окна. Лайк и снятие лайка изменяют текущую
+    корзину и totals за O(1); устаревшие корзины вычитаются из totals при
+    сдвиге окна. Топ твитов выбирается кучей (heapq.nlargest) в refresh()
+    и читается из готового снимка, поэтому стоимость чтения не зависит
+    от количества лайков.
+
+    Счетчики живут в памяти воркера и учитывают только лайки, принятые
+    этим воркером.
+    """
+
+    def __init__(self, bucket_seconds: float, window_buckets: int, size: int) -> None:
+        """
+        Args:
+            bucket_seconds (float): Длина корзины в секундах.
+            window_buckets (int): Количество корзин в окне.
+            size (int): Размер снимка топа.
+        """
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self.size = size
+        self._buckets: Deque[Tuple[int, Counter]] = deque()
+        self.totals: Dict[int, int] = {}
+        self.top: List[Tuple[int, int]] = []
+
+    def _advance(self, now: float) -> Counter:
+        """
+        Вычитает из totals корзины, вышедшие из окна, и возвращает текущую корзину.
+
+        Args:
+            now (float): Текущее время (time.monotonic()).
+
+        Returns:
+            Counter: Приращения текущей корзины.
+        """
+        bucket = int(now // self.bucket_seconds)
+        oldest = bucket - self.window_buckets + 1
+        while self._buckets and self._buckets[0][0] < oldest:
+            _, expired = self._buckets.popleft()
+            for tweet_id, delta in expired.items():
+                total = self.totals.get(tweet_id)
+                if total is None:
+                    continue
+                total -= delta
+                if total:
+                    self.totals[tweet_id] = total
+                else:
+                    del self.totals[tweet_id]
+        if not self._buckets or self._buckets[-1][0] != bucket:
+            self._buckets.append((bucket, Counter()))
+        return self._buckets[-1][1]
+
+    def add(self, tweet_id: int, delta: int, now: Optional[float] = None) -> None:
+        """
+        Учитывает лайк (delta=1) или снятие лайка (delta=-1).
+
+        Args:
+            tweet_id (int): Идентификатор твита.
+            delta (int): Изменение количества лайков.
+            now (Optional[float]): Текущее время, по умолчанию time.monotonic().
+
+        Returns:
+            None
+        """
+        current = self._advance(time.monotonic() if now is None else now)
+        current[tweet_id] += delta
+        total = self.totals.get(tweet_id, 0) + delta
+        if total:
+            self.totals[tweet_id] = total
+        else:
+            self.totals.pop(tweet_id, None)
+
+    def remove(self, tweet_id: int) -> None:
+        """
+        Убирает удаленный твит из окна и из снимка топа.
+
+        Args:
+            tweet_id (int): Идентификатор твита.
+
+        Returns:
+            None
+        """
+        self.totals.pop(tweet_id, None)
+        for _, bucket in self._buckets:
+            bucket.pop(tweet_id, None)
+        self.top = [entry for entry in self.top if entry[0] != tweet_id]
+
+    def refresh(self, now: Optional[float] = None) -> List[Tuple[int, int]]:
+        """
+        Пересчитывает снимок топа по лайкам в окне.
+
+        Args:
+            now (Optional[float]): Текущее время, по умолчанию time.monotonic().
+
+        Returns:
+            List[Tuple[int, int]]: Пары (id твита, лайки в окне) по убыванию
+            лайков, при равенстве - от новых к старым.
+        """
+        self._advance(time.monotonic() if now is None else now)
+        self.top = heapq.nlargest(
+            self.size,
+            ((tweet_id, total) for tweet_id, total in self.totals.items() if total > 0),
+            key=lambda entry: (entry[1], entry[0]),
+        )
+        return self.top
+
+    def page(self, limit: int) -> List[int]:
+        """
+        Возвращает id первых limit твитов последнего снимка топа.
+
+        Args:
+            limit (int): Количество твитов.
+
+        Returns:
+            List[int]: Идентификаторы твитов.
+        """
+        return [tweet_id for tweet_id, _ in self.top[:limit]]
+
+    def stats(self) -> dict:
+        """
+        Возвращает состояние счетчиков для метрик.
+
+        Returns:
+            dict: Количество корзин, твитов в окне и размер снимка топа.
+        """
+        return {
+            "buckets": len(self._buckets),
+            "tweets": len(self.totals),
+            "top": len(self.top),
+        }
+
+
+trending = TrendingCounter(
+    TRENDING_BUCKET_SECONDS, TRENDING_WINDOW_BUCKETS, TRENDING_SIZE
+)
+
+events.subscribe(
+    events.TWEET_LIKED, lambda payload: trending.add(payload["tweet_id"], 1)
+)
+events.subscribe(
+    events.TWEET_UNLIKED, lambda payload: trending.add(payload["tweet_id"], -1)
+)
+events.subscribe(
+    events.TWEET_DELETED, lambda payload: trending.remove(payload["tweet_id"])
+)
+
+
+async def refresh_trending() -> None:
+    """
+    Фоновая задача: пересчитывает топ каждые TRENDING_REFRESH_SECONDS.
+
+    Returns:
+        None
+    """
+    while True:
+        trending.refresh()
+        await asyncio.sleep(TRENDING_REFRESH_SECONDS)
@@ -1,14 +1,51 @@
-from typing import List, Optional
+import base64
+import os
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-
+from sqlalchemy import (
+    CTE,
+    Row,
+    Select,
+    delete,
+    exists,
+    func,
+    literal,
+    select,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from app.config import (
+    HOME_TIMELINE_CACHE_DEPTH,
+    KNOWN_TWEETS_CACHE_SIZE,
+    KNOWN_TWEETS_CACHE_TTL,
+    LIKE_WRITE_BEHIND,
+    TWEET_CACHE_SIZE,
+    TWEET_CACHE_TTL,
+)
 from app.db import models
-from app.services.user_service import get_user_info
+from app.db.views import tweet_rankings
+from app.services import timeline_service
+from app.services.cache import TTLCache
+from app.services.like_buffer import like_buffer
+from app.services.timeline_service import home_timeline_cache
+
+# Кеш готовых твитов: (id, version) -> данные твита в формате hydrate_tweets.
+tweet_cache = TTLCache(maxsize=TWEET_CACHE_SIZE, ttl=TWEET_CACHE_TTL)
+# Id существующих твитов для проверки отложенных лайков: id -> True.
+known_tweets = TTLCache(maxsize=KNOWN_TWEETS_CACHE_SIZE, ttl=KNOWN_TWEETS_CACHE_TTL)
 
 
 async def create_tweet(
-    tweet_data: str, user_id: int, tweet_media_ids: Optional[List[int]], db: Session
+    tweet_data: str,
+    user_id: int,
+    tweet_media_ids: Optional[List[int]],
+    db: AsyncSession,
 ) -> int:
     """
     Создает новый твит и сохраняет его в базе данных.
@@ -16,64 +53,177 @@ async def create_tweet(
     Эта функция принимает данные твита, идентификатор пользователя и список
     идентификаторов медиа файлов, если таковые имеются,
     и создает новый твит в базе данных. Также связывает медиа файлы с твитом,
-    если они указаны.
+    если они указаны, и доставляет твит в домашние ленты подписчиков автора.
 
     Args:
         tweet_data (str): Содержание твита.
         user_id (int): Идентификатор пользователя, который создает твит.
         tweet_media_ids (Optional[List[int]]): Список идентификаторов
         медиа файлов, прикрепленных к твиту.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         int: Идентификатор созданного твита.
     """
     new_tweet = models.Tweet(content=tweet_data, user_id=user_id)
     db.add(new_tweet)
-    db.commit()
-    db.refresh(new_tweet)
+    await db.flush()
     if tweet_media_ids:
         for media_id in tweet_media_ids:
-            media = db.query(models.Media).filter(models.Media.id == media_id).first()
+            media = await db.get(models.Media, media_id)
             if not media:
                 raise HTTPException(
                     status_code=400, detail=f"Media ID {media_id} does not exist."
                 )
             tweet_media = models.TweetMedia(tweet_id=new_tweet.id, media_id=media_id)
             db.add(tweet_media)
-    db.commit()
+    await timeline_service.fan_out_tweet(new_tweet.id, user_id, db)
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(
+            tweets_count=models.User.tweets_count + 1,
+            version=models.User.version + 1,
+        )
+    )
+    await db.commit()
+    known_tweets.set(new_tweet.id, True)
+    await timeline_service.invalidate_author_followers(user_id, db)
     return new_tweet.id
 
 
-async def get_user_feed(user_id: int, db: Session) -> List[dict]:
+async def get_attachments_by_tweet(
+    tweet_ids: Sequence[int], db: AsyncSession
+) -> Dict[int, List[str]]:
+    """
+    Получает медиа файлы нескольких твитов одним запросом.
+
+    Args:
+        tweet_ids (Sequence[int]): Идентификаторы твитов.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        Dict[int, List[str]]: Пути к медиа файлам по идентификатору твита.
     """
-    Получает ленту твитов пользователя.
+    attachments: Dict[int, List[str]] = {tweet_id: [] for tweet_id in tweet_ids}
+    if not tweet_ids:
+        return attachments
+    rows = await db.execute(
+        select(models.TweetMedia.tweet_id, models.Media.file_path)
+        .join(models.Media, models.Media.id == models.TweetMedia.media_id)
+        .where(models.TweetMedia.tweet_id.in_(tweet_ids))
+        .order_by(models.TweetMedia.id)
+    )
+    for tweet_id, file_path in rows:
+        attachments[tweet_id].append(file_path)
+    return attachments
+
 
-    Эта функция возвращает список твитов пользователя с прикрепленными
-    медиа файлами и лайками.
+async def get_likes_by_tweet(
+    tweet_ids: Sequence[int], db: AsyncSession
+) -> Dict[int, List[dict]]:
+    """
+    Получает лайки нескольких твитов с именами пользователей одним запросом.
 
     Args:
-        user_id (int): Идентификатор пользователя, чью ленту нужно получить.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        tweet_ids (Sequence[int]): Идентификаторы твитов.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
-        List[dict]: Список твитов с прикрепленными медиа файлами и лайками.
+        Dict[int, List[dict]]: Пользователи, поставившие лайк, по
+        идентификатору твита.
     """
-    tweets = db.query(models.Tweet).filter(models.Tweet.user_id == user_id).all()
-    tweets_info = []
-    for tweet in tweets:
-        media_files = await get_media_files(tweet.id, db)
-        tweet_data = {
-            "id": tweet.id,
-            "content": tweet.content,
-            "attachments": media_files,
-            "likes": await get_tweet_likes(tweet.id, db),
-        }
-        tweets_info.append(tweet_data)
-    return tweets_info
+    likes: Dict[int, List[dict]] = {tweet_id: [] for tweet_id in tweet_ids}
+    if not tweet_ids:
+        return likes
+    rows = await db.execute(
+        select(models.TweetLike.tweet_id, models.User.id, models.User.name)
+        .join(models.User, models.User.id == models.TweetLike.user_id)
+        .where(models.TweetLike.tweet_id.in_(tweet_ids))
+        .order_by(models.TweetLike.id)
+    )
+    for tweet_id, user_id, name in rows:
+        likes[tweet_id].append({"user_id": user_id, "name": name})
+    return likes
+
+
+async def hydrate_tweets(
+    tweets: Sequence[models.Tweet], db: AsyncSession
+) -> List[dict]:
+    """
+    Собирает ответы для списка твитов с вложениями, авторами и лайками.
+
+    Готовые твиты берутся из кеша tweet_cache по ключу (id, version): версия
+    увеличивается при каждом изменении лайков, поэтому устаревшая запись
+    просто перестает находиться, в том числе после изменений в других
+    воркерах. Для промахов вложения и лайки выбираются двумя запросами
+    независимо от их количества; авторы должны быть загружены вместе
+    с твитами (joinedload). Возвращаемые словари разделяются с кешем
+    и не должны изменяться.
 
+    Args:
+        tweets (Sequence[models.Tweet]): Твиты с загруженными авторами.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
-async def get_media_files(tweet_id: int, db: Session) -> List[str]:
+    Returns:
+        List[dict]: Данные твитов в порядке исходного списка.
+    """
+    cached = tweet_cache.get_many((tweet.id, tweet.version) for tweet in tweets)
+    missing = [tweet for tweet in tweets if (tweet.id, tweet.version) not in cached]
+    if missing:
+        tweet_ids = [tweet.id for tweet in missing]
+        attachments = await get_attachments_by_tweet(tweet_ids, db)
+        likes = await get_likes_by_tweet(tweet_ids, db)
+        for tweet in missing:
+            author = tweet.author
+            tweet_info = {
+                "id": tweet.id,
+                "content": tweet.content,
+                "attachments": attachments[tweet.id],
+                "author": {
+                    "id": author.id if author else None,
+                    "name": author.name if author else None,
+                },
+                "likes": likes[tweet.id],
+                "like_count": tweet.like_count,
+            }
+            cached[(tweet.id, tweet.version)] = tweet_info
+            tweet_cache.set((tweet.id, tweet.version), tweet_info)
+    return [cached[(tweet.id, tweet.version)] for tweet in tweets]
+
+
+def pending_likes_key(user_id: int) -> Tuple[Tuple[int, bool], ...]:
+    """
+    Возвращает незаписанные намерения лайков пользователя для ETag,
+    чтобы ответ 304 не скрывал только что поставленный лайк.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+
+    Returns:
+        Tuple[Tuple[int, bool], ...]: Пары (id твита, лайк поставлен);
+        пустой кортеж, если намерений нет.
+    """
+    intents = like_buffer.intents_for(user_id)
+    return tuple(sorted((tweet_id, liked) for tweet_id, (liked, _) in intents.items()))
+
+
+def overlay_pending_likes(tweets: List[dict], user_id: int) -> List[dict]:
+    """
+    Показывает пользователю его еще не записанные лайки (режим
+    LIKE_WRITE_BEHIND) в твитах ответа.
+
+    Args:
+        tweets (List[dict]): Твиты в формате hydrate_tweets.
+        user_id (int): Идентификатор пользователя, запросившего ленту.
+
+    Returns:
+        List[dict]: Твиты с учетом незаписанных лайков пользователя.
+    """
+    return like_buffer.overlay(tweets, user_id)
+
+
+async def get_media_files(tweet_id: int, db: AsyncSession) -> List[str]:
     """
     Получает список медиа файлов, прикрепленных к твиту.
 
@@ -81,27 +231,15 @@ async def get_media_files(tweet_id: int, db: Session) -> List[str]:
 
     Args:
         tweet_id (int): Идентификатор твита.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         List[str]: Список путей к медиа файлам.
     """
-    media_links = (
-        db.query(models.TweetMedia).filter(models.TweetMedia.tweet_id == tweet_id).all()
-    )
-    media_files = []
-    for media_link in media_links:
-        media_file = (
-            db.query(models.Media)
-            .filter(models.Media.id == media_link.media_id)
-            .first()
-        )
-        if media_file:
-            media_files.append(media_file.file_path)
-    return media_files
+    return (await get_attachments_by_tweet([tweet_id], db))[tweet_id]
 
 
-async def get_tweet_likes(tweet_id: int, db: Session) -> List[dict]:
+async def get_tweet_likes(tweet_id: int, db: AsyncSession) -> List[dict]:
     """
     Получает список лайков для твита.
 
@@ -109,22 +247,16 @@ async def get_tweet_likes(tweet_id: int, db: Session) -> List[dict]:
 
     Args:
         tweet_id (int): Идентификатор твита.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         List[dict]: Список пользователей, которые поставили лайк,
         с их именами и идентификаторами.
     """
-    likes = (
-        db.query(models.TweetLike).filter(models.TweetLike.tweet_id == tweet_id).all()
-    )
-    return [
-        {"user_id": like.user_id, "name": await get_user_info(like.user_id, db)}
-        for like in likes
-    ]
+    return (await get_likes_by_tweet([tweet_id], db))[tweet_id]
 
 
-async def get_tweet_attachments(tweet_id: int, db: Session) -> List[str]:
+async def get_tweet_attachments(tweet_id: int, db: AsyncSession) -> List[str]:
     """
     Получает список медиа файлов, прикрепленных к твиту.
 
@@ -132,75 +264,574 @@ async def get_tweet_attachments(tweet_id: int, db: Session) -> List[str]:
 
     Args:
         tweet_id (int): Идентификатор твита.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         List[str]: Список путей к медиа файлам.
     """
-    media_links = []
-    tweet_media = (
-        db.query(models.TweetMedia).filter(models.TweetMedia.tweet_id == tweet_id).all()
-    )
-    for item in tweet_media:
-        media = db.query(models.Media).filter(models.Media.id == item.media_id).first()
-        if media:
-            media_links.append(media.file_path)
-    return media_links
+    return (await get_attachments_by_tweet([tweet_id], db))[tweet_id]
+
+
+async def _ensure_tweet_exists(tweet_id: int, db: AsyncSession) -> None:
+    """
+    Проверяет существование твита перед отложенной записью лайка:
+    сначала по кешу known_tweets, при промахе - запросом по первичному ключу.
+
+    Args:
+        tweet_id (int): Идентификатор твита.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Raises:
+        HTTPException: Если твит не найден.
+    """
+    if known_tweets.get(tweet_id):
+        return
+    if not await db.scalar(select(exists().where(models.Tweet.id == tweet_id))):
+        raise HTTPException(status_code=404, detail="Tweet not found")
+    known_tweets.set(tweet_id, True)
+
+
+async def _defer_like_change(
+    tweet_id: int, user_id: int, name: str, liked: bool, db: AsyncSession
+) -> bool:
+    """
+    Запоминает изменение лайка в like_buffer, если оно меняет текущее
+    состояние: незаписанное намерение пользователя, а без него - строку
+    tweet_likes в базе данных.
+
+    Args:
+        tweet_id (int): Идентификатор твита.
+        user_id (int): Идентификатор пользователя.
+        name (str): Имя пользователя для события лайка.
+        liked (bool): Итоговое состояние лайка.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        bool: True, если лайк изменится при сбросе буфера.
+
+    Raises:
+        HTTPException: Если твит не найден.
+    """
+    await _ensure_tweet_exists(tweet_id, db)
+    intent = like_buffer.intents_for(user_id).get(tweet_id)
+    if intent is not None:
+        current = intent[0]
+    else:
+        current = await db.scalar(
+            select(
+                exists().where(
+                    models.TweetLike.tweet_id == tweet_id,
+                    models.TweetLike.user_id == user_id,
+                )
+            )
+        )
+    if current == liked:
+        return False
+    like_buffer.add(tweet_id, user_id, name, liked)
+    return True
 
 
-async def like_tweet(tweet_id: int, user_id: int, db: Session) -> None:
+async def like_tweet(
+    tweet_id: int, user: models.User, db: AsyncSession
+) -> Tuple[bool, Optional[int]]:
     """
     Ставит лайк на твит.
 
-    Эта функция проверяет, существует ли твит, и добавляет лайк
-    от указанного пользователя.
+    Лайк и увеличение счетчика like_count и версии твита выполняются одним
+    запросом: INSERT ... ON CONFLICT DO NOTHING по уникальной паре
+    (tweet_id, user_id) и UPDATE только для вставленной строки.
+    Повторный лайк ничего не меняет. В режиме LIKE_WRITE_BEHIND после
+    проверки существования твита лайк только запоминается в like_buffer
+    и записывается при сбросе буфера, который и публикует событие.
 
     Args:
         tweet_id (int): Идентификатор твита.
-        user_id (int): Идентификатор пользователя, ставящего лайк.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        user (models.User): Пользователь, ставящий лайк; имя нужно событию
+        отложенной записи.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
-        None
+        Tuple[bool, Optional[int]]: Изменился ли лайк и идентификатор автора
+        для события или None, если лайк не изменился или запись отложена.
+
+    Raises:
+        HTTPException: Если твит не найден.
     """
-    tweet = db.query(models.Tweet).filter(models.Tweet.id == tweet_id).first()
-    if not tweet:
-        raise Exception("Tweet not found")
-    like = models.TweetLike(user_id=user_id, tweet_id=tweet_id)
-    db.add(like)
-    db.commit()
+    if LIKE_WRITE_BEHIND:
+        return await _defer_like_change(tweet_id, user.id, user.name, True, db), None
+    user_id = user.id
+    inserted = (
+        insert(models.TweetLike)
+        .from_select(
+            ["user_id", "tweet_id"],
+            select(literal(user_id), literal(tweet_id)).where(
+                exists().where(models.Tweet.id == tweet_id)
+            ),
+        )
+        .on_conflict_do_nothing(constraint="uq_tweet_likes_tweet_id_user_id")
+        .returning(models.TweetLike.tweet_id)
+        .cte("inserted")
+    )
+    updated = (
+        update(models.Tweet)
+        .where(models.Tweet.id.in_(select(inserted.c.tweet_id)))
+        .values(
+            like_count=models.Tweet.like_count + 1,
+            version=models.Tweet.version + 1,
+        )
+        .returning(models.Tweet.id)
+        .cte("updated")
+    )
+    return await _apply_like_change(tweet_id, updated, db)
 
 
-async def unlike_tweet(tweet_id: int, user_id: int, db: Session) -> None:
+async def unlike_tweet(
+    tweet_id: int, user_id: int, db: AsyncSession
+) -> Tuple[bool, Optional[int]]:
     """
     Удаляет лайк с твита.
 
-    Эта функция проверяет, существует ли твит и лайк, а затем удаляет
-    лайк от указанного пользователя.
+    Удаление лайка и уменьшение счетчика like_count с увеличением версии
+    твита выполняются одним запросом: DELETE ... RETURNING и UPDATE только
+    для удаленной строки. Если лайка не было, ничего не меняется.
+    В режиме LIKE_WRITE_BEHIND снятие лайка откладывается, как в like_tweet.
 
     Args:
         tweet_id (int): Идентификатор твита.
-        user_id (int): Идентификатор пользователя, который убирает лайк.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        user_id (int): Идентификатор пользователя, снимающего лайк.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
-        None
+        Tuple[bool, Optional[int]]: Изменился ли лайк и идентификатор автора
+        для события или None, если лайка не было или снятие отложено.
+
+    Raises:
+        HTTPException: Если твит не найден.
+    """
+    if LIKE_WRITE_BEHIND:
+        return await _defer_like_change(tweet_id, user_id, "", False, db), None
+    deleted = (
+        delete(models.TweetLike)
+        .where(
+            models.TweetLike.tweet_id == tweet_id,
+            models.TweetLike.user_id == user_id,
+        )
+        .returning(models.TweetLike.tweet_id)
+        .cte("deleted")
+    )
+    updated = (
+        update(models.Tweet)
+        .where(models.Tweet.id.in_(select(deleted.c.tweet_id)))
+        .values(
+            like_count=models.Tweet.like_count - 1,
+            version=models.Tweet.version + 1,
+        )
+        .returning(models.Tweet.id)
+        .cte("updated")
+    )
+    return await _apply_like_change(tweet_id, updated, db)
+
+
+async def _apply_like_change(
+    tweet_id: int, updated: CTE, db: AsyncSession
+) -> Tuple[bool, Optional[int]]:
+    """
+    Выполняет изменение лайка, описанное CTE updated, и фиксирует транзакцию.
+
+    Args:
+        tweet_id (int): Идентификатор твита.
+        updated (CTE): UPDATE твита, возвращающий id, если лайки изменились.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        Tuple[bool, Optional[int]]: Изменились ли лайки и идентификатор автора
+        твита или None, если лайки не изменились.
+
+    Raises:
+        HTTPException: Если твит не найден.
+    """
+    row = (
+        await db.execute(
+            select(
+                models.Tweet.user_id,
+                exists(select(updated.c.id)).label("changed"),
+            ).where(models.Tweet.id == tweet_id)
+        )
+    ).one_or_none()
+    await db.commit()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Tweet not found")
+    return row.changed, row.user_id if row.changed else None
+
+
+def encode_cursor(*values: int) -> str:
+    """
+    Кодирует ключ сортировки последнего твита страницы в непрозрачный курсор.
+
+    Args:
+        *values (int): Значения ключа сортировки, например id твита.
+
+    Returns:
+        str: Курсор для запроса следующей страницы.
+    """
+    raw = ":".join(str(value) for value in values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = 1) -> Tuple[int, ...]:
     """
-    tweet = db.query(models.Tweet).filter(models.Tweet.id == tweet_id).first()
-    if not tweet:
-        raise Exception("Tweet not found")
-    like = (
-        db.query(models.TweetLike)
-        .filter(
-            models.TweetLike.tweet_id == tweet_id, models.TweetLike.user_id == user_id
+    Декодирует курсор, полученный от encode_cursor.
+
+    Args:
+        cursor (str): Курсор из запроса клиента.
+        size (int): Ожидаемое количество значений в курсоре.
+
+    Returns:
+        Tuple[int, ...]: Ключ сортировки последнего твита предыдущей страницы.
+
+    Raises:
+        HTTPException: Если курсор поврежден.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = tuple(int(value) for value in raw.decode().split(":"))
+    except ValueError:
+        values = ()
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def decode_feed_cursor(sort: str, cursor: str) -> Tuple[int, ...]:
+    """
+    Декодирует курсор общей ленты: (like_count, id) для sort="likes"
+    и (id,) для sort="new".
+
+    Args:
+        sort (str): Порядок ленты: "likes" или "new".
+        cursor (str): Курсор из запроса клиента.
+
+    Returns:
+        Tuple[int, ...]: Ключ сортировки последнего твита предыдущей страницы.
+
+    Raises:
+        HTTPException: Если курсор поврежден или не подходит к порядку ленты.
+    """
+    return decode_cursor(cursor, size=2 if sort == "likes" else 1)
+
+
+def feed_query(sort: str, limit: int, cursor: Optional[str]) -> Select:
+    """
+    Строит запрос страницы общей ленты с ключом сортировки sort_key.
+
+    Для sort="likes" порядок - по убыванию (like_count, id): для твитов
+    из материализованного снимка tweet_rankings берется like_count снимка,
+    для твитов новее снимка - текущий like_count из tweets. Для sort="new" -
+    по убыванию id твита. Запрос выбирает limit + 1 строк, чтобы определить,
+    есть ли следующая страница.
+
+    Args:
+        sort (str): Порядок ленты: "likes" или "new".
+        limit (int): Количество твитов на странице.
+        cursor (Optional[str]): Курсор предыдущей страницы или None для первой.
+
+    Returns:
+        Select: Запрос строк (Tweet, sort_key) с загруженными авторами.
+    """
+    if sort == "likes":
+        # Твиты, созданные после обновления снимка, попадают в ленту сразу
+        snapshot_max_id = select(
+            func.coalesce(func.max(tweet_rankings.c.tweet_id), 0)
+        ).scalar_subquery()
+        ranked = union_all(
+            select(tweet_rankings.c.tweet_id, tweet_rankings.c.like_count),
+            select(models.Tweet.id, models.Tweet.like_count).where(
+                models.Tweet.id > snapshot_max_id
+            ),
+        ).subquery("ranked")
+        sort_key = ranked.c.like_count
+        query = (
+            select(models.Tweet, sort_key.label("sort_key"))
+            .join(ranked, ranked.c.tweet_id == models.Tweet.id)
+            .order_by(sort_key.desc(), ranked.c.tweet_id.desc())
+        )
+        if cursor is not None:
+            query = query.where(
+                tuple_(sort_key, ranked.c.tweet_id)
+                < tuple_(*decode_feed_cursor(sort, cursor))
+            )
+    else:
+        sort_key = models.Tweet.id
+        query = select(models.Tweet, sort_key.label("sort_key")).order_by(
+            sort_key.desc()
+        )
+        if cursor is not None:
+            (last_id,) = decode_feed_cursor(sort, cursor)
+            query = query.where(sort_key < last_id)
+    return query.options(joinedload(models.Tweet.author)).limit(limit + 1)
+
+
+def _cursor_values(sort: str, row: Row) -> Tuple[int, ...]:
+    """
+    Возвращает значения курсора для строки запроса feed_query.
+
+    Args:
+        sort (str): Порядок ленты: "likes" или "new".
+        row (Row): Последняя строка страницы.
+
+    Returns:
+        Tuple[int, ...]: (like_count, id) для "likes" и (id,) для "new".
+    """
+    if sort == "likes":
+        return row.sort_key, row.Tweet.id
+    return (row.sort_key,)
+
+
+async def get_tweets_page(
+    limit: int, cursor: Optional[str], db: AsyncSession
+) -> Tuple[List[models.Tweet], Optional[str]]:
+    """
+    Возвращает страницу твитов, отсортированных по убыванию лайков.
+
+    Порядок берется из материализованного снимка tweet_rankings, который
+    периодически обновляется в фоне: запрос читает limit + 1 строк по индексу
+    ix_tweet_rankings_like_count_tweet_id, а курсор - (like_count, id)
+    последнего твита страницы. Лайки между обновлениями снимка порядок
+    не меняют. После обновления листание продолжается с того же ключа,
+    поэтому твит, чьи лайки пересекли ключ курсора, может быть пропущен
+    или показан повторно. Твиты, созданные после последнего обновления,
+    показываются сразу с текущим количеством лайков (их немного, они
+    читаются по первичному ключу), поэтому автор видит свой новый твит.
+
+    Args:
+        limit (int): Количество твитов на странице.
+        cursor (Optional[str]): Курсор предыдущей страницы или None для первой.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        Tuple[List[models.Tweet], Optional[str]]: Твиты страницы с загруженными
+        авторами и курсор следующей страницы (None, если страница последняя).
+    """
+    return await _get_feed_page("likes", limit, cursor, db)
+
+
+async def get_latest_tweets_page(
+    limit: int, cursor: Optional[str], db: AsyncSession
+) -> Tuple[List[models.Tweet], Optional[str]]:
+    """
+    Возвращает страницу всех твитов от новых к старым.
+
+    Args:
+        limit (int): Количество твитов на странице.
+        cursor (Optional[str]): Курсор предыдущей страницы или None для первой.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        Tuple[List[models.Tweet], Optional[str]]: Твиты страницы с загруженными
+        авторами и курсор следующей страницы (None, если страница последняя).
+    """
+    return await _get_feed_page("new", limit, cursor, db)
+
+
+async def _get_feed_page(
+    sort: str, limit: int, cursor: Optional[str], db: AsyncSession
+) -> Tuple[List[models.Tweet], Optional[str]]:
+    rows = list((await db.execute(feed_query(sort, limit, cursor))).all())
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*_cursor_values(sort, rows[-1]))
+    return [row.Tweet for row in rows], next_cursor
+
+
+async def stream_feed(
+    sort: str, limit: int, cursor: Optional[str], db: AsyncSession, batch_size: int
+) -> AsyncIterator[Tuple[List[models.Tweet], Optional[str]]]:
+    """
+    Читает страницу общей ленты через серверный курсор пачками по batch_size
+    строк, не загружая всю страницу в память.
+
+    Args:
+        sort (str): Порядок ленты: "likes" или "new".
+        limit (int): Количество твитов на странице.
+        cursor (Optional[str]): Курсор предыдущей страницы или None для первой.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+        batch_size (int): Количество строк, получаемых из курсора за раз.
+
+    Returns:
+        AsyncIterator[Tuple[List[models.Tweet], Optional[str]]]: Пачки твитов
+        с загруженными авторами; у последней пачки - курсор следующей страницы
+        (None, если страница последняя), у остальных - None.
+    """
+    result = await db.stream(
+        feed_query(sort, limit, cursor).execution_options(yield_per=batch_size)
+    )
+    remaining = limit
+    last_key = None
+    async for rows in result.partitions():
+        batch = [row.Tweet for row in rows[:remaining]]
+        if len(rows) > remaining:
+            # Строка limit + 1 означает, что есть следующая страница
+            yield batch, encode_cursor(
+                *(_cursor_values(sort, rows[remaining - 1]) if batch else last_key)
+            )
+            return
+        remaining -= len(batch)
+        last_key = _cursor_values(sort, rows[-1])
+        if batch:
+            yield batch, None
+
+
+async def get_home_timeline_ids(
+    user_id: int, db: AsyncSession
+) -> Tuple[Tuple[int, ...], bool]:
+    """
+    Возвращает id первых HOME_TIMELINE_CACHE_DEPTH твитов домашней ленты
+    пользователя, используя кеш home_timeline_cache. Ленты, сброшенные
+    меньше READ_YOUR_WRITES_SECONDS назад, читаются без кеширования.
+
+    Args:
+        user_id (int): Идентификатор владельца ленты.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        Tuple[Tuple[int, ...], bool]: Id твитов от новых к старым и признак
+        того, что в ленте есть более старые твиты.
+    """
+    entry = home_timeline_cache.get(user_id)
+    if entry is None:
+        tweet_ids = (
+            await db.scalars(
+                select(models.HomeTimeline.tweet_id)
+                .where(models.HomeTimeline.user_id == user_id)
+                .order_by(models.HomeTimeline.tweet_id.desc())
+                .limit(HOME_TIMELINE_CACHE_DEPTH + 1)
+            )
+        ).all()
+        entry = (
+            tuple(tweet_ids[:HOME_TIMELINE_CACHE_DEPTH]),
+            len(tweet_ids) > HOME_TIMELINE_CACHE_DEPTH,
         )
-        .first()
+        # Сразу после записи чтение с реплики может быть устаревшим
+        if not timeline_service.invalidated_timelines.get(user_id):
+            home_timeline_cache.set(user_id, entry)
+    return entry
+
+
+async def get_tweets_by_ids(
+    tweet_ids: Sequence[int], db: AsyncSession
+) -> List[models.Tweet]:
+    """
+    Загружает твиты с авторами одним запросом в порядке переданных id.
+    Отсутствующие (удаленные) твиты пропускаются.
+
+    Args:
+        tweet_ids (Sequence[int]): Идентификаторы твитов.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        List[models.Tweet]: Найденные твиты.
+    """
+    if not tweet_ids:
+        return []
+    tweets = (
+        await db.scalars(
+            select(models.Tweet)
+            .options(joinedload(models.Tweet.author))
+            .where(models.Tweet.id.in_(tweet_ids))
+        )
+    ).all()
+    by_id = {tweet.id: tweet for tweet in tweets}
+    return [by_id[tweet_id] for tweet_id in tweet_ids if tweet_id in by_id]
+
+
+async def get_home_timeline_page(
+    user_id: int, limit: int, cursor: Optional[str], db: AsyncSession
+) -> Tuple[List[models.Tweet], Optional[str]]:
+    """
+    Возвращает страницу домашней ленты пользователя, от новых твитов к старым.
+
+    Лента читается диапазоном первичного ключа home_timeline (user_id, tweet_id),
+    заполняемого при создании твитов и подписках. Id твитов первой страницы
+    берутся из кеша home_timeline_cache, который сбрасывается при изменении
+    ленты; в этом случае из базы загружаются только сами твиты по id.
+
+    Args:
+        user_id (int): Идентификатор владельца ленты.
+        limit (int): Количество твитов на странице.
+        cursor (Optional[str]): Курсор предыдущей страницы или None для первой.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        Tuple[List[models.Tweet], Optional[str]]: Твиты страницы с загруженными
+        авторами и курсор следующей страницы (None, если страница последняя).
+    """
+    if cursor is None and limit <= HOME_TIMELINE_CACHE_DEPTH:
+        tweet_ids, has_more = await get_home_timeline_ids(user_id, db)
+        page_ids = tweet_ids[:limit]
+        next_cursor = None
+        if page_ids and (len(tweet_ids) > limit or has_more):
+            next_cursor = encode_cursor(page_ids[-1])
+        return await get_tweets_by_ids(page_ids, db), next_cursor
+
+    query = (
+        select(models.Tweet)
+        .join(models.HomeTimeline, models.HomeTimeline.tweet_id == models.Tweet.id)
+        .options(joinedload(models.Tweet.author))
+        .where(models.HomeTimeline.user_id == user_id)
+        .order_by(models.HomeTimeline.tweet_id.desc())
+        .limit(limit + 1)
     )
-    db.delete(like)
-    db.commit()
+    if cursor is not None:
+        (before_id,) = decode_cursor(cursor)
+        query = query.where(models.HomeTimeline.tweet_id < before_id)
+    tweets = list((await db.scalars(query)).all())
+    next_cursor = None
+    if len(tweets) > limit:
+        tweets = tweets[:limit]
+        next_cursor = encode_cursor(tweets[-1].id)
+    return tweets, next_cursor
+
+
+async def get_user_feed_page(
+    user_id: int, limit: int, cursor: Optional[str], db: AsyncSession
+) -> Tuple[List[Tuple[int, int]], Optional[str]]:
+    """
+    Получает страницу твитов пользователя от новых к старым.
 
+    Возвращаются только ключи (id, version): limit + 1 строк находятся
+    по индексу ix_tweets_user_id_id (user_id, id), а version читается из строк
+    таблицы. Этого достаточно для ETag; содержимое, авторы и вложения
+    загружаются get_tweets_by_ids только для измененной страницы.
 
-async def get_tweet_by_id(tweet_id: int, db: Session) -> Optional[models.Tweet]:
+    Args:
+        user_id (int): Идентификатор автора.
+        limit (int): Количество твитов на странице.
+        cursor (Optional[str]): Курсор предыдущей страницы.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        Tuple[List[Tuple[int, int]], Optional[str]]: Пары (id, version) твитов
+        страницы и курсор следующей страницы (None, если страница последняя).
+    """
+    query = (
+        select(models.Tweet.id, models.Tweet.version)
+        .where(models.Tweet.user_id == user_id)
+        .order_by(models.Tweet.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor is not None:
+        (before_id,) = decode_cursor(cursor)
+        query = query.where(models.Tweet.id < before_id)
+    keys = [(row.id, row.version) for row in await db.execute(query)]
+    next_cursor = None
+    if len(keys) > limit:
+        keys = keys[:limit]
+        next_cursor = encode_cursor(keys[-1][0])
+    return keys, next_cursor
+
+
+async def get_tweet_by_id(tweet_id: int, db: AsyncSession) -> Optional[models.Tweet]:
     """
     Получает твит по его идентификатору.
 
@@ -208,29 +839,55 @@ async def get_tweet_by_id(tweet_id: int, db: Session) -> Optional[models.Tweet]:
 
     Args:
         tweet_id (int): Идентификатор твита.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         Optional[models.Tweet]: Твит, если он найден, иначе None.
     """
-    return db.query(models.Tweet).filter(models.Tweet.id == tweet_id).first()
+    return await db.get(models.Tweet, tweet_id)
 
 
-async def delete_tweet(tweet_id: int, db: Session) -> None:
+async def delete_tweet(tweet_id: int, db: AsyncSession) -> None:
     """
     Удаляет твит.
 
     Эта функция проверяет, существует ли твит с указанным идентификатором
-    и удаляет его из базы данных.
+    и удаляет его из базы данных вместе с лайками, прикрепленными медиа
+    файлами и записями домашних лент, уменьшая счетчик tweets_count автора
+    в той же транзакции.
 
     Args:
         tweet_id (int): Идентификатор твита, который нужно удалить.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         None
     """
-    tweet = db.query(models.Tweet).filter(models.Tweet.id == tweet_id).first()
+    tweet = await db.get(models.Tweet, tweet_id)
     if tweet:
-        db.delete(tweet)
-        db.commit()
+        media_links = await db.scalars(
+            select(models.TweetMedia).where(models.TweetMedia.tweet_id == tweet_id)
+        )
+        for media_link in media_links.all():
+            await db.delete(media_link)
+            media = await db.get(models.Media, media_link.media_id)
+            if media and os.path.exists(media.file_path):
+                os.remove(media.file_path)
+                await db.delete(media)
+        await db.execute(
+            delete(models.TweetLike).where(models.TweetLike.tweet_id == tweet_id)
+        )
+        await timeline_service.retract_tweet(tweet_id, db)
+        tweet_cache.pop((tweet.id, tweet.version))
+        await db.delete(tweet)
+        await db.execute(
+            update(models.User)
+            .where(models.User.id == tweet.user_id)
+            .values(
+                tweets_count=models.User.tweets_count - 1,
+                version=models.User.version + 1,
+            )
+        )
+        await db.commit()
+        known_tweets.pop(tweet_id)
+        await timeline_service.invalidate_author_followers(tweet.user_id, db)
@@ -1,45 +1,155 @@
-from typing import Dict, Optional
+import hashlib
+import hmac
+import secrets
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import (
+    API_KEY_SECRET,
+    PRINCIPAL_CACHE_SIZE,
+    PRINCIPAL_CACHE_TTL,
+    REJECTED_KEY_CACHE_SIZE,
+    REJECTED_KEY_CACHE_TTL,
+)
+from app.db import models
+from app.services import timeline_service
+from app.services.cache import TTLCache
 
-from sqlalchemy import text
-from sqlalchemy.orm import Session
+# Кеш аутентифицированных пользователей: дайджест API ключа -> (id, name).
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+# Короткоживущий кеш дайджестов ключей, для которых пользователь не найден.
+rejected_key_cache = TTLCache(
+    maxsize=REJECTED_KEY_CACHE_SIZE, ttl=REJECTED_KEY_CACHE_TTL
+)
 
-from app.db import models
+
+def hash_api_key(api_key: str) -> str:
+    """
+    Вычисляет HMAC-SHA256 дайджест API ключа.
+
+    Дайджест хранится в колонке users.api_key_hash с уникальным индексом,
+    поэтому поиск пользователя по ключу выполняется через индекс,
+    без расшифровки всех строк таблицы.
+
+    Args:
+        api_key (str): API ключ в открытом виде.
+
+    Returns:
+        str: Шестнадцатеричное представление дайджеста.
+    """
+    return hmac.new(
+        API_KEY_SECRET.encode(), api_key.encode(), hashlib.sha256
+    ).hexdigest()
 
 
-async def get_user_by_api_key(api_key: str, db: Session) -> Optional[models.User]:
+async def get_user_by_api_key(api_key: str, db: AsyncSession) -> Optional[models.User]:
     """
-    Получает пользователя по API ключу, расшифровывая его с использованием
-    pgp_sym_decrypt в SQL.
+    Получает пользователя по API ключу, используя индекс по HMAC-дайджесту ключа.
+
+    Найденные пользователи кешируются в principal_cache, а ненайденные ключи -
+    в rejected_key_cache, поэтому повторные запросы с тем же ключом
+    не обращаются к базе данных.
 
     Args:
         api_key (str): API ключ для поиска пользователя.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         Optional[models.User]: Пользователь, если найден, иначе None.
     """
+    api_key_hash = hash_api_key(api_key)
+    cached = principal_cache.get(api_key_hash)
+    if cached is not None:
+        user_id, name = cached
+        return models.User(id=user_id, name=name)
+    if rejected_key_cache.get(api_key_hash):
+        return None
+
     sql_query = text(
         """
         SELECT id, name
         FROM users
-        WHERE pgp_sym_decrypt(api_key::bytea, :secret_key) = :api_key
+        WHERE api_key_hash = :api_key_hash
         LIMIT 1
     """
     )
 
     # Выполнение запроса с параметрами
-    result = db.execute(
-        sql_query, {"secret_key": "your-secret-key", "api_key": api_key}
-    ).fetchone()
+    result = (await db.execute(sql_query, {"api_key_hash": api_key_hash})).fetchone()
 
     # Возвращаем пользователя, если найден
     if result:
+        principal_cache.set(api_key_hash, (result.id, result.name))
         user = models.User(id=result.id, name=result.name)
         return user
+    rejected_key_cache.set(api_key_hash, True)
     return None
 
 
-async def get_user_info(user_id: int, db: Session) -> Optional[Dict]:
+def invalidate_api_key(api_key: str) -> None:
+    """
+    Удаляет API ключ из кеша пользователей и кеша отклоненных ключей.
+
+    Вызывается при смене (ротации) ключа для старого и нового ключа, чтобы
+    старый ключ перестал приниматься, а новый начал, не дожидаясь TTL.
+
+    Args:
+        api_key (str): API ключ в открытом виде.
+
+    Returns:
+        None
+    """
+    api_key_hash = hash_api_key(api_key)
+    principal_cache.pop(api_key_hash)
+    rejected_key_cache.pop(api_key_hash)
+
+
+def invalidate_user(user_id: int) -> None:
+    """
+    Удаляет из кеша все API ключи пользователя.
+
+    Вызывается при удалении пользователя.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+
+    Returns:
+        None
+    """
+    principal_cache.pop_where(lambda key, value: value[0] == user_id)
+
+
+async def rotate_api_key(user_id: int, db: AsyncSession) -> str:
+    """
+    Выдает пользователю новый API ключ вместо текущего.
+
+    После commit из кеша воркера удаляются старые ключи пользователя
+    и отказ по новому ключу. Другие воркеры принимают старый ключ,
+    пока не истечет PRINCIPAL_CACHE_TTL.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        str: Новый API ключ в открытом виде.
+    """
+    api_key = secrets.token_urlsafe(32)
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == user_id)
+        .values(api_key=api_key, api_key_hash=hash_api_key(api_key))
+    )
+    await db.commit()
+    invalidate_user(user_id)
+    invalidate_api_key(api_key)
+    return api_key
+
+
+async def get_user_info(user_id: int, db: AsyncSession) -> Optional[Dict]:
     """
     Получает информацию о пользователе, включая его подписчиков и тех,
     на кого он подписан.
@@ -50,95 +160,146 @@ async def get_user_info(user_id: int, db: Session) -> Optional[Dict]:
 
     Args:
         user_id (int): Идентификатор пользователя для получения информации.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         Optional[Dict]: Словарь с информацией о пользователе, включая его
         подписчиков и подписок, если пользователь найден.
         Возвращает None, если пользователь не найден.
     """
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     if not user:
         print(f"No user found with user_id: {user_id}")
         return None
 
-    followers = (
-        db.query(models.UserFollower)
-        .filter(models.UserFollower.following_id == user_id)
-        .all()
+    followers = await db.execute(
+        select(models.User.id, models.User.name)
+        .join(models.UserFollower, models.UserFollower.follower_id == models.User.id)
+        .where(models.UserFollower.following_id == user_id)
     )
-    following = (
-        db.query(models.UserFollower)
-        .filter(models.UserFollower.follower_id == user_id)
-        .all()
+    following = await db.execute(
+        select(models.User.id, models.User.name)
+        .join(models.UserFollower, models.UserFollower.following_id == models.User.id)
+        .where(models.UserFollower.follower_id == user_id)
     )
 
     followers_info = [
-        {"id": follower.follower.id, "name": follower.follower.name}
-        for follower in followers
-    ]
-    following_info = [
-        {"id": follow.following.id, "name": follow.following.name}
-        for follow in following
+        {"id": follower.id, "name": follower.name} for follower in followers
     ]
+    following_info = [{"id": follow.id, "name": follow.name} for follow in following]
 
     user_info = {
         "id": user.id,
         "name": user.name,
         "followers": followers_info,
         "following": following_info,
+        "followers_count": user.followers_count,
+        "following_count": user.following_count,
+        "tweets_count": user.tweets_count,
     }
     return user_info
 
 
-async def follow_user(follower_id: int, following_id: int, db: Session) -> None:
+async def follow_user(follower_id: int, following_id: int, db: AsyncSession) -> None:
     """
     Подписывается на пользователя.
 
-    Эта функция создает новую запись о подписке пользователя на другого пользователя.
+    Эта функция создает новую запись о подписке пользователя на другого пользователя
+    и в той же транзакции обновляет счетчики following_count и followers_count
+    и добавляет последние твиты автора в домашнюю ленту подписчика.
+    Повторная подписка ничего не меняет.
 
     Args:
         follower_id (int): Идентификатор пользователя, который подписывается.
         following_id (int): Идентификатор пользователя, на которого подписываются.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         None
     """
-    new_follow = models.UserFollower(follower_id=follower_id, following_id=following_id)
-    db.add(new_follow)
-    db.commit()
+    follow_id = await db.scalar(
+        insert(models.UserFollower)
+        .values(follower_id=follower_id, following_id=following_id)
+        .on_conflict_do_nothing(constraint="uq_user_followers_follower_id_following_id")
+        .returning(models.UserFollower.id)
+    )
+    if follow_id is not None:
+        await _update_follow_counters(follower_id, following_id, 1, db)
+        await timeline_service.backfill_author(follower_id, following_id, db)
+    await db.commit()
+    if follow_id is not None:
+        timeline_service.invalidate_timelines([follower_id])
 
 
-async def unfollow_user(follower_id: int, following_id: int, db: Session) -> None:
+async def unfollow_user(follower_id: int, following_id: int, db: AsyncSession) -> None:
     """
     Отписывается от пользователя.
 
-    Эта функция удаляет запись о подписке пользователя на другого пользователя.
+    Эта функция удаляет запись о подписке пользователя на другого пользователя
+    и в той же транзакции обновляет счетчики following_count и followers_count
+    и убирает твиты автора из домашней ленты бывшего подписчика.
+    Счетчики меняются, только если запись действительно удалена этим запросом,
+    поэтому одновременные отписки не уменьшают их дважды.
 
     Args:
         follower_id (int): Идентификатор пользователя, который отписывается.
         following_id (int): Идентификатор пользователя, от которого отписываются.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         None
     """
-    follow_relation = (
-        db.query(models.UserFollower)
-        .filter(
+    follow_id = await db.scalar(
+        delete(models.UserFollower)
+        .where(
             models.UserFollower.follower_id == follower_id,
             models.UserFollower.following_id == following_id,
         )
-        .first()
+        .returning(models.UserFollower.id)
     )
+    if follow_id is not None:
+        await _update_follow_counters(follower_id, following_id, -1, db)
+        await timeline_service.retract_author(follower_id, following_id, db)
+    await db.commit()
+    if follow_id is not None:
+        timeline_service.invalidate_timelines([follower_id])
 
-    if follow_relation:
-        db.delete(follow_relation)
-        db.commit()
 
+async def _update_follow_counters(
+    follower_id: int, following_id: int, delta: int, db: AsyncSession
+) -> None:
+    """
+    Изменяет счетчики подписок обоих пользователей на delta
+    и увеличивает версии их профилей.
 
-async def get_user_by_id(user_id: int, db: Session) -> Optional[models.User]:
+    Args:
+        follower_id (int): Идентификатор подписчика.
+        following_id (int): Идентификатор пользователя, на которого подписаны.
+        delta (int): 1 при подписке, -1 при отписке.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        None
+    """
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == follower_id)
+        .values(
+            following_count=models.User.following_count + delta,
+            version=models.User.version + 1,
+        )
+    )
+    await db.execute(
+        update(models.User)
+        .where(models.User.id == following_id)
+        .values(
+            followers_count=models.User.followers_count + delta,
+            version=models.User.version + 1,
+        )
+    )
+
+
+async def get_user_by_id(user_id: int, db: AsyncSession) -> Optional[models.User]:
     """
     Получает пользователя по его идентификатору.
 
@@ -147,10 +308,29 @@ async def get_user_by_id(user_id: int, db: Session) -> Optional[models.User]:
 
     Args:
         user_id (int): Идентификатор пользователя.
-        db (Session): Сессия SQLAlchemy для работы с базой данных.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
 
     Returns:
         Optional[models.User]: Пользователь, если найден, иначе None.
     """
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+    user = await db.get(models.User, user_id)
     return user if user else None
+
+
+async def get_following_ids(user_id: int, db: AsyncSession) -> List[int]:
+    """
+    Получает идентификаторы пользователей, на которых подписан пользователь.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        db (AsyncSession): Асинхронная сессия SQLAlchemy для работы с базой данных.
+
+    Returns:
+        List[int]: Идентификаторы авторов, на которых он подписан.
+    """
+    result = await db.scalars(
+        select(models.UserFollower.following_id).where(
+            models.UserFollower.follower_id == user_id
+        )
+    )
+    return list(result)
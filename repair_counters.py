@@ -0,0 +1,25 @@
+# repair_counters.py
+import asyncio
+
+from app.db.database import SessionLocal
+from app.services.counter_service import recompute_counters
+
+
+async def repair_counters():
+    """
+    Пересчитывает счетчики лайков, подписчиков, подписок и твитов
+    по исходным таблицам и выводит количество исправленных строк.
+
+    Возвращаемое значение:
+    - None
+    """
+    async with SessionLocal() as db:
+        repaired = await recompute_counters(db)
+    print(
+        f"Счетчики пересчитаны: твитов исправлено {repaired['tweets']}, "
+        f"пользователей исправлено {repaired['users']}."
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(repair_counters())
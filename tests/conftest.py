@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+from typing import Callable, Optional, Sequence
+
+import pytest
+
+
+@pytest.fixture
+def make_tweet() -> Callable[..., dict]:
+    """Фабрика данных твита в формате hydrate_tweets.
+
+    Returns:
+        Callable[..., dict]: Функция (tweet_id, likes=()) -> твит без вложений
+        с переданными лайками.
+    """
+
+    def factory(tweet_id: int, likes: Optional[Sequence[dict]] = None) -> dict:
+        likes = list(likes or [])
+        return {
+            "id": tweet_id,
+            "content": f"tweet {tweet_id}",
+            "attachments": [],
+            "author": {"id": 1, "name": "Author"},
+            "likes": likes,
+            "like_count": len(likes),
+        }
+
+    return factory
+
+
+@pytest.fixture
+def make_tweet_model() -> Callable[..., SimpleNamespace]:
+    """Фабрика твитов с загруженным автором в виде объектов модели Tweet.
+
+    Returns:
+        Callable[..., SimpleNamespace]: Функция (tweet_id, version=1) -> объект
+        с атрибутами модели Tweet.
+    """
+
+    def factory(tweet_id: int, version: int = 1) -> SimpleNamespace:
+        return SimpleNamespace(
+            id=tweet_id,
+            version=version,
+            content=f"tweet {tweet_id}",
+            author=SimpleNamespace(id=1, name="Author"),
+            like_count=0,
+        )
+
+    return factory
@@ -0,0 +1,144 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services import user_service
+from app.services.cache import TTLCache
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Очистка кешей пользователей и отклоненных ключей между тестами.
+
+    Returns:
+        None
+    """
+    user_service.principal_cache.clear()
+    user_service.rejected_key_cache.clear()
+    yield
+    user_service.principal_cache.clear()
+    user_service.rejected_key_cache.clear()
+
+
+def test_cache_evicts_least_recently_used():
+    """Тест на вытеснение самой давно использованной записи.
+
+    Returns:
+        None
+    """
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_expires_entries():
+    """Тест на истечение времени жизни записи.
+
+    Returns:
+        None
+    """
+    cache = TTLCache(maxsize=10, ttl=5)
+    with patch("app.services.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("app.services.cache.time.monotonic", return_value=104.0):
+        assert cache.get("a") == 1
+    with patch("app.services.cache.time.monotonic", return_value=106.0):
+        assert cache.get("a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_bounded_by_total_weight():
+    """Тест на вытеснение по суммарному весу записей.
+
+    Returns:
+        None
+    """
+    cache = TTLCache(maxsize=5, ttl=60, weigh=len)
+    cache.set("a", (1, 2))
+    cache.set("b", (3, 4))
+    cache.set("a", (1, 2, 3))
+    assert cache.weight == 5
+    cache.set("c", (5,))
+    assert cache.get("b") is None
+    assert cache.get("a") == (1, 2, 3)
+    assert cache.weight == 4
+    cache.pop("a")
+    assert cache.weight == 1
+
+
+@pytest.mark.asyncio
+async def test_get_user_by_api_key_uses_cache():
+    """Тест на повторный поиск пользователя без обращения к базе данных.
+
+    Returns:
+        None
+    """
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.execute.return_value.fetchone = MagicMock(
+        return_value=SimpleNamespace(id=1, name="Test User")
+    )
+
+    first = await user_service.get_user_by_api_key("test-api-key", db)
+    second = await user_service.get_user_by_api_key("test-api-key", db)
+
+    assert first.id == second.id == 1
+    assert second.name == "Test User"
+    db.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_invalidate_user_drops_cached_keys():
+    """Тест на инвалидацию кеша при удалении пользователя.
+
+    Returns:
+        None
+    """
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.execute.return_value.fetchone = MagicMock(
+        return_value=SimpleNamespace(id=1, name="Test User")
+    )
+    await user_service.get_user_by_api_key("test-api-key", db)
+
+    user_service.invalidate_user(1)
+    await user_service.get_user_by_api_key("test-api-key", db)
+
+    assert db.execute.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_rotate_api_key_invalidates_old_and_new_keys():
+    """Тест на отказ по старому ключу и прием нового сразу после ротации.
+
+    Returns:
+        None
+    """
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+    db.execute.return_value.fetchone = MagicMock(
+        return_value=SimpleNamespace(id=1, name="Test User")
+    )
+    await user_service.get_user_by_api_key("test-api-key", db)
+
+    db.execute.return_value.fetchone = MagicMock(return_value=None)
+    with patch("app.services.user_service.secrets.token_urlsafe", return_value="new"):
+        # Новый ключ отклонен до ротации и попал в кеш отказов
+        assert await user_service.get_user_by_api_key("new", db) is None
+        assert await user_service.rotate_api_key(1, db) == "new"
+
+    db.commit.assert_awaited_once()
+    assert await user_service.get_user_by_api_key("test-api-key", db) is None
+    db.execute.return_value.fetchone = MagicMock(
+        return_value=SimpleNamespace(id=1, name="Test User")
+    )
+    assert (await user_service.get_user_by_api_key("new", db)).id == 1
@@ -0,0 +1,62 @@
+from fastapi.testclient import TestClient
+
+from app.db import database
+from app.db.database import (
+    get_pool_stats,
+    get_read_sessionmaker,
+    mark_write,
+    to_async_url,
+)
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_to_async_url():
+    """Тест на приведение URL базы данных к драйверу asyncpg.
+
+    Returns:
+        None
+    """
+    assert (
+        to_async_url("postgresql://postgres:1234@db:5432/microblog")
+        == "postgresql+asyncpg://postgres:1234@db:5432/microblog"
+    )
+    assert (
+        to_async_url("postgresql+asyncpg://postgres:1234@db:5432/microblog")
+        == "postgresql+asyncpg://postgres:1234@db:5432/microblog"
+    )
+
+
+def test_pool_stats_in_metrics():
+    """Тест на публикацию состояния пула соединений в метриках.
+
+    Returns:
+        None
+    """
+    stats = get_pool_stats()
+    assert stats["checked_out"] == 0
+    assert stats["pool_size"] > 0
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert set(response.json()["db_pool"]) == set(stats)
+
+
+def test_read_your_writes_routing():
+    """Тест на выбор сессии для чтения после записи пользователя.
+
+    Проверяет, что чтения идут на реплику, пока пользователь не выполнил запись,
+    и на основную базу в течение окна read-your-writes после нее.
+
+    Returns:
+        None
+    """
+    database.recent_writers.clear()
+    assert get_read_sessionmaker(42) is database.ReplicaSessionLocal
+
+    mark_write(42)
+    assert get_read_sessionmaker(42) is database.SessionLocal
+    assert get_read_sessionmaker(43) is database.ReplicaSessionLocal
+    assert get_read_sessionmaker(None) is database.ReplicaSessionLocal
+    database.recent_writers.clear()
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from app.services import events
+from app.services.feed_push import FeedHub, encode_event, feed_hub
+
+
+def drain(subscription) -> list:
+    """Забирает все кадры из очереди подключения без ожидания.
+
+    Returns:
+        list: Кадры в порядке поступления.
+    """
+    frames = []
+    while not subscription.queue.empty():
+        frames.append(subscription.queue.get_nowait())
+    return frames
+
+
+@pytest.mark.asyncio
+async def test_publish_reaches_followers_only():
+    """Тест на доставку событий автору и его подписчикам.
+
+    Returns:
+        None
+    """
+    hub = FeedHub(queue_size=10)
+    follower = hub.connect(1, [2])
+    author = hub.connect(2, [])
+    stranger = hub.connect(3, [4])
+
+    hub.publish(events.TWEET_LIKED, 2, {"tweet_id": 7})
+
+    frame = encode_event(events.TWEET_LIKED, {"tweet_id": 7})
+    assert frame == b'event: tweet_liked\ndata: {"tweet_id":7}\n\n'
+    assert drain(follower) == [frame]
+    assert drain(author) == [frame]
+    assert drain(stranger) == []
+    assert hub.stats()["delivered"] == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_drops_and_resyncs():
+    """Тест на отбрасывание событий для медленного клиента и событие resync.
+
+    Returns:
+        None
+    """
+    hub = FeedHub(queue_size=2)
+    subscription = hub.connect(1, [])
+
+    for tweet_id in range(5):
+        hub.publish(events.TWEET_DELETED, 1, {"tweet_id": tweet_id})
+
+    assert hub.stats()["dropped"] == 3
+    frames = subscription.frames(heartbeat=60)
+    assert await frames.__anext__() == encode_event("resync", {"dropped": 3})
+    assert await frames.__anext__() == encode_event(
+        events.TWEET_DELETED, {"tweet_id": 0}
+    )
+    assert await frames.__anext__() == encode_event(
+        events.TWEET_DELETED, {"tweet_id": 1}
+    )
+    await frames.aclose()
+
+
+@pytest.mark.asyncio
+async def test_frames_send_ping_when_idle():
+    """Тест на пинг при отсутствии событий.
+
+    Returns:
+        None
+    """
+    subscription = FeedHub(queue_size=2).connect(1, [])
+
+    frames = subscription.frames(heartbeat=0.01)
+    assert await asyncio.wait_for(frames.__anext__(), 1) == b": ping\n\n"
+    await frames.aclose()
+
+
+@pytest.mark.asyncio
+async def test_follow_events_update_open_connections():
+    """Тест на изменение рассылки при подписке и отписке во время подключения.
+
+    Returns:
+        None
+    """
+    subscription = feed_hub.connect(101, [])
+    try:
+        events.publish(events.USER_FOLLOWED, {"follower_id": 101, "following_id": 102})
+        events.publish(
+            events.TWEET_UNLIKED, {"tweet_id": 1, "author_id": 102, "user_id": 5}
+        )
+        events.publish(
+            events.USER_UNFOLLOWED, {"follower_id": 101, "following_id": 102}
+        )
+        events.publish(
+            events.TWEET_UNLIKED, {"tweet_id": 2, "author_id": 102, "user_id": 5}
+        )
+
+        assert drain(subscription) == [
+            encode_event(
+                events.TWEET_UNLIKED, {"tweet_id": 1, "author_id": 102, "user_id": 5}
+            )
+        ]
+    finally:
+        feed_hub.disconnect(subscription)
+
+    assert 101 not in feed_hub._by_user
+    assert 102 not in feed_hub._by_author
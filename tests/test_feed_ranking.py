@@ -0,0 +1,121 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.services import feed_ranking
+from app.services.feed_ranking import CandidatePool, top_page
+from app.services.tweet_service import decode_cursor, encode_cursor
+
+NOW = 1_000_000.0
+HOUR = 3600.0
+
+# (id, user_id, like_count, created_at)
+ROWS = [
+    (5, 2, 0, NOW - 1 * HOUR),
+    (4, 3, 10, NOW - 2 * HOUR),
+    (3, 2, 4, NOW - 3 * HOUR),
+    (2, 4, 40, NOW - 48 * HOUR),
+    (1, 3, 10, NOW - 50 * HOUR),
+]
+
+
+def ranked_ids(strategy: str) -> list:
+    """Идентификаторы всех кандидатов ROWS в порядке стратегии.
+
+    Returns:
+        list: id твитов.
+    """
+    candidates = CandidatePool(ROWS).for_user(1, [2], NOW)
+    scores = feed_ranking.STRATEGIES[strategy](candidates)
+    return candidates.ids[top_page(scores, candidates.ids, 0, len(ROWS))].tolist()
+
+
+def test_strategies_order_candidates():
+    """Тест на порядок кандидатов для каждой стратегии.
+
+    Returns:
+        None
+    """
+    assert ranked_ids("recency") == [5, 4, 3, 2, 1]
+    assert ranked_ids("likes") == [2, 4, 1, 3, 5]
+    assert ranked_ids("engagement") == [4, 3, 5, 2, 1]
+    assert ranked_ids("affinity") == [3, 4, 5, 2, 1]
+
+
+def test_top_page_matches_full_sort_with_ties():
+    """Тест на совпадение страниц с полной сортировкой при равных оценках.
+
+    Returns:
+        None
+    """
+    rng = np.random.default_rng(3)
+    scores = rng.integers(0, 5, size=500).astype(np.float64)
+    ids = np.arange(1, 501)
+    expected = np.lexsort((-ids, -scores))
+
+    pages = [top_page(scores, ids, offset, 40) for offset in range(0, 520, 40)]
+
+    assert np.array_equal(np.concatenate(pages), expected)
+    assert len(top_page(scores, ids, 500, 40)) == 0
+
+
+@pytest.mark.asyncio
+@patch("app.services.feed_ranking.tweet_service.get_tweets_by_ids")
+@patch("app.services.feed_ranking.user_service.get_following_ids")
+async def test_ranked_page_uses_cached_candidates(mock_following, mock_by_ids):
+    """Тест на страницу ранжированной ленты и кеширование кандидатов.
+
+    Returns:
+        None
+    """
+    feed_ranking.candidate_cache.clear()
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+    db.execute.return_value.all.return_value = ROWS
+    mock_following.return_value = [2]
+    mock_by_ids.side_effect = lambda tweet_ids, db: tweet_ids
+
+    with patch("app.services.feed_ranking.time.time", return_value=NOW):
+        tweets, next_cursor = await feed_ranking.get_ranked_page(
+            1, "likes", 2, None, db
+        )
+        assert tweets == [2, 4]
+        assert decode_cursor(next_cursor) == (2,)
+
+        tweets, next_cursor = await feed_ranking.get_ranked_page(
+            1, "likes", 3, next_cursor, db
+        )
+        assert tweets == [1, 3, 5]
+        assert next_cursor is None
+
+    db.execute.assert_awaited_once()
+    feed_ranking.candidate_cache.clear()
+
+
+@pytest.mark.asyncio
+async def test_ranked_page_rejects_unknown_strategy():
+    """Тест на ошибку 400 для неизвестной стратегии.
+
+    Returns:
+        None
+    """
+    with pytest.raises(HTTPException) as exc:
+        await feed_ranking.get_ranked_page(1, "random", 10, None, AsyncMock())
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_ranked_page_rejects_negative_offset():
+    """Тест на ошибку 400 для курсора с отрицательным смещением.
+
+    Returns:
+        None
+    """
+    with pytest.raises(HTTPException) as exc:
+        await feed_ranking.get_ranked_page(
+            1, "likes", 10, encode_cursor(-3), AsyncMock()
+        )
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "Invalid cursor"
@@ -0,0 +1,165 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import events, tweet_service
+from app.services.like_buffer import LikeBuffer
+
+
+def test_opposite_intents_coalesce():
+    """Тест на схлопывание лайка и снятия лайка одной пары.
+
+    Returns:
+        None
+    """
+    buffer = LikeBuffer(max_pending=2)
+    buffer.add(1, 7, "A", True)
+    buffer.add(1, 7, "A", False)
+    buffer.add(2, 7, "A", True)
+
+    assert len(buffer) == 2
+    assert buffer.intents_for(7) == {1: (False, "A"), 2: (True, "A")}
+    assert buffer.stats()["coalesced"] == 1
+    assert buffer.full.is_set()
+
+
+def test_overlay_shows_own_pending_likes(make_tweet):
+    """Тест на отображение незаписанных лайков автору без изменения кеша.
+
+    Returns:
+        None
+    """
+    buffer = LikeBuffer(max_pending=10)
+    buffer.add(1, 7, "A", True)
+    buffer.add(2, 7, "A", False)
+    liked = make_tweet(1)
+    unliked = make_tweet(2, [{"user_id": 7, "name": "A"}])
+
+    result = buffer.overlay([liked, unliked, make_tweet(3)], 7)
+
+    assert result[0]["likes"] == [{"user_id": 7, "name": "A"}]
+    assert result[0]["like_count"] == 1
+    assert result[1]["likes"] == []
+    assert result[1]["like_count"] == 0
+    assert liked["likes"] == [] and unliked["like_count"] == 1
+    assert buffer.overlay([liked], 8)[0] is liked
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_batch_and_publishes_changes():
+    """Тест на запись пачки одним запросом и события фактических изменений.
+
+    Returns:
+        None
+    """
+    buffer = LikeBuffer(max_pending=10)
+    buffer.add(1, 7, "A", True)
+    buffer.add(2, 7, "A", False)
+    buffer.add(1, 8, "B", True)
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+    db.execute.return_value.all.return_value = [
+        SimpleNamespace(tweet_id=1, user_id=7, delta=1, author_id=9),
+        SimpleNamespace(tweet_id=2, user_id=7, delta=-1, author_id=9),
+    ]
+
+    with patch("app.services.like_buffer.events.publish") as mock_publish:
+        assert await buffer.flush(db) == 2
+
+    db.execute.assert_awaited_once()
+    params = db.execute.await_args.args[1]
+    assert sorted(zip(params["tweet_ids"], params["user_ids"], params["liked"])) == [
+        (1, 7, True),
+        (1, 8, True),
+        (2, 7, False),
+    ]
+    db.commit.assert_awaited_once()
+    mock_publish.assert_any_call(
+        events.TWEET_LIKED, {"tweet_id": 1, "author_id": 9, "user_id": 7, "name": "A"}
+    )
+    mock_publish.assert_any_call(
+        events.TWEET_UNLIKED, {"tweet_id": 2, "author_id": 9, "user_id": 7}
+    )
+    assert len(buffer) == 0
+    assert buffer.intents_for(7) == {}
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_newer_intents():
+    """Тест на возврат намерений в буфер после ошибки записи.
+
+    Returns:
+        None
+    """
+    buffer = LikeBuffer(max_pending=10)
+    buffer.add(1, 7, "A", True)
+    buffer.add(2, 7, "A", True)
+    db = AsyncMock()
+
+    async def fail(*args):
+        buffer.add(1, 7, "A", False)
+        raise RuntimeError("connection lost")
+
+    db.execute.side_effect = fail
+
+    with pytest.raises(RuntimeError):
+        await buffer.flush(db)
+
+    assert buffer.intents_for(7) == {1: (False, "A"), 2: (True, "A")}
+    assert len(buffer) == 2
+
+
+@pytest.mark.asyncio
+async def test_like_tweet_write_behind():
+    """Тест на отложенный лайк известного твита без записи в базу данных.
+
+    Returns:
+        None
+    """
+    db = AsyncMock()
+    db.scalar.return_value = False
+    user = SimpleNamespace(id=7, name="A")
+    tweet_service.known_tweets.set(1, True)
+    with (
+        patch("app.services.tweet_service.LIKE_WRITE_BEHIND", True),
+        patch("app.services.tweet_service.like_buffer", LikeBuffer(10)) as buffer,
+    ):
+        assert await tweet_service.like_tweet(1, user, db) == (True, None)
+        assert buffer.intents_for(7) == {1: (True, "A")}
+        # Повтор сравнивается с незаписанным намерением, без запроса
+        assert await tweet_service.like_tweet(1, user, db) == (False, None)
+        assert await tweet_service.unlike_tweet(1, 7, db) == (True, None)
+        assert tweet_service.pending_likes_key(7) == ((1, False),)
+
+    db.execute.assert_not_awaited()
+    db.scalar.assert_awaited_once()
+    assert len(buffer) == 1
+
+
+@pytest.mark.asyncio
+async def test_like_tweet_write_behind_checks_existence():
+    """Тест на ошибку отложенного лайка несуществующего твита, как без буфера.
+
+    Returns:
+        None
+    """
+    db = AsyncMock()
+    db.scalar.side_effect = [False, True, False]
+    tweet_service.known_tweets.clear()
+    with (
+        patch("app.services.tweet_service.LIKE_WRITE_BEHIND", True),
+        patch("app.services.tweet_service.like_buffer", LikeBuffer(10)) as buffer,
+    ):
+        with pytest.raises(HTTPException) as exc:
+            await tweet_service.like_tweet(3, SimpleNamespace(id=7, name="A"), db)
+        assert exc.value.status_code == 404
+        assert len(buffer) == 0
+
+        # Подтвержденный базой твит запоминается, повторной проверки нет
+        await tweet_service.like_tweet(4, SimpleNamespace(id=7, name="A"), db)
+        await tweet_service.unlike_tweet(4, 7, db)
+
+    assert db.scalar.await_count == 3
+    assert tweet_service.known_tweets.get(4)
@@ -0,0 +1,70 @@
+import random
+from datetime import datetime
+
+import populate_db
+
+END_TIME = 1_800_000_000.0
+
+
+def generate(seed):
+    """Генерация небольшого набора данных с заданным seed.
+
+    Returns:
+        tuple: Подписки и строки твитов, медиа и лайков.
+    """
+    rng = random.Random(seed)
+    cum_popularity = populate_db.make_popularity(rng, 200)
+    follows = list(populate_db.generate_follows(rng, 1, cum_popularity, 10))
+    rows = list(
+        populate_db.generate_tweets(
+            rng, 1, 1, 1, cum_popularity, populate_db.PRESETS["small"], END_TIME
+        )
+    )
+    return follows, rows
+
+
+def test_generation_is_deterministic():
+    """Тест на воспроизводимость данных при одинаковом seed.
+
+    Returns:
+        None
+    """
+    assert generate(7) == generate(7)
+    assert generate(7) != generate(8)
+
+
+def test_generated_rows_respect_constraints():
+    """Тест на отсутствие самоподписок и повторных подписок и лайков.
+
+    Returns:
+        None
+    """
+    follows, rows = generate(42)
+    assert all(follower != following for follower, following in follows)
+    assert len(set(follows)) == len(follows)
+
+    likes = [row for table, row in rows if table == "tweet_likes"]
+    assert len(set(likes)) == len(likes)
+    tweet_ids = {row[0] for table, row in rows if table == "tweets"}
+    assert {tweet_id for _, tweet_id in likes} <= tweet_ids
+
+    created = [
+        datetime.fromisoformat(row[3]).timestamp()
+        for table, row in rows
+        if table == "tweets"
+    ]
+    start = END_TIME - populate_db.TWEETS_TIME_SPAN_SECONDS
+    assert all(start <= created_at <= END_TIME for created_at in created)
+    assert len(set(created)) == len(created)
+
+
+def test_to_sync_url():
+    """Тест на приведение URL к синхронному драйверу.
+
+    Returns:
+        None
+    """
+    url = "postgresql+asyncpg://postgres:1234@db:5432/microblog"
+    assert (
+        populate_db.to_sync_url(url) == "postgresql://postgres:1234@db:5432/microblog"
+    )
@@ -0,0 +1,46 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.db.views import REFRESH_TWEET_RANKINGS
+from app.services.ranking_service import refresh_rankings
+
+
+@pytest.fixture
+def mock_db():
+    """Создание мокированного объекта асинхронной сессии базы данных.
+
+    Returns:
+        MagicMock: Мок сессии с асинхронными методами.
+    """
+    db = MagicMock()
+    for method in ("execute", "scalar", "commit"):
+        setattr(db, method, AsyncMock())
+    yield db
+
+
+@pytest.mark.asyncio
+async def test_refresh_rankings_under_lock(mock_db):
+    """Тест на обновление рейтинга воркером, получившим блокировку.
+
+    Returns:
+        None
+    """
+    mock_db.scalar.return_value = True
+
+    assert await refresh_rankings(mock_db) is True
+    mock_db.execute.assert_awaited_once_with(REFRESH_TWEET_RANKINGS)
+    mock_db.commit.assert_awaited()
+
+
+@pytest.mark.asyncio
+async def test_refresh_rankings_skipped_when_locked(mock_db):
+    """Тест на пропуск обновления, если рейтинг обновляет другой воркер.
+
+    Returns:
+        None
+    """
+    mock_db.scalar.return_value = False
+
+    assert await refresh_rankings(mock_db) is False
+    mock_db.execute.assert_not_awaited()
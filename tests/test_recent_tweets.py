@@ -0,0 +1,178 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import events
+from app.services.recent_tweets import (
+    RecentTweetsBuffer,
+    recent_tweets,
+    reload_recent_tweets,
+)
+
+client = TestClient(app)
+
+
+def test_buffer_pages_newest_first(make_tweet):
+    """Тест на постраничную выдачу твитов от новых к старым.
+
+    Returns:
+        None
+    """
+    buffer = RecentTweetsBuffer(capacity=10)
+    buffer.fill([make_tweet(i) for i in (5, 4, 3, 2, 1)], complete=True)
+
+    tweets, last_id = buffer.page(2)
+    assert [tweet["id"] for tweet in tweets] == [5, 4]
+    assert last_id == 4
+
+    tweets, last_id = buffer.page(3, before_id=last_id)
+    assert [tweet["id"] for tweet in tweets] == [3, 2, 1]
+    assert last_id is None
+
+
+def test_buffer_evicts_oldest_and_falls_back(make_tweet):
+    """Тест на вытеснение самого старого твита и отказ отвечать за пределами буфера.
+
+    Returns:
+        None
+    """
+    buffer = RecentTweetsBuffer(capacity=3)
+    assert buffer.page(2) is None
+
+    buffer.fill([make_tweet(i) for i in (3, 2, 1)], complete=True)
+    buffer.add(make_tweet(4))
+
+    tweets, _ = buffer.page(2)
+    assert [tweet["id"] for tweet in tweets] == [4, 3]
+    assert 1 not in buffer.slots
+    # Твит 1 вытеснен, поэтому последнюю страницу отдает база данных
+    assert buffer.page(5, before_id=3) is None
+
+
+def test_buffer_applies_events(make_tweet):
+    """Тест на обновление буфера событиями лайков и удаления твитов.
+
+    Returns:
+        None
+    """
+    recent_tweets.fill([make_tweet(2), make_tweet(1)], complete=True)
+    try:
+        events.publish(
+            events.TWEET_LIKED,
+            {"tweet_id": 1, "author_id": 1, "user_id": 7, "name": "A"},
+        )
+        events.publish(
+            events.TWEET_LIKED,
+            {"tweet_id": 1, "author_id": 1, "user_id": 7, "name": "A"},
+        )
+        events.publish(events.TWEET_DELETED, {"tweet_id": 2, "author_id": 1})
+
+        tweets, _ = recent_tweets.page(10)
+        assert [tweet["id"] for tweet in tweets] == [1]
+        assert tweets[0]["like_count"] == 1
+        assert tweets[0]["likes"] == [{"user_id": 7, "name": "A"}]
+
+        events.publish(
+            events.TWEET_UNLIKED, {"tweet_id": 1, "author_id": 1, "user_id": 7}
+        )
+        tweets, _ = recent_tweets.page(10)
+        assert tweets[0]["like_count"] == 0
+    finally:
+        recent_tweets.fill([], complete=False)
+        recent_tweets.loaded = False
+
+
+def test_fill_skips_journaled_tweets_older_than_snapshot(make_tweet):
+    """Тест на сохранение порядка по id при повторном применении журнала.
+
+    Returns:
+        None
+    """
+    buffer = RecentTweetsBuffer(capacity=10)
+    buffer.begin_reload()
+    # Твит 4 еще не дошел до реплики, а более новый твит 5 уже в снимке
+    buffer.apply(buffer.add, make_tweet(4))
+    buffer.apply(buffer.add, make_tweet(6))
+    buffer.fill([make_tweet(5), make_tweet(3)], complete=True)
+
+    tweets, _ = buffer.page(10)
+    assert [tweet["id"] for tweet in tweets] == [6, 5, 3]
+
+
+@pytest.mark.asyncio
+async def test_reload_keeps_events_published_during_read(make_tweet):
+    """Тест на повторное применение событий, пришедших во время перечитывания.
+
+    Returns:
+        None
+    """
+    recent_tweets.fill([make_tweet(2), make_tweet(1)], complete=True)
+
+    async def read_snapshot(limit, cursor, db):
+        # Снимок реплики прочитан до событий, опубликованных во время запроса
+        events.publish(events.TWEET_CREATED, make_tweet(3))
+        events.publish(events.TWEET_DELETED, {"tweet_id": 2, "author_id": 1})
+        events.publish(
+            events.TWEET_LIKED,
+            {"tweet_id": 1, "author_id": 1, "user_id": 7, "name": "A"},
+        )
+        return [make_tweet(2), make_tweet(1)], None
+
+    session = MagicMock()
+    session.return_value.__aenter__ = AsyncMock()
+    session.return_value.__aexit__ = AsyncMock(return_value=False)
+    try:
+        with patch("app.services.recent_tweets.ReplicaSessionLocal", session), patch(
+            "app.services.tweet_service.get_latest_tweets_page", read_snapshot
+        ), patch(
+            "app.services.tweet_service.hydrate_tweets",
+            AsyncMock(side_effect=lambda tweets, db: tweets),
+        ):
+            await reload_recent_tweets()
+
+        tweets, _ = recent_tweets.page(10)
+        assert [tweet["id"] for tweet in tweets] == [3, 1]
+        assert tweets[1]["likes"] == [{"user_id": 7, "name": "A"}]
+        assert recent_tweets.journal is None
+    finally:
+        recent_tweets.fill([], complete=False)
+        recent_tweets.loaded = False
+
+
+@patch("app.services.user_service.get_user_by_api_key")
+def test_feed_not_modified(mock_get_user, make_tweet):
+    """Тест на ответ 304 для неизменившейся страницы ленты и 200 после лайка.
+
+    Args:
+        mock_get_user (MagicMock): Мок метода получения пользователя по API-ключу.
+
+    Returns:
+        None
+    """
+    mock_get_user.return_value = MagicMock(id=1)
+    headers = {"api-key": "test-api-key"}
+    recent_tweets.fill([make_tweet(2), make_tweet(1)], complete=True)
+    try:
+        response = client.get("/api/tweets?sort=new", headers=headers)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        response = client.get(
+            "/api/tweets?sort=new", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+        events.publish(
+            events.TWEET_LIKED,
+            {"tweet_id": 1, "author_id": 1, "user_id": 7, "name": "A"},
+        )
+        response = client.get(
+            "/api/tweets?sort=new", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.json()["tweets"][1]["like_count"] == 1
+    finally:
+        recent_tweets.fill([], complete=False)
+        recent_tweets.loaded = False
@@ -0,0 +1,28 @@
+from app.api import responses
+
+
+def test_tweet_list_response_serializes_once_with_etag():
+    """Тест на ответ со страницей твитов без повторной валидации.
+
+    Returns:
+        None
+    """
+    tweet = {
+        "id": 1,
+        "content": "Привет",
+        "attachments": [],
+        "author": {"id": 1, "name": "Автор"},
+        "likes": [],
+        "like_count": 0,
+    }
+
+    response = responses.tweet_list_response([tweet], "next", 'W/"tag"')
+
+    assert response.media_type == "application/json"
+    assert response.headers["etag"] == 'W/"tag"'
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.body.decode() == (
+        '{"result":true,"tweets":[{"id":1,"content":"Привет","attachments":[],'
+        '"author":{"id":1,"name":"Автор"},"likes":[],"like_count":0}],'
+        '"next_cursor":"next"}'
+    )
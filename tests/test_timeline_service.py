@@ -0,0 +1,99 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import timeline_service
+
+
+@pytest.fixture
+def mock_db():
+    """Создание мокированного объекта асинхронной сессии базы данных.
+
+    Returns:
+        MagicMock: Мок сессии с асинхронным методом execute.
+    """
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock())
+    yield db
+
+
+def compiled_sql(mock_db) -> str:
+    """Текст последнего выполненного запроса в диалекте PostgreSQL.
+
+    Returns:
+        str: SQL запроса.
+    """
+    statement = mock_db.execute.await_args.args[0]
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_fan_out_tweet_single_statement(mock_db):
+    """Тест на доставку твита автору и подписчикам одним INSERT ... SELECT.
+
+    Returns:
+        None
+    """
+    await timeline_service.fan_out_tweet(10, 1, mock_db)
+
+    mock_db.execute.assert_awaited_once()
+    sql = compiled_sql(mock_db)
+    assert sql.startswith("INSERT INTO home_timeline")
+    assert "FROM user_followers" in sql
+    assert "UNION ALL" in sql
+    assert "ON CONFLICT DO NOTHING" in sql
+    assert "RETURNING" not in sql
+
+
+@pytest.mark.asyncio
+async def test_retract_author_filters_by_owner_and_author(mock_db):
+    """Тест на удаление из ленты только твитов автора, от которого отписались.
+
+    Returns:
+        None
+    """
+    await timeline_service.retract_author(1, 2, mock_db)
+
+    sql = compiled_sql(mock_db)
+    assert sql.startswith("DELETE FROM home_timeline")
+    assert "home_timeline.user_id" in sql
+    assert "home_timeline.author_id" in sql
+
+
+@pytest.mark.asyncio
+async def test_invalidate_author_followers_reads_cached_users_only(mock_db):
+    """Тест на выборку подписчиков автора только среди закешированных лент.
+
+    Returns:
+        None
+    """
+    timeline_service.home_timeline_cache.clear()
+    timeline_service.home_timeline_cache.set(1, ((5,), False))
+    timeline_service.home_timeline_cache.set(3, ((5,), False))
+    mock_db.scalars = AsyncMock(return_value=MagicMock(all=MagicMock(return_value=[3])))
+
+    await timeline_service.invalidate_author_followers(2, mock_db)
+
+    statement = mock_db.scalars.await_args.args[0]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "= ANY (%(cached_user_ids)s::INTEGER[])" in sql
+    assert statement.compile().params["cached_user_ids"] == [1, 3]
+    assert timeline_service.home_timeline_cache.get(1) == ((5,), False)
+    assert timeline_service.home_timeline_cache.get(3) is None
+    assert timeline_service.invalidated_timelines.get(2)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_author_followers_skips_query_without_cache(mock_db):
+    """Тест на отсутствие запроса, если в кеше нет лент.
+
+    Returns:
+        None
+    """
+    timeline_service.home_timeline_cache.clear()
+    mock_db.scalars = AsyncMock()
+
+    await timeline_service.invalidate_author_followers(2, mock_db)
+
+    mock_db.scalars.assert_not_awaited()
@@ -0,0 +1,69 @@
+from app.services import events
+from app.services.trending import TrendingCounter, trending
+
+
+def test_window_expires_old_buckets():
+    """Тест на вычитание лайков, вышедших из окна.
+
+    Returns:
+        None
+    """
+    counter = TrendingCounter(bucket_seconds=60, window_buckets=3, size=10)
+    counter.add(1, 1, now=0)
+    counter.add(1, 1, now=30)
+    counter.add(2, 1, now=90)
+
+    assert counter.refresh(now=150) == [(1, 2), (2, 1)]
+    assert counter.refresh(now=180) == [(2, 1)]
+    assert counter.refresh(now=300) == []
+    assert counter.totals == {}
+
+
+def test_top_is_bounded_and_ordered():
+    """Тест на размер снимка топа и порядок при равных счетчиках.
+
+    Returns:
+        None
+    """
+    counter = TrendingCounter(bucket_seconds=60, window_buckets=60, size=2)
+    for tweet_id, likes in ((1, 3), (2, 1), (3, 3), (4, 2)):
+        for _ in range(likes):
+            counter.add(tweet_id, 1, now=10)
+
+    counter.refresh(now=20)
+
+    assert counter.top == [(3, 3), (1, 3)]
+    assert counter.page(1) == [3]
+
+
+def test_unlike_and_delete():
+    """Тест на снятие лайка и удаление твита.
+
+    Returns:
+        None
+    """
+    counter = TrendingCounter(bucket_seconds=60, window_buckets=60, size=10)
+    counter.add(1, 1, now=0)
+    counter.add(1, -1, now=1)
+    counter.add(2, -1, now=1)
+    counter.add(3, 1, now=1)
+    counter.refresh(now=2)
+    assert counter.top == [(3, 1)]
+
+    counter.remove(3)
+    assert counter.top == []
+    assert counter.refresh(now=3) == []
+
+
+def test_events_feed_module_counter():
+    """Тест на учет событий лайков в счетчике воркера.
+
+    Returns:
+        None
+    """
+    payload = {"tweet_id": 987654, "author_id": 1, "user_id": 2, "name": "A"}
+    events.publish(events.TWEET_LIKED, payload)
+    assert trending.totals[987654] == 1
+
+    events.publish(events.TWEET_DELETED, {"tweet_id": 987654, "author_id": 1})
+    assert 987654 not in trending.totals
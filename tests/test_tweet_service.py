@@ -1,12 +1,29 @@
-from unittest.mock import MagicMock
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
 
+from app.services.timeline_service import (
+    home_timeline_cache,
+    invalidate_author_followers,
+    invalidated_timelines,
+)
 from app.services.tweet_service import (
     create_tweet,
+    decode_cursor,
     delete_tweet,
+    encode_cursor,
+    feed_query,
+    get_home_timeline_page,
     get_tweet_by_id,
+    get_tweets_page,
+    get_user_feed_page,
+    hydrate_tweets,
     like_tweet,
+    stream_feed,
+    tweet_cache,
     unlike_tweet,
 )
 
@@ -14,12 +31,24 @@ from app.services.tweet_service import (
 # Создание моков для базы данных и пользователя
 @pytest.fixture
 def mock_db():
-    """Создание мокированного объекта базы данных.
+    """Создание мокированного объекта асинхронной сессии базы данных.
 
     Returns:
-        MagicMock: Мок базы данных.
+        MagicMock: Мок сессии с асинхронными методами.
     """
     db = MagicMock()
+    for method in (
+        "execute",
+        "scalar",
+        "scalars",
+        "get",
+        "flush",
+        "commit",
+        "refresh",
+        "delete",
+    ):
+        setattr(db, method, AsyncMock())
+    db.execute.return_value = MagicMock()
     yield db
 
 
@@ -60,14 +89,9 @@ async def test_create_tweet(mock_db, tweet_data, mock_user):
     Returns:
         None
     """
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
-    mock_db.query.return_value.filter.return_value.first.return_value = None
-
     # Мокаем создание твита с ID 123
     mock_db.add.side_effect = lambda x: setattr(x, "id", 123)
-    mock_db.query.return_value.filter.return_value.first.return_value = MagicMock(id=1)
+    mock_db.get.return_value = MagicMock(id=1)
 
     # Создаем твит
     tweet_id = await create_tweet(
@@ -78,14 +102,15 @@ async def test_create_tweet(mock_db, tweet_data, mock_user):
     assert tweet_id is not None
     assert tweet_id == 123
     mock_db.add.assert_called()
-    mock_db.commit.assert_called()
+    mock_db.commit.assert_awaited()
 
 
 @pytest.mark.asyncio
 async def test_like_tweet(mock_db, mock_user):
     """Тест на лайк твита.
 
-    Проверяет, что лайк твита добавляется правильно.
+    Проверяет, что лайк и счетчик твита изменяются одним запросом
+    и возвращается автор твита.
 
     Args:
         mock_db (MagicMock): Мок базы данных.
@@ -94,24 +119,29 @@ async def test_like_tweet(mock_db, mock_user):
     Returns:
         None
     """
-    mock_tweet = MagicMock(id=1, user_id=mock_user.id)
-    mock_db.query.return_value.filter.return_value.first.return_value = mock_tweet
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
+    mock_db.execute.return_value.one_or_none.return_value = SimpleNamespace(
+        user_id=5, changed=True
+    )
 
     # Лайк твита
-    await like_tweet(mock_tweet.id, mock_user.id, mock_db)
+    changed, author_id = await like_tweet(1, mock_user, mock_db)
 
     # Проверки
-    mock_db.add.assert_called()
-    mock_db.commit.assert_called()
+    assert changed is True
+    assert author_id == 5
+    mock_db.execute.assert_awaited_once()
+    query = str(mock_db.execute.await_args.args[0])
+    assert "INSERT INTO tweet_likes" in query
+    assert "ON CONFLICT" in query
+    assert "UPDATE tweets" in query
+    mock_db.commit.assert_awaited()
 
 
 @pytest.mark.asyncio
 async def test_unlike_tweet(mock_db, mock_user):
     """Тест на удаление лайка с твита.
 
-    Проверяет, что лайк твита удаляется корректно.
+    Проверяет, что лайк удаляется и счетчик уменьшается одним запросом.
 
     Args:
         mock_db (MagicMock): Мок базы данных.
@@ -120,18 +150,21 @@ async def test_unlike_tweet(mock_db, mock_user):
     Returns:
         None
     """
-    mock_tweet = MagicMock(id=1, user_id=mock_user.id)
-    mock_like = MagicMock(user_id=mock_user.id, tweet_id=mock_tweet.id)
-    mock_db.query.return_value.filter.return_value.first.return_value = mock_like
-    mock_db.delete.return_value = None
-    mock_db.commit.return_value = None
+    mock_db.execute.return_value.one_or_none.return_value = SimpleNamespace(
+        user_id=5, changed=True
+    )
 
     # Удаление лайка с твита
-    await unlike_tweet(mock_tweet.id, mock_user.id, mock_db)
+    changed, author_id = await unlike_tweet(1, mock_user.id, mock_db)
 
     # Проверки
-    mock_db.delete.assert_called()
-    mock_db.commit.assert_called()
+    assert changed is True
+    assert author_id == 5
+    mock_db.execute.assert_awaited_once()
+    query = str(mock_db.execute.await_args.args[0])
+    assert "DELETE FROM tweet_likes" in query
+    assert "like_count - " in query
+    mock_db.commit.assert_awaited()
 
 
 @pytest.mark.asyncio
@@ -147,7 +180,7 @@ async def test_get_tweet_by_id(mock_db):
         None
     """
     mock_tweet = MagicMock(id=1, content="This is a test tweet")
-    mock_db.query.return_value.filter.return_value.first.return_value = mock_tweet
+    mock_db.get.return_value = mock_tweet
 
     # Получаем твит по ID
     tweet = await get_tweet_by_id(1, mock_db)
@@ -169,14 +202,288 @@ async def test_delete_tweet(mock_db):
     Returns:
         None
     """
-    mock_tweet = MagicMock(id=1, content="This is a test tweet")
-    mock_db.query.return_value.filter.return_value.first.return_value = mock_tweet
-    mock_db.delete.return_value = None
-    mock_db.commit.return_value = None
+    mock_tweet = MagicMock(id=1, content="This is a test tweet", user_id=1)
+    mock_db.get.return_value = mock_tweet
+    mock_db.scalars.return_value = MagicMock(all=MagicMock(return_value=[]))
 
     # Удаляем твит
     await delete_tweet(1, mock_db)
 
     # Проверки
-    mock_db.delete.assert_called()
-    mock_db.commit.assert_called()
+    mock_db.delete.assert_awaited_with(mock_tweet)
+    mock_db.commit.assert_awaited()
+
+
+@pytest.mark.asyncio
+async def test_unlike_tweet_without_like(mock_db, mock_user):
+    """Тест на удаление несуществующего лайка и повторный лайк.
+
+    Проверяет, что без изменения лайков не возвращается автор для события.
+
+    Args:
+        mock_db (MagicMock): Мок базы данных.
+        mock_user (MagicMock): Мок пользователя.
+
+    Returns:
+        None
+    """
+    mock_db.execute.return_value.one_or_none.return_value = SimpleNamespace(
+        user_id=5, changed=False
+    )
+
+    assert await unlike_tweet(1, mock_user.id, mock_db) == (False, None)
+    assert await like_tweet(1, mock_user, mock_db) == (False, None)
+    assert mock_db.execute.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_like_missing_tweet(mock_db, mock_user):
+    """Тест на лайк несуществующего твита.
+
+    Args:
+        mock_db (MagicMock): Мок базы данных.
+        mock_user (MagicMock): Мок пользователя.
+
+    Returns:
+        None
+    """
+    mock_db.execute.return_value.one_or_none.return_value = None
+
+    with pytest.raises(HTTPException) as exc:
+        await like_tweet(1, mock_user, mock_db)
+    assert exc.value.status_code == 404
+
+
+def test_cursor_round_trip():
+    """Тест на декодирование курсора, созданного encode_cursor.
+
+    Returns:
+        None
+    """
+    assert decode_cursor(encode_cursor(42)) == (42,)
+    assert decode_cursor(encode_cursor(15, 42), size=2) == (15, 42)
+
+
+def test_invalid_cursor_rejected():
+    """Тест на отклонение поврежденного курсора с кодом 400.
+
+    Returns:
+        None
+    """
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_tweets_page_returns_like_count_cursor(mock_db):
+    """Тест на обрезку лишнего твита и курсор (лайки в снимке, id твита).
+
+    Returns:
+        None
+    """
+    rows = [
+        SimpleNamespace(Tweet=SimpleNamespace(id=tweet_id), sort_key=likes)
+        for tweet_id, likes in ((8, 5), (3, 5), (9, 2))
+    ]
+    mock_db.execute.return_value = MagicMock(all=MagicMock(return_value=rows))
+
+    page, next_cursor = await get_tweets_page(2, None, mock_db)
+
+    assert page == [rows[0].Tweet, rows[1].Tweet]
+    assert decode_cursor(next_cursor, size=2) == (5, 3)
+
+
+@pytest.mark.asyncio
+async def test_get_tweets_page_last_page(mock_db):
+    """Тест на отсутствие курсора у последней страницы.
+
+    Returns:
+        None
+    """
+    rows = [SimpleNamespace(Tweet=SimpleNamespace(id=1), sort_key=6)]
+    mock_db.execute.return_value = MagicMock(all=MagicMock(return_value=rows))
+
+    page, next_cursor = await get_tweets_page(2, encode_cursor(7, 2), mock_db)
+
+    assert page == [rows[0].Tweet]
+    assert next_cursor is None
+
+
+def test_feed_query_likes_keyset_on_snapshot_like_count():
+    """Тест на курсор популярной ленты и твиты, созданные после снимка.
+
+    Returns:
+        None
+    """
+    query = str(
+        feed_query("likes", 2, encode_cursor(7, 2)).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+
+    assert "(ranked.like_count, ranked.tweet_id) <" in query
+    assert "ORDER BY ranked.like_count DESC, ranked.tweet_id DESC" in query
+    # Твиты новее снимка берутся из tweets с текущим количеством лайков
+    assert "UNION ALL" in query
+    assert "tweets.id > (SELECT coalesce(max(tweet_rankings.tweet_id)" in query
+    with pytest.raises(HTTPException):
+        feed_query("likes", 2, encode_cursor(3))
+
+
+@pytest.mark.asyncio
+async def test_hydrate_tweets_uses_batched_queries(mock_db, make_tweet_model):
+    """Тест на сборку страницы твитов двумя запросами независимо от ее размера.
+
+    Returns:
+        None
+    """
+    tweet_cache.clear()
+    tweets = [make_tweet_model(tweet_id) for tweet_id in (1, 2, 3)]
+    mock_db.execute.side_effect = [
+        [(1, "a.png"), (3, "b.png"), (1, "c.png")],
+        [(2, 5, "Liker"), (2, 6, "Other")],
+    ]
+
+    result = await hydrate_tweets(tweets, mock_db)
+
+    assert mock_db.execute.await_count == 2
+    assert [tweet["attachments"] for tweet in result] == [
+        ["a.png", "c.png"],
+        [],
+        ["b.png"],
+    ]
+    assert result[1]["likes"] == [
+        {"user_id": 5, "name": "Liker"},
+        {"user_id": 6, "name": "Other"},
+    ]
+    assert result[0]["author"] == {"id": 1, "name": "Author"}
+
+
+@pytest.mark.asyncio
+async def test_get_home_timeline_page_uses_id_cursor(mock_db):
+    """Тест на курсор домашней ленты по идентификатору последнего твита.
+
+    Returns:
+        None
+    """
+    tweets = [SimpleNamespace(id=tweet_id) for tweet_id in (9, 7, 4)]
+    mock_db.scalars.return_value = MagicMock(all=MagicMock(return_value=tweets))
+
+    page, next_cursor = await get_home_timeline_page(1, 2, encode_cursor(12), mock_db)
+
+    assert page == tweets[:2]
+    assert decode_cursor(next_cursor) == (7,)
+    with pytest.raises(HTTPException):
+        decode_cursor(next_cursor, size=2)
+
+
+@pytest.mark.asyncio
+async def test_home_timeline_first_page_cached(mock_db):
+    """Тест на чтение id первой страницы ленты из кеша и его сброс после записи.
+
+    Returns:
+        None
+    """
+    home_timeline_cache.clear()
+    invalidated_timelines.clear()
+    tweets = [SimpleNamespace(id=tweet_id) for tweet_id in (4, 9, 7)]
+    mock_db.scalars.side_effect = [
+        MagicMock(all=MagicMock(return_value=[9, 7, 4])),
+        MagicMock(all=MagicMock(return_value=tweets)),
+        MagicMock(all=MagicMock(return_value=tweets)),
+    ]
+
+    page, next_cursor = await get_home_timeline_page(1, 2, None, mock_db)
+    assert [tweet.id for tweet in page] == [9, 7]
+    assert decode_cursor(next_cursor) == (7,)
+
+    # Повторный запрос не читает home_timeline
+    page, _ = await get_home_timeline_page(1, 2, None, mock_db)
+    assert [tweet.id for tweet in page] == [9, 7]
+    assert mock_db.scalars.await_count == 3
+
+    mock_db.scalars.side_effect = [
+        MagicMock(all=MagicMock(return_value=[1])),
+        MagicMock(all=MagicMock(return_value=[9, 7, 4])),
+        MagicMock(all=MagicMock(return_value=tweets)),
+    ]
+    await invalidate_author_followers(2, mock_db)
+    assert home_timeline_cache.get(1) is None
+
+    # Сразу после сброса прочитанная лента не кешируется
+    await get_home_timeline_page(1, 2, None, mock_db)
+    assert home_timeline_cache.get(1) is None
+
+
+@pytest.mark.asyncio
+async def test_hydrate_tweets_reuses_cached_versions(mock_db, make_tweet_model):
+    """Тест на выборку из базы только твитов, чья версия отсутствует в кеше.
+
+    Returns:
+        None
+    """
+    tweet_cache.clear()
+    mock_db.execute.side_effect = [[], [], [], [(2, 5, "Liker")]]
+    await hydrate_tweets([make_tweet_model(1), make_tweet_model(2)], mock_db)
+
+    result = await hydrate_tweets(
+        [make_tweet_model(1), make_tweet_model(2, version=2)], mock_db
+    )
+
+    assert mock_db.execute.await_count == 4
+    assert mock_db.execute.await_args_list[2].args[0].compile().params == {
+        "tweet_id_1": [2]
+    }
+    assert result[1]["likes"] == [{"user_id": 5, "name": "Liker"}]
+    assert result[0]["likes"] == []
+
+
+@pytest.mark.asyncio
+async def test_stream_feed_yields_batches_and_cursor(mock_db):
+    """Тест на выдачу страницы пачками из серверного курсора и курсор в конце.
+
+    Returns:
+        None
+    """
+
+    async def partitions():
+        for ids in ((1, 2), (3, 4)):
+            yield [
+                SimpleNamespace(Tweet=tweet_id, sort_key=tweet_id) for tweet_id in ids
+            ]
+
+    mock_db.stream = AsyncMock(return_value=MagicMock(partitions=partitions))
+
+    batches = [
+        batch async for batch in stream_feed("new", 3, None, mock_db, batch_size=2)
+    ]
+
+    assert batches[0] == ([1, 2], None)
+    assert batches[1][0] == [3]
+    assert decode_cursor(batches[1][1]) == (3,)
+
+
+@pytest.mark.asyncio
+async def test_user_feed_page_returns_keys_and_cursor(mock_db):
+    """Тест на страницу твитов пользователя в виде ключей (id, version).
+
+    Returns:
+        None
+    """
+    mock_db.execute.return_value = [
+        SimpleNamespace(id=9, version=2),
+        SimpleNamespace(id=7, version=1),
+        SimpleNamespace(id=4, version=3),
+    ]
+
+    keys, next_cursor = await get_user_feed_page(1, 2, None, mock_db)
+    assert keys == [(9, 2), (7, 1)]
+    assert decode_cursor(next_cursor) == (7,)
+
+    query = str(mock_db.execute.await_args.args[0])
+    assert "tweets.content" not in query
+
+    keys, next_cursor = await get_user_feed_page(1, 5, next_cursor, mock_db)
+    assert next_cursor is None
+    assert "tweets.id <" in str(mock_db.execute.await_args.args[0])
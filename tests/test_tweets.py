@@ -1,8 +1,14 @@
+from unittest.mock import MagicMock, patch
+
 from fastapi.testclient import TestClient
+from sqlalchemy import select
 
+from app import config
 from app.db.database import SessionLocal
 from app.db.models import Tweet, User
 from app.main import app
+from app.services.tweet_service import encode_cursor
+from app.services.user_service import hash_api_key
 
 client = TestClient(app)
 
@@ -31,7 +37,7 @@ def test_create_and_delete_tweet():
     assert response.status_code == 200
 
 
-def create_or_get_test_user(api_key: str, name: str) -> User:
+async def create_or_get_test_user(api_key: str, name: str) -> User:
     """Создание или получение тестового пользователя по ключу API.
 
     Если пользователь с указанным ключом API не найден, то он будет создан.
@@ -43,18 +49,17 @@ def create_or_get_test_user(api_key: str, name: str) -> User:
     Returns:
         User: Пользователь, созданный или найденный в базе данных.
     """
-    db = SessionLocal()
-    user = db.query(User).filter(User.api_key == api_key).first()
-    if not user:
-        user = User(name=name, api_key=api_key)
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    db.close()
+    async with SessionLocal() as db:
+        user = await db.scalar(select(User).where(User.api_key == api_key))
+        if not user:
+            user = User(name=name, api_key=api_key, api_key_hash=hash_api_key(api_key))
+            db.add(user)
+            await db.commit()
+            await db.refresh(user)
     return user
 
 
-def create_test_tweet(user_id: int) -> Tweet:
+async def create_test_tweet(user_id: int) -> Tweet:
     """Создание тестового твита для пользователя.
 
     Args:
@@ -63,9 +68,102 @@ def create_test_tweet(user_id: int) -> Tweet:
     Returns:
         Tweet: Созданный твит.
     """
-    db = SessionLocal()
-    tweet = Tweet(content="This is a test tweet", user_id=user_id)
-    db.add(tweet)
-    db.commit()
-    db.refresh(tweet)
+    async with SessionLocal() as db:
+        tweet = Tweet(content="This is a test tweet", user_id=user_id)
+        db.add(tweet)
+        await db.commit()
+        await db.refresh(tweet)
     return tweet
+
+
+@patch("app.services.tweet_service.hydrate_tweets")
+@patch("app.services.tweet_service.stream_feed")
+@patch("app.services.user_service.get_user_by_api_key")
+def test_export_tweets_streams_feed_shape(mock_get_user, mock_stream, mock_hydrate):
+    """Тест на потоковую выгрузку ленты в формате ответа GET /api/tweets.
+
+    Args:
+        mock_get_user (MagicMock): Мок метода получения пользователя по API-ключу.
+        mock_stream (MagicMock): Мок чтения ленты из серверного курсора.
+        mock_hydrate (MagicMock): Мок сборки твитов.
+
+    Returns:
+        None
+    """
+    mock_get_user.return_value = MagicMock(id=1)
+
+    async def batches(*args):
+        yield [1, 2], None
+        yield [3], "next"
+
+    mock_stream.side_effect = batches
+    mock_hydrate.side_effect = lambda tweets, db: [
+        {"id": tweet_id, "content": "Привет"} for tweet_id in tweets
+    ]
+
+    response = client.get("/api/tweets/export", headers={"api-key": "test-api-key"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "result": True,
+        "tweets": [
+            {"id": 1, "content": "Привет"},
+            {"id": 2, "content": "Привет"},
+            {"id": 3, "content": "Привет"},
+        ],
+        "next_cursor": "next",
+    }
+
+    # Курсор популярной ленты из next_cursor передается обратно
+    likes_cursor = encode_cursor(5, 3)
+    response = client.get(
+        "/api/tweets/export",
+        params={"cursor": likes_cursor},
+        headers={"api-key": "test-api-key"},
+    )
+    assert response.status_code == 200
+    assert mock_stream.call_args.args[:3] == (
+        "likes",
+        config.TWEETS_EXPORT_MAX_SIZE,
+        likes_cursor,
+    )
+
+    # Курсор другой формы отклоняется до начала потокового ответа
+    response = client.get(
+        "/api/tweets/export",
+        params={"cursor": encode_cursor(5)},
+        headers={"api-key": "test-api-key"},
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+@patch("app.services.events.publish")
+@patch("app.services.tweet_service.unlike_tweet")
+@patch("app.services.tweet_service.like_tweet")
+@patch("app.services.user_service.get_user_by_api_key")
+def test_like_routes_report_changed(
+    mock_get_user, mock_like, mock_unlike, mock_publish
+):
+    """Тест на признак changed в ответах лайка и снятия лайка.
+
+    Args:
+        mock_get_user (MagicMock): Мок метода получения пользователя по API-ключу.
+        mock_like (MagicMock): Мок лайка твита.
+        mock_unlike (MagicMock): Мок снятия лайка.
+        mock_publish (MagicMock): Мок публикации события.
+
+    Returns:
+        None
+    """
+    mock_get_user.return_value = MagicMock(id=1)
+    mock_like.return_value = (True, 5)
+    mock_unlike.return_value = (False, None)
+
+    response = client.post("/api/tweets/3/likes", headers={"api-key": "test-api-key"})
+    assert response.json() == {"result": True, "changed": True}
+    mock_publish.assert_called_once()
+
+    response = client.delete("/api/tweets/3/likes", headers={"api-key": "test-api-key"})
+    assert response.json() == {"result": True, "changed": False}
+    mock_publish.assert_called_once()
@@ -0,0 +1,57 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services import timeline_service, user_service
+
+
+@pytest.fixture
+def mock_db():
+    """Создание мокированного объекта асинхронной сессии базы данных.
+
+    Returns:
+        MagicMock: Мок сессии с асинхронными методами.
+    """
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock())
+    db.scalar = AsyncMock()
+    db.commit = AsyncMock()
+    yield db
+
+
+@pytest.mark.asyncio
+async def test_unfollow_user_single_delete_returning(mock_db):
+    """Тест на отписку одним DELETE ... RETURNING и изменение счетчиков.
+
+    Returns:
+        None
+    """
+    mock_db.scalar.return_value = 42
+    timeline_service.home_timeline_cache.set(1, ((5,), False))
+
+    await user_service.unfollow_user(1, 2, mock_db)
+
+    statement = mock_db.scalar.await_args.args[0]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("DELETE FROM user_followers")
+    assert "RETURNING user_followers.id" in sql
+    # Два счетчика и удаление твитов автора из ленты
+    assert mock_db.execute.await_count == 3
+    mock_db.commit.assert_awaited_once()
+    assert timeline_service.home_timeline_cache.get(1) is None
+
+
+@pytest.mark.asyncio
+async def test_unfollow_user_without_follow_keeps_counters(mock_db):
+    """Тест на отсутствие изменений, если подписку уже удалил другой запрос.
+
+    Returns:
+        None
+    """
+    mock_db.scalar.return_value = None
+
+    await user_service.unfollow_user(1, 2, mock_db)
+
+    mock_db.execute.assert_not_awaited()
+    mock_db.commit.assert_awaited_once()
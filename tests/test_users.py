@@ -9,13 +9,15 @@ client = TestClient(app)
 
 @patch("app.services.user_service.get_user_by_api_key")
 @patch("app.services.user_service.get_user_info")
-def test_get_current_user(mock_get_user_info, mock_get_user):
+@patch("app.services.user_service.get_user_by_id")
+def test_get_current_user(mock_get_user_by_id, mock_get_user_info, mock_get_user):
     """Тест на получение текущего пользователя.
 
     Проверяет, что API корректно возвращает информацию о текущем
     пользователе по API-ключу.
 
     Args:
+        mock_get_user_by_id (MagicMock): Мок метода получения пользователя по ID.
         mock_get_user_info (MagicMock): Мок метода получения информации о пользователе.
         mock_get_user (MagicMock): Мок метода получения пользователя по API-ключу.
 
@@ -27,11 +29,15 @@ def test_get_current_user(mock_get_user_info, mock_get_user):
     mock_user.name = "Test User"
     mock_user.api_key = "test-api-key"
     mock_get_user.return_value = mock_user
+    mock_get_user_by_id.return_value = mock_user
     mock_get_user_info.return_value = {
         "id": 1,
         "name": "Test User",
         "followers": [{"id": 2, "name": "Follower 1"}],
         "following": [{"id": 3, "name": "Following 1"}],
+        "followers_count": 1,
+        "following_count": 1,
+        "tweets_count": 0,
     }
     response = client.get("/api/users/me", headers={"api-key": "test-api-key"})
     assert response.status_code == 200
@@ -41,6 +47,7 @@ def test_get_current_user(mock_get_user_info, mock_get_user):
     assert response_json["user"]["name"] == "Test User"
     assert len(response_json["user"]["followers"]) == 1
     assert len(response_json["user"]["following"]) == 1
+    assert response_json["user"]["followers_count"] == 1
 
 
 @patch("app.services.user_service.get_user_by_api_key")
@@ -72,6 +79,9 @@ def test_get_user(mock_get_user_by_id, mock_get_user_info, mock_get_user):
         "name": "Target User",
         "followers": [{"id": 1, "name": "Test User"}],
         "following": [{"id": 3, "name": "Following 1"}],
+        "followers_count": 1,
+        "following_count": 1,
+        "tweets_count": 0,
     }
     response = client.get("/api/users/2", headers={"api-key": "test-api-key"})
     assert response.status_code == 200
@@ -135,3 +145,143 @@ def test_unfollow_user(mock_unfollow_user, mock_get_user_info, mock_get_user):
     assert response.status_code == 200
     response_json = response.json()
     assert response_json["result"] is True
+
+
+def test_get_current_user_without_api_key():
+    """Тест на запрос текущего пользователя без API-ключа.
+
+    Проверяет, что запрос отклоняется с ошибкой 403 до обращения к базе данных.
+
+    Returns:
+        None
+    """
+    response = client.get("/api/users/me")
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Unauthorized"}
+
+
+@patch("app.services.user_service.get_user_info")
+@patch("app.services.user_service.get_user_by_api_key", return_value=None)
+def test_get_current_user_invalid_api_key(mock_get_user, mock_get_user_info):
+    """Тест на запрос текущего пользователя с неверным API-ключом.
+
+    Проверяет, что запрос отклоняется с ошибкой 403, а обработчик
+    не выполняется.
+
+    Args:
+        mock_get_user (MagicMock): Мок метода получения пользователя по API-ключу.
+        mock_get_user_info (MagicMock): Мок метода получения информации о пользователе.
+
+    Returns:
+        None
+    """
+    response = client.get("/api/users/me", headers={"api-key": "invalid-key"})
+    assert response.status_code == 403
+    assert response.json() == {"detail": "Unauthorized"}
+    mock_get_user_info.assert_not_called()
+
+
+@patch("app.services.user_service.get_user_by_api_key")
+@patch("app.services.user_service.get_user_info")
+@patch("app.services.user_service.get_user_by_id")
+def test_get_user_not_modified(mock_get_user_by_id, mock_get_user_info, mock_get_user):
+    """Тест на ответ 304 без сборки профиля, если версия профиля не изменилась.
+
+    Args:
+        mock_get_user_by_id (MagicMock): Мок метода получения пользователя по ID.
+        mock_get_user_info (MagicMock): Мок метода получения информации о пользователе.
+        mock_get_user (MagicMock): Мок метода получения пользователя по API-ключу.
+
+    Returns:
+        None
+    """
+    mock_get_user.return_value = MagicMock(id=1)
+    mock_target_user = MagicMock(id=2, version=5)
+    mock_get_user_by_id.return_value = mock_target_user
+    mock_get_user_info.return_value = {
+        "id": 2,
+        "name": "Target User",
+        "followers": [],
+        "following": [],
+        "followers_count": 0,
+        "following_count": 0,
+        "tweets_count": 0,
+    }
+    response = client.get("/api/users/2", headers={"api-key": "test-api-key"})
+    etag = response.headers["etag"]
+
+    response = client.get(
+        "/api/users/2", headers={"api-key": "test-api-key", "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert mock_get_user_info.call_count == 1
+
+    mock_target_user.version = 6
+    response = client.get(
+        "/api/users/2", headers={"api-key": "test-api-key", "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@patch("app.services.tweet_service.hydrate_tweets")
+@patch("app.services.tweet_service.get_tweets_by_ids")
+@patch("app.services.tweet_service.get_user_feed_page")
+@patch("app.services.user_service.get_user_by_api_key")
+def test_get_user_tweets(mock_get_user, mock_page, mock_by_ids, mock_hydrate):
+    """Тест на страницу твитов пользователя и ответ 304 без загрузки твитов.
+
+    Args:
+        mock_get_user (MagicMock): Мок метода получения пользователя по API-ключу.
+        mock_page (MagicMock): Мок чтения ключей (id, version) страницы.
+        mock_by_ids (MagicMock): Мок загрузки твитов по id.
+        mock_hydrate (MagicMock): Мок сборки твитов.
+
+    Returns:
+        None
+    """
+    mock_get_user.return_value = MagicMock(id=1)
+    mock_page.return_value = ([(9, 2), (7, 1)], "next")
+    mock_by_ids.side_effect = lambda tweet_ids, db: tweet_ids
+    mock_hydrate.side_effect = lambda tweets, db: [
+        {"id": tweet_id} for tweet_id in tweets
+    ]
+    headers = {"api-key": "test-api-key"}
+
+    response = client.get("/api/users/2/tweets?limit=2", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "result": True,
+        "tweets": [{"id": 9}, {"id": 7}],
+        "next_cursor": "next",
+    }
+    assert mock_page.call_args.args[:3] == (2, 2, None)
+
+    response = client.get(
+        "/api/users/2/tweets?limit=2",
+        headers={**headers, "If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == 304
+    assert mock_by_ids.call_count == 1
+
+
+@patch("app.services.user_service.get_user_by_id")
+@patch("app.services.tweet_service.get_user_feed_page")
+@patch("app.services.user_service.get_user_by_api_key")
+def test_get_user_tweets_unknown_user(mock_get_user, mock_page, mock_get_user_by_id):
+    """Тест на ошибку 404 для несуществующего пользователя.
+
+    Args:
+        mock_get_user (MagicMock): Мок метода получения пользователя по API-ключу.
+        mock_page (MagicMock): Мок чтения ключей (id, version) страницы.
+        mock_get_user_by_id (MagicMock): Мок метода получения пользователя по ID.
+
+    Returns:
+        None
+    """
+    mock_get_user.return_value = MagicMock(id=1)
+    mock_page.return_value = ([], None)
+    mock_get_user_by_id.return_value = None
+
+    response = client.get("/api/users/99/tweets", headers={"api-key": "test-api-key"})
+    assert response.status_code == 404